@@ -0,0 +1,414 @@
+"""Benchmarks for the Mars Rover.
+
+Run every benchmark with:
+    python benchmark_toy_robot.py
+
+or name the benchmarks to run, e.g.:
+    python benchmark_toy_robot.py construction command
+
+Results can be saved as JSON with --json, and compared against a saved baseline with
+--baseline. Any result more than --tolerance (20% by default) worse than the baseline
+is reported as a regression and the exit status is 1, as it is for any result over its
+budget in BUDGETS.
+"""
+from typing import Callable, Dict, List
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from rover_large_grid import LargeGridRover
+from rover_logging import ROVER_LOGGER_NAME, configure_logging, set_log_mode, shutdown_logging
+from rover_parallel import RoverScript, run_scripts_parallel
+from rover_replay import replay_log
+from rover_script import compile_script, run_compiled
+from rover_script_cache import ScriptCache
+from rover_transition import Transition
+from toy_robot import MarsRover
+
+# Version of the JSON results format.
+RESULTS_VERSION = 1
+
+DEFAULT_TOLERANCE = 0.2
+
+# Limits on results, whatever the baseline. The start up of drive_toy_robot.py, above
+# that of the interpreter itself, measured about 38ms when the budget was set.
+BUDGETS = {
+    "cold_start/overhead": 50.0,
+}
+
+
+def _rate(func: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """Return the best rate at which func can be called, in calls per second."""
+    return number / min(timeit.repeat(func, number=number, repeat=repeat))
+
+
+def _reset_logging() -> None:
+    """Remove any log sink and log mode chosen by an earlier benchmark."""
+    shutdown_logging()
+    set_log_mode("full")
+    logging.getLogger(ROVER_LOGGER_NAME).setLevel(logging.NOTSET)
+
+
+def _logging_off() -> None:
+    """Turn rover logging off, so benchmarks measure the rover rather than the log."""
+    _reset_logging()
+    configure_logging("null")
+    set_log_mode("off")
+
+
+def _random_script(generator: random.Random, length: int) -> List[str]:
+    """Return a script of random commands, mostly moves and turns."""
+    commands = ["MOVE", "MOVE", "MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 1,1,NORTH", "JUMP"]
+    return ["PLACE 0,0,NORTH"] + [generator.choice(commands) for _ in range(length - 1)]
+
+
+def bench_construction(scale: float = 1.0) -> Dict[str, float]:
+    """Measure MarsRover construction throughput, in rovers per second, for each log
+    sink. "basicConfig" reproduces the original behaviour of calling
+    logging.basicConfig from every MarsRover.__init__.
+    """
+    number = max(1, int(20000 * scale))
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir:
+        log_file = os.path.join(log_dir, 'MarsRover.log')
+        for sink in ["file", "queue", "null"]:
+            _reset_logging()
+            configure_logging(sink, filename=log_file)
+            results[sink] = _rate(MarsRover, number)
+
+        # Reproduce the original set up, where every MarsRover.__init__ called
+        # logging.basicConfig and records went to a file handler on the root logger.
+        _reset_logging()
+        root_handlers = list(logging.root.handlers)
+        root_level = logging.root.level
+        logging.root.handlers = []
+
+        def construct_with_basic_config():
+            logging.basicConfig(filename=log_file, filemode='w', level=logging.INFO)
+            return MarsRover()
+
+        configure_logging("root")
+        results["basicConfig"] = _rate(construct_with_basic_config, number)
+        for handler in logging.root.handlers:
+            handler.close()
+        logging.root.handlers = root_handlers
+        logging.root.setLevel(root_level)
+        shutdown_logging()
+
+    return results
+
+
+def bench_command(scale: float = 1.0) -> Dict[str, float]:
+    """Measure the latency of a single call to MarsRover.recieve_command, in nanoseconds,
+    for each type of command, with logging off.
+    """
+    _logging_off()
+    number = max(1, int(100000 * scale))
+    results = {}
+    for case, command in [("move", "MOVE"), ("left", "LEFT"), ("right", "RIGHT"),
+                          ("report", "REPORT"), ("place", "PLACE 1,2,NORTH"),
+                          ("rejected_move", "MOVE"), ("unrecognised", "JUMP")]:
+        # Park the rover in the middle of a huge board so moves always succeed, except
+        # for the rejected moves which face the edge.
+        rover = MarsRover(x_pos=10 ** 8, y_pos=10 ** 8, x_max=10 ** 9, y_max=10 ** 9, placed=True)
+        if case == "rejected_move":
+            rover = MarsRover(x_pos=0, y_pos=0, facing="WEST", placed=True)
+        results[case] = 1e9 / _rate(lambda: rover.recieve_command(command), number)
+    return results
+
+
+def bench_script(scale: float = 1.0) -> Dict[str, float]:
+    """Measure the throughput of a long random script, in commands per second, when
+    each command is passed to recieve_command, when the script is run with run_batch,
+    when it is run precompiled, when it is fetched from a warm script cache and run, and
+    when it is replayed from a log file.
+    """
+    _logging_off()
+    command_list = _random_script(random.Random(0), max(1, int(200000 * scale)))
+    compiled = compile_script(command_list)
+    cache = ScriptCache()
+    cache.get(command_list)
+
+    def recieve_each():
+        rover = MarsRover(x_max=1000, y_max=1000)
+        for command in command_list:
+            rover.recieve_command(command)
+
+    results = {
+        "recieve_command": len(command_list) * _rate(recieve_each, 1, repeat=3),
+        "run_batch": len(command_list) * _rate(lambda: MarsRover(x_max=1000, y_max=1000).run_batch(command_list), 1, repeat=3),
+        "precompiled": len(command_list) * _rate(lambda: run_compiled(MarsRover(x_max=1000, y_max=1000), compiled), 1, repeat=3),
+        "cached": len(command_list) * _rate(lambda: run_compiled(MarsRover(x_max=1000, y_max=1000), cache.get(command_list)), 1, repeat=3),
+    }
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        path = os.path.join(log_dir, "commands.log")
+        with open(path, "w") as log:
+            log.write("\n".join(command_list))
+        results["replay"] = len(command_list) * _rate(
+            lambda: list(replay_log(MarsRover(x_max=1000, y_max=1000), path)), 1, repeat=3)
+
+    return results
+
+
+def bench_large_grid(scale: float = 1.0) -> Dict[str, float]:
+    """Measure recieve_command throughput, in commands per second, for a MarsRover and a
+    LargeGridRover walking in a small square in the far corner of boards from 5 x 5 up to
+    10^9 x 10^9.
+    """
+    _logging_off()
+    square = ["MOVE", "RIGHT"] * 4
+    number = max(1, int(20000 * scale))
+    results = {}
+    for prefix, rover_class in [("", MarsRover), ("fixed_width_", LargeGridRover)]:
+        for size in [5, 10 ** 3, 10 ** 6, 10 ** 9]:
+            rover = rover_class(x_pos=size - 1, y_pos=size - 1, x_max=size, y_max=size, placed=True)
+
+            def walk():
+                for command in square:
+                    rover.recieve_command(command)
+
+            results["{}size_{}".format(prefix, size)] = len(square) * _rate(walk, number)
+    return results
+
+
+def bench_placements(scale: float = 1.0) -> Dict[str, float]:
+    """Measure how many starting placements per second a fixed random script of moves and
+    turns can be run from, by running it against a rover from each placement, by applying its Transition
+    to each placement, and by applying the Transition to every placement at once with
+    NumPy (if it is installed).
+    """
+    _logging_off()
+    generator = random.Random(0)
+    compiled = compile_script([generator.choice(["MOVE", "MOVE", "LEFT", "RIGHT"]) for _ in range(2000)])
+    transition = Transition.from_script(compiled, 1000, 1000)
+    count = max(1, int(100000 * scale))
+    starts = [(generator.randint(0, 1000), generator.randint(0, 1000), generator.randint(1, 4)) for _ in range(count)]
+
+    def run_each():
+        for x_pos, y_pos, facing in starts[:max(1, count // 100)]:
+            rover = MarsRover(x_max=1000, y_max=1000)
+            rover.x_pos, rover.y_pos, rover.facing, rover.placed = x_pos, y_pos, facing, True
+            run_compiled(rover, compiled)
+
+    def apply_each():
+        for start in starts:
+            transition.apply(*start)
+
+    results = {
+        "run_compiled": max(1, count // 100) * _rate(run_each, 1, repeat=3),
+        "transition": count * _rate(apply_each, 1, repeat=3),
+    }
+    try:
+        import numpy as np
+    except ImportError:
+        return results
+
+    x_pos, y_pos, facing = (np.array(column) for column in zip(*starts))
+    results["transition_numpy"] = count * _rate(lambda: transition.apply_many(x_pos, y_pos, facing), 1, repeat=3)
+    return results
+
+
+def bench_parallel(scale: float = 1.0) -> Dict[str, float]:
+    """Measure run_scripts_parallel throughput, in scripts per second, for every number of
+    worker processes from 1 up to the number of CPUs.
+    """
+    generator = random.Random(0)
+    script_count = max(1, int(2000 * scale))
+    scripts = [RoverScript(_random_script(generator, 2000),
+                           x_max=generator.randint(1, 100), y_max=generator.randint(1, 100))
+               for _ in range(script_count)]
+
+    results = {}
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        started = time.perf_counter()
+        run_scripts_parallel(scripts, workers=workers)
+        results["{}_workers".format(workers)] = script_count / (time.perf_counter() - started)
+    return results
+
+
+def bench_cold_start(scale: float = 1.0) -> Dict[str, float]:
+    """Measure the median wall clock time, in milliseconds, of a new Python process
+    doing nothing ("interpreter"), and of drive_toy_robot.py run on a short script given
+    with -c ("one_shot") and in a file ("file"). "overhead" is the time one_shot takes
+    beyond the interpreter's own start up.
+    """
+    runs = max(3, int(40 * scale))
+    cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), "drive_toy_robot.py")
+    script = "PLACE 0,0,NORTH;MOVE;RIGHT;MOVE;REPORT"
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "commands.txt")
+        with open(path, "w") as commands:
+            commands.write(script.replace(";", "\n"))
+        cases = {
+            "interpreter": [sys.executable, "-c", "pass"],
+            "one_shot": [sys.executable, cli, "-c", script],
+            "file": [sys.executable, cli, path],
+        }
+
+        # Interleave the cases, so they all see the same background load.
+        times = {case: [] for case in cases}
+        for _ in range(runs):
+            for case, command in cases.items():
+                started = time.perf_counter()
+                subprocess.run(command, cwd=work_dir, stdout=subprocess.DEVNULL, check=True)
+                times[case].append(time.perf_counter() - started)
+
+    results = {case: 1000 * statistics.median(case_times) for case, case_times in times.items()}
+    results["overhead"] = results["one_shot"] - results["interpreter"]
+    return results
+
+
+# Each benchmark, along with the unit of its results and whether higher results are
+# better.
+BENCHMARKS = {
+    "construction": (bench_construction, "rovers/s", True),
+    "command": (bench_command, "ns/command", False),
+    "script": (bench_script, "commands/s", True),
+    "large_grid": (bench_large_grid, "commands/s", True),
+    "placements": (bench_placements, "placements/s", True),
+    "parallel": (bench_parallel, "scripts/s", True),
+    "cold_start": (bench_cold_start, "ms", False),
+}
+
+
+def run_benchmarks(names: List[str], scale: float = 1.0) -> Dict[str, dict]:
+    """Run the named benchmarks.
+
+    Returns a dictionary mapping "benchmark/case" to a dictionary holding the result
+    value, its unit and whether higher values are better.
+
+    Arguments:
+    names - the benchmarks to run
+    scale - multiplier for the amount of work each benchmark does
+    """
+    results = {}
+    for name in names:
+        benchmark, unit, higher_is_better = BENCHMARKS[name]
+        for case, value in benchmark(scale).items():
+            results["{}/{}".format(name, case)] = {"value": value,
+                                                   "unit": unit,
+                                                   "higher_is_better": higher_is_better}
+    _reset_logging()
+    return results
+
+
+def compare_results(results: Dict[str, dict],
+                    baseline: Dict[str, dict],
+                    tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Compare benchmark results against a baseline.
+
+    Returns a description of every result that is more than tolerance worse than the
+    baseline. Results missing from either side are not compared.
+
+    Arguments:
+    results - results in the form returned by run_benchmarks
+    baseline - results to compare against, in the same form
+    tolerance - the fraction by which a result may be worse before it is a regression
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+
+        value = result["value"]
+        expected = baseline[key]["value"]
+        if result["higher_is_better"]:
+            regressed = value < expected * (1 - tolerance)
+        else:
+            regressed = value > expected * (1 + tolerance)
+
+        if regressed:
+            regressions.append("{}: {:,.1f} {} against a baseline of {:,.1f} {}"
+                               .format(key, value, result["unit"], expected, result["unit"]))
+    return regressions
+
+
+def check_budgets(results: Dict[str, dict], budgets: Dict[str, float] = BUDGETS) -> List[str]:
+    """Check results against their budgets.
+
+    Returns a description of each result over its budget. Results without a budget are
+    ignored.
+
+    Arguments:
+    results - results in the form returned by run_benchmarks
+    budgets - dictionary mapping "benchmark/case" to the most (or, where higher is
+              better, the least) the result may be
+    """
+    over = []
+    for key, budget in budgets.items():
+        result = results.get(key)
+        if result is None:
+            continue
+        value = result["value"]
+        if result["higher_is_better"]:
+            over_budget = value < budget
+        else:
+            over_budget = value > budget
+
+        if over_budget:
+            over.append("{}: {:,.1f} {} against a budget of {:,.1f} {}"
+                        .format(key, value, result["unit"], budget, result["unit"]))
+    return over
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run the Mars Rover benchmarks")
+    parser.add_argument("benchmarks", nargs="*",
+                        help="the benchmarks to run, from: {}. All of them by default"
+                        .format(", ".join(BENCHMARKS)))
+    parser.add_argument("--json", metavar="PATH", help="save the results as JSON to PATH")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="compare the results against JSON results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="the fraction by which a result may be worse than the baseline")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiplier for the amount of work each benchmark does")
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark {}".format(name))
+
+    results = run_benchmarks(args.benchmarks or list(BENCHMARKS), args.scale)
+    for key, result in results.items():
+        print("{:<40} {:>16,.1f} {}".format(key, result["value"], result["unit"]))
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"version": RESULTS_VERSION,
+                       "python": platform.python_version(),
+                       "results": results}, output, indent=2)
+
+    failed = False
+    over = check_budgets(results)
+    if over:
+        print("Results over budget:", file=sys.stderr)
+        for result in over:
+            print("    " + result, file=sys.stderr)
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print("Performance regressions against {}:".format(args.baseline), file=sys.stderr)
+            for regression in regressions:
+                print("    " + regression, file=sys.stderr)
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
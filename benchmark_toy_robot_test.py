@@ -0,0 +1,63 @@
+from benchmark_toy_robot import check_budgets, compare_results, main, run_benchmarks
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+class TestBenchmarkToyRobot(unittest.TestCase):
+
+    def _result(self, value, higher_is_better):
+        return {"value": value, "unit": "units", "higher_is_better": higher_is_better}
+
+    def test_compare_results(self):
+        baseline = {"a/rate": self._result(100.0, True), "a/latency": self._result(100.0, False)}
+        self.assertEqual(compare_results({"a/rate": self._result(85.0, True),
+                                          "a/latency": self._result(115.0, False)}, baseline), [])
+        self.assertEqual(len(compare_results({"a/rate": self._result(75.0, True),
+                                              "a/latency": self._result(125.0, False)}, baseline)), 2)
+        self.assertEqual(compare_results({"a/rate": self._result(75.0, True)}, baseline, tolerance=0.3), [])
+        self.assertEqual(compare_results({"b/rate": self._result(1.0, True)}, baseline), [])
+
+    def test_check_budgets(self):
+        results = {"a/latency": self._result(60.0, False), "a/rate": self._result(50.0, True)}
+        self.assertEqual(check_budgets(results, {"a/latency": 100.0, "a/rate": 10.0, "b/rate": 1.0}), [])
+        self.assertEqual(len(check_budgets(results, {"a/latency": 50.0, "a/rate": 100.0})), 2)
+
+    def test_cold_start(self):
+        results = run_benchmarks(["cold_start"], scale=0.001)
+        self.assertEqual(results["cold_start/one_shot"]["unit"], "ms")
+        self.assertGreater(results["cold_start/one_shot"]["value"], results["cold_start/interpreter"]["value"])
+        self.assertIn("cold_start/overhead", results)
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(["command", "large_grid"], scale=0.001)
+        self.assertIn("command/move", results)
+        self.assertIn("large_grid/size_1000000000", results)
+        self.assertIn("large_grid/fixed_width_size_1000000000", results)
+        self.assertEqual(results["command/move"]["unit"], "ns/command")
+        self.assertFalse(results["command/move"]["higher_is_better"])
+
+    def test_main_fails_on_regression(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            with contextlib.redirect_stdout(io.StringIO()):
+                main(["command", "--scale", "0.001", "--json", path])
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)
+
+            # Pretend the baseline was much faster
+            for result in baseline["results"].values():
+                result["value"] /= 100
+            with open(path, "w") as baseline_file:
+                json.dump(baseline, baseline_file)
+
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit) as exit_context:
+                    main(["command", "--scale", "0.001", "--baseline", path])
+            self.assertEqual(exit_context.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,69 @@
+from typing import Iterator, List, Optional, TextIO
+import io
+import sys
+
 from toy_robot import MarsRover
 
-if __name__ == '__main__':
-    rover = MarsRover()
+# Approximate number of bytes of commands read and run at a time in streaming mode.
+READ_CHUNK_SIZE = 1 << 20
+
+def read_command_batches(stream: TextIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[List[str]]:
+    """Read commands from stream in batches of roughly chunk_size bytes, stopping at
+    the end of the stream or at the first "END" command (case insensitive).
+
+    Each batch is a list of commands with their line endings removed, as input()
+    would return them.
+
+    Arguments:
+    stream - the text stream to read commands from
+    chunk_size - the approximate number of bytes to read for each batch
+    """
+    while True:
+        lines = stream.readlines(chunk_size)
+        if not lines:
+            return
 
+        batch = []
+        for line in lines:
+            command = line[:-1] if line.endswith("\n") else line
+            if len(command) == 3 and command.upper() == "END":
+                if batch:
+                    yield batch
+                return
+            batch.append(command)
+        yield batch
+
+def stream_commands(rover: MarsRover, stream: TextIO, output: TextIO,
+                    chunk_size: int = READ_CHUNK_SIZE) -> None:
+    """Feed every command from stream to the rover, writing each REPORT to output.
+
+    Commands are run a batch at a time, so memory use does not depend on the length of
+    the stream, and the reports from each batch are written out together. While the
+    rover logs each command (see rover_logging.logs_each_command), as it does by
+    default, the commands of a batch are passed to recieve_command one at a time so
+    that every one of them is logged. Otherwise each batch is run with run_batch.
+
+    Arguments:
+    rover - the rover to drive
+    stream - the text stream to read commands from
+    output - the text stream to write reports to
+    chunk_size - the approximate number of bytes of commands to run at a time
+    """
+    from rover_logging import logs_each_command
+
+    for batch in read_command_batches(stream, chunk_size):
+        if logs_each_command():
+            outputs = [rover.recieve_command(command) for command in batch]
+        else:
+            outputs = rover.run_batch(batch)
+        reports = [report for report in outputs if report is not None]
+        if reports:
+            output.write("\n".join(reports))
+            output.write("\n")
+    output.flush()
+
+def interact(rover: MarsRover) -> None:
+    """Prompt for commands until the user types "END" (case insensitive)."""
     userInput = input('Type a command or "END" to exit: ')
 
     while userInput.upper() != "END":
@@ -10,3 +71,69 @@ if __name__ == '__main__':
         if output is not None:
             print(output)
         userInput = input('Type a command or "END" to exit: ')
+
+def split_commands(text: str) -> List[str]:
+    """Split commands given on the command line, separated by semicolons or new lines,
+    into a list of commands with surrounding whitespace and empty commands removed.
+    """
+    commands = (command.strip() for command in text.replace("\n", ";").split(";"))
+    return [command for command in commands if command]
+
+def _parse_args(argv: List[str]):
+    """Parse the command line arguments.
+
+    The usual invocations (no arguments, a file, -c COMMANDS or --script FILE) are
+    recognised directly. argparse takes a noticeable part of the run time of a short
+    script, between importing it and the terminal size and translation lookups its
+    help formatter does, so it is only used for anything else, such as --help or a
+    mistake.
+    """
+    from types import SimpleNamespace
+
+    if not argv:
+        return SimpleNamespace(file=None, commands=None, script=None, log_mode=None)
+    if len(argv) == 1 and (argv[0] == "-" or not argv[0].startswith("-")):
+        return SimpleNamespace(file=argv[0], commands=None, script=None, log_mode=None)
+    if len(argv) == 2 and not argv[1].startswith("-"):
+        if argv[0] == "-c":
+            return SimpleNamespace(file=None, commands=argv[1], script=None, log_mode=None)
+        if argv[0] == "--script":
+            return SimpleNamespace(file=None, commands=None, script=argv[1], log_mode=None)
+
+    import argparse
+
+    from rover_logging import LOG_MODES
+
+    parser = argparse.ArgumentParser(description="Drive a toy robot Mars Rover")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("file", nargs="?",
+                        help="read commands from this file ('-' for stdin) instead of prompting for them")
+    source.add_argument("-c", dest="commands", metavar="COMMANDS",
+                        help="run these commands, separated by semicolons, e.g. 'PLACE 0,0,NORTH;MOVE;REPORT'")
+    source.add_argument("--script", metavar="FILE", help="run the commands in this file, as for file")
+    parser.add_argument("--log-mode", choices=LOG_MODES,
+                        help="how much to log (see rover_logging.set_log_mode). Commands are only run "
+                             "in batches when they aren't each logged")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    path = args.script if args.script is not None else args.file
+
+    if args.log_mode is not None:
+        from rover_logging import set_log_mode
+        set_log_mode(args.log_mode)
+
+    rover = MarsRover()
+    if args.commands is not None:
+        stream_commands(rover, io.StringIO("\n".join(split_commands(args.commands))), sys.stdout)
+    elif path is None:
+        interact(rover)
+    elif path == "-":
+        stream_commands(rover, io.open(sys.stdin.fileno(), buffering=READ_CHUNK_SIZE, closefd=False), sys.stdout)
+    else:
+        with open(path, buffering=READ_CHUNK_SIZE) as stream:
+            stream_commands(rover, stream, sys.stdout)
+
+if __name__ == '__main__':
+    main()
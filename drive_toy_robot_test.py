@@ -0,0 +1,100 @@
+from drive_toy_robot import main, read_command_batches, split_commands, stream_commands
+from rover_logging import ROVER_LOGGER_NAME, RingBufferHandler, set_log_mode
+from toy_robot import MarsRover
+import contextlib
+import io
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+class TestDriveToyRobot(unittest.TestCase):
+
+    def test_read_command_batches(self):
+        stream = io.StringIO("PLACE 0,0,NORTH\nMOVE\r\nREPORT\nMOVE\nREPORT")
+        self.assertEqual(list(read_command_batches(stream, chunk_size=10)),
+                         [["PLACE 0,0,NORTH"], ["MOVE\r", "REPORT"], ["MOVE", "REPORT"]])
+
+    def test_read_command_batches_stops_at_end(self):
+        stream = io.StringIO("MOVE\nREPORT\nend\nMOVE\n")
+        self.assertEqual(list(read_command_batches(stream)), [["MOVE", "REPORT"]])
+        stream = io.StringIO("End\nMOVE\n")
+        self.assertEqual(list(read_command_batches(stream)), [])
+
+    def test_stream_commands(self):
+        stream = io.StringIO("REPORT\nPLACE 0,0,NORTH\n" + "MOVE\nREPORT\n" * 10 + "END\nREPORT\n")
+        output = io.StringIO()
+        stream_commands(MarsRover(), stream, output, chunk_size=64)
+        self.assertEqual(output.getvalue().splitlines(),
+                         ["0,1,NORTH", "0,2,NORTH", "0,3,NORTH"] + ["0,4,NORTH"] * 7)
+
+    def test_stream_commands_logs_each_command(self):
+        handler = RingBufferHandler()
+        logger = logging.getLogger(ROVER_LOGGER_NAME)
+        logger.addHandler(handler)
+        try:
+            for mode, expected in [("full", ["PLACE 0,0,NORTH", "MOVE", "MOVE", "REPORT"]), ("errors", [])]:
+                set_log_mode(mode)
+                handler.clear()
+                output = io.StringIO()
+                stream_commands(MarsRover(), io.StringIO("PLACE 0,0,NORTH\nMOVE\nMOVE\nREPORT\n"), output)
+                self.assertEqual(output.getvalue(), "0,2,NORTH\n")
+                received = [message[len("Received command "):] for message in handler.messages()
+                            if message.startswith("Received command ")]
+                self.assertEqual(received, expected)
+        finally:
+            logger.removeHandler(handler)
+            set_log_mode("full")
+            logger.setLevel(logging.NOTSET)
+
+    def test_main_reads_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "commands.txt")
+            with open(path, "w") as commands:
+                commands.write("PLACE 1,2,EAST\nMOVE\nMOVE\nLEFT\nMOVE\nREPORT\n")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main([path])
+        self.assertEqual(output.getvalue(), "3,3,NORTH\n")
+
+    def _main_output(self, argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(argv)
+        return output.getvalue()
+
+    def test_split_commands(self):
+        self.assertEqual(split_commands("PLACE 0,0,NORTH; MOVE;;REPORT;\nleft "),
+                         ["PLACE 0,0,NORTH", "MOVE", "REPORT", "left"])
+
+    def test_main_runs_commands(self):
+        self.assertEqual(self._main_output(["-c", "PLACE 0,0,NORTH;MOVE;REPORT;END;MOVE;REPORT"]), "0,1,NORTH\n")
+
+    def test_main_runs_script(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "commands.txt")
+            with open(path, "w") as commands:
+                commands.write("PLACE 4,4,SOUTH\nMOVE\nREPORT\n")
+            self.assertEqual(self._main_output(["--script", path]), "4,3,SOUTH\n")
+
+    def test_main_rejects_conflicting_arguments(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit) as exit_context:
+                main(["-c", "REPORT", "--script", "commands.txt"])
+        self.assertEqual(exit_context.exception.code, 2)
+
+    def test_one_shot_startup_skips_argparse(self):
+        with tempfile.TemporaryDirectory() as directory:
+            check = ("import sys; sys.path.insert(0, {!r}); import drive_toy_robot; "
+                     "drive_toy_robot.main(['-c', 'PLACE 0,0,NORTH;REPORT']); "
+                     "print(sorted(set(sys.modules) & {{'argparse', 'gettext', 'shutil'}}))"
+                     .format(os.path.dirname(os.path.abspath(__file__))))
+            output = subprocess.run([sys.executable, "-c", check], cwd=directory,
+                                    capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output, "0,0,NORTH\n[]\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
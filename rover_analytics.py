@@ -0,0 +1,191 @@
+"""Analytics of a script run from every placement on a board.
+
+analyse_script runs a script from every start a rover could be placed in on a board
+with no obstacles (every position, facing each way) all at once with NumPy. The state
+of every start is held in arrays, and each compiled opcode is applied to all of them in
+one step. A run of moves is applied as a single clamp, with the cells it passes through
+added to the counts as one range, so the cost is in proportion to the number of runs in
+the script times the number of starts, however long the runs are.
+
+The resulting ScriptAnalysis answers questions across the whole board:
+
+    analysis = analyse_script(commands, x_max=9, y_max=9)
+    analysis.visits                  # how often each cell is occupied, over every start
+    analysis.end_states              # how many starts end in each state
+    analysis.starts_ending_at(3, 4)  # which starts end at (3, 4)
+    analysis.wasted_moves            # moves refused at the edge of the board, per start
+    analysis.cells_visited(0, 0, 1)  # which cells are visited from one start
+
+Needs NumPy.
+"""
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from rover_script import OP_MOVE, OP_REPORT, OP_TURN, CompiledScript, compile_script
+
+# The (x, y) step taken by a move in each direction, indexed by Direction value.
+_X_STEPS = np.array([0, 0, 1, 0, -1], dtype=np.int64)
+_Y_STEPS = np.array([0, 1, 0, -1, 0], dtype=np.int64)
+
+
+def all_placements(x_max: int = 4, y_max: int = 4) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return every valid placement on a board as arrays (x, y, facing), ordered by
+    facing, then y, then x.
+    """
+    facing, y_pos, x_pos = np.meshgrid(np.arange(1, 5, dtype=np.int8),
+                                       np.arange(y_max + 1, dtype=np.int64),
+                                       np.arange(x_max + 1, dtype=np.int64), indexing="ij")
+    return x_pos.ravel(), y_pos.ravel(), facing.ravel()
+
+
+class ScriptAnalysis(object):
+    """The result of running a script from every placement on a board.
+
+    Attributes:
+        script - the CompiledScript analysed
+        x_max - the maximum position on the x axis of the board
+        y_max - the maximum position on the y axis of the board
+        start_x, start_y, start_facing - arrays of the starts, as given by all_placements
+        end_x, end_y, end_facing - arrays of the state each start ends in
+        wasted_moves - array of the number of moves refused at the edge of the board,
+                       for each start
+        visits - array indexed [y, x] of the number of times each cell is occupied,
+                 summed over every start. A start's own cell counts as a visit, as does
+                 every cell moved into or placed on, each time it happens
+        end_states - array indexed [facing, y, x] of the number of starts ending in each
+                     state. Index 0 of the facing is unused
+    """
+
+    def __init__(self, script: CompiledScript, x_max: int, y_max: int):
+        self.script = script
+        self.x_max = x_max
+        self.y_max = y_max
+        self.start_x, self.start_y, self.start_facing = all_placements(x_max, y_max)
+        self.end_x = self.start_x.copy()
+        self.end_y = self.start_y.copy()
+        self.end_facing = self.start_facing.copy()
+        self.wasted_moves = np.zeros(len(self.start_x), dtype=np.int64)
+        self.visits = np.zeros((y_max + 1, x_max + 1), dtype=np.int64)
+        self.end_states = np.zeros((5, y_max + 1, x_max + 1), dtype=np.int64)
+
+    def __len__(self) -> int:
+        """Return the number of starts."""
+        return len(self.start_x)
+
+    def starts_ending_at(self, x_pos: int, y_pos: int, facing: Optional[int] = None
+                         ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the starts that end at a position as arrays (x, y, facing).
+
+        Arguments:
+        x_pos - the position on the x axis
+        y_pos - the position on the y axis
+        facing - the Direction value the starts must end up facing, or None for any
+        """
+        ends = (self.end_x == x_pos) & (self.end_y == y_pos)
+        if facing is not None:
+            ends &= self.end_facing == facing
+        return self.start_x[ends], self.start_y[ends], self.start_facing[ends]
+
+    def cells_visited(self, x_pos: int, y_pos: int, facing: int) -> np.ndarray:
+        """Return a boolean array indexed [y, x] of the cells visited by the script run
+        from one start, which must be a valid placement.
+        """
+        visited = np.zeros((self.y_max + 1, self.x_max + 1), dtype=bool)
+        visited[y_pos, x_pos] = True
+        ops = self.script.ops
+        i = 0
+        while i < len(ops):
+            op = ops[i]
+            if op == OP_MOVE:
+                new_x = min(max(x_pos + _X_STEPS[facing] * ops[i + 1], 0), self.x_max)
+                new_y = min(max(y_pos + _Y_STEPS[facing] * ops[i + 1], 0), self.y_max)
+                visited[min(y_pos, new_y):max(y_pos, new_y) + 1, min(x_pos, new_x):max(x_pos, new_x) + 1] = True
+                x_pos, y_pos = new_x, new_y
+                i += 2
+            elif op == OP_TURN:
+                facing = (facing + ops[i + 1] - 1) % 4 + 1
+                i += 2
+            elif op == OP_REPORT:
+                i += 1
+            else:
+                if 0 <= ops[i + 1] <= self.x_max and 0 <= ops[i + 2] <= self.y_max:
+                    x_pos, y_pos, facing = ops[i + 1], ops[i + 2], ops[i + 3]
+                    visited[y_pos, x_pos] = True
+                i += 4
+        return visited
+
+
+def analyse_script(commands: Union[Sequence[str], CompiledScript],
+                   x_max: int = 4,
+                   y_max: int = 4) -> ScriptAnalysis:
+    """Run a script from every placement on a board with no obstacles.
+
+    Returns a ScriptAnalysis.
+
+    Arguments:
+    commands - the commands, or a CompiledScript
+    x_max - the maximum position on the x axis of the board
+    y_max - the maximum position on the y axis of the board
+    """
+    script = commands if isinstance(commands, CompiledScript) else compile_script(commands)
+    analysis = ScriptAnalysis(script, x_max, y_max)
+    x_pos, y_pos, facing = analysis.end_x, analysis.end_y, analysis.end_facing
+    width = x_max + 1
+    height = y_max + 1
+
+    # Cells moved through are counted as ranges along a row or column, added to
+    # difference arrays with a spare cell at the end of each row (or column) and summed
+    # up at the end.
+    row_starts = np.zeros(height * (width + 1), dtype=np.int64)
+    column_starts = np.zeros((height + 1) * width, dtype=np.int64)
+    visits = np.bincount(y_pos * width + x_pos, minlength=height * width)
+
+    ops = script.ops
+    i = 0
+    while i < len(ops):
+        op = ops[i]
+        if op == OP_MOVE:
+            count = ops[i + 1]
+            x_step = _X_STEPS[facing]
+            y_step = _Y_STEPS[facing]
+            new_x = np.clip(x_pos + x_step * count, 0, x_max)
+            new_y = np.clip(y_pos + y_step * count, 0, y_max)
+            moved = np.abs(new_x - x_pos) + np.abs(new_y - y_pos)
+            analysis.wasted_moves += count - moved
+
+            # The cells entered run from one step along to the final cell.
+            rows = (x_step != 0) & (moved > 0)
+            low = np.minimum(x_pos[rows] + x_step[rows], new_x[rows])
+            high = np.maximum(x_pos[rows] + x_step[rows], new_x[rows])
+            row = y_pos[rows] * (width + 1)
+            row_starts += np.bincount(row + low, minlength=len(row_starts))
+            row_starts -= np.bincount(row + high + 1, minlength=len(row_starts))
+
+            columns = (y_step != 0) & (moved > 0)
+            low = np.minimum(y_pos[columns] + y_step[columns], new_y[columns])
+            high = np.maximum(y_pos[columns] + y_step[columns], new_y[columns])
+            column = x_pos[columns]
+            column_starts += np.bincount(low * width + column, minlength=len(column_starts))
+            column_starts -= np.bincount((high + 1) * width + column, minlength=len(column_starts))
+
+            x_pos[:] = new_x
+            y_pos[:] = new_y
+            i += 2
+        elif op == OP_TURN:
+            facing[:] = (facing + ops[i + 1] - 1) % 4 + 1
+            i += 2
+        elif op == OP_REPORT:
+            i += 1
+        else:
+            if 0 <= ops[i + 1] <= x_max and 0 <= ops[i + 2] <= y_max:
+                x_pos[:], y_pos[:], facing[:] = ops[i + 1], ops[i + 2], ops[i + 3]
+                visits[ops[i + 2] * width + ops[i + 1]] += len(analysis)
+            i += 4
+
+    analysis.visits = (visits.reshape(height, width)
+                       + np.cumsum(row_starts.reshape(height, width + 1), axis=1)[:, :width]
+                       + np.cumsum(column_starts.reshape(height + 1, width), axis=0)[:height])
+    states = (facing.astype(np.int64) * height + y_pos) * width + x_pos
+    analysis.end_states = np.bincount(states, minlength=5 * height * width).reshape(5, height, width)
+    return analysis
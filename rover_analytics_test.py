@@ -0,0 +1,91 @@
+from toy_robot import DIRECTION_NAMES, MarsRover
+import random
+import unittest
+
+try:
+    import numpy as np
+    from rover_analytics import all_placements, analyse_script
+except ImportError:
+    np = None
+
+COMMANDS = ["MOVE", "MOVE", "MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 1,1,NORTH", "PLACE 9,9,EAST", "JUMP"]
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestAnalytics(unittest.TestCase):
+
+    def _simulate(self, command_list, x_pos, y_pos, facing, x_max, y_max):
+        """Run a script from one start, returning the rover, the cells visited in order
+        and the number of moves refused.
+        """
+        rover = MarsRover(x_pos, y_pos, x_max, y_max, DIRECTION_NAMES[facing], True)
+        visits = [(x_pos, y_pos)]
+        wasted = 0
+        for command in command_list:
+            if command == "MOVE":
+                if rover._move_rover():
+                    visits.append((rover.x_pos, rover.y_pos))
+                else:
+                    wasted += 1
+            elif command.startswith("PLACE"):
+                args = [int(value) for value in command[6:].split(",")[:2]]
+                if args[0] <= x_max and args[1] <= y_max:
+                    visits.append(tuple(args))
+                rover.recieve_command(command)
+            else:
+                rover.recieve_command(command)
+        return rover, visits, wasted
+
+    def _check_matches_rover(self, command_list, x_max, y_max):
+        analysis = analyse_script(command_list, x_max, y_max)
+        self.assertEqual(len(analysis), 4 * (x_max + 1) * (y_max + 1))
+        visits = np.zeros((y_max + 1, x_max + 1), dtype=np.int64)
+        end_states = np.zeros((5, y_max + 1, x_max + 1), dtype=np.int64)
+        for index, start in enumerate(zip(analysis.start_x, analysis.start_y, analysis.start_facing)):
+            start = tuple(int(value) for value in start)
+            rover, cells, wasted = self._simulate(command_list, *start, x_max, y_max)
+            self.assertEqual((analysis.end_x[index], analysis.end_y[index], analysis.end_facing[index]),
+                             (rover.x_pos, rover.y_pos, rover.facing))
+            self.assertEqual(analysis.wasted_moves[index], wasted)
+            for x_pos, y_pos in cells:
+                visits[y_pos, x_pos] += 1
+            end_states[rover.facing, rover.y_pos, rover.x_pos] += 1
+
+            visited = np.zeros_like(visits, dtype=bool)
+            for x_pos, y_pos in cells:
+                visited[y_pos, x_pos] = True
+            np.testing.assert_array_equal(analysis.cells_visited(*start), visited)
+
+        np.testing.assert_array_equal(analysis.visits, visits)
+        np.testing.assert_array_equal(analysis.end_states, end_states)
+
+    def test_matches_rover(self):
+        self._check_matches_rover([], 4, 4)
+        self._check_matches_rover(["MOVE", "MOVE", "LEFT", "MOVE", "REPORT"], 4, 4)
+        self._check_matches_rover(["MOVE"] * 9 + ["RIGHT"] + ["MOVE"] * 2, 3, 5)
+        self._check_matches_rover(["MOVE", "PLACE 1,1,NORTH", "MOVE", "PLACE 9,9,EAST", "RIGHT", "MOVE"], 2, 2)
+        self._check_matches_rover(["MOVE", "RIGHT"], 0, 0)
+        generator = random.Random(21)
+        for _ in range(10):
+            command_list = [generator.choice(COMMANDS) for _ in range(generator.randint(1, 40))]
+            self._check_matches_rover(command_list, generator.randint(0, 5), generator.randint(0, 5))
+
+    def test_starts_ending_at(self):
+        analysis = analyse_script(["MOVE"] * 10, 3, 3)
+        x_pos, y_pos, facing = analysis.starts_ending_at(0, 3)
+        # Rovers facing north from the first column, or west from the top row
+        self.assertEqual(sorted(zip(x_pos.tolist(), y_pos.tolist(), facing.tolist())),
+                         sorted([(0, y, 1) for y in range(4)] + [(x, 3, 4) for x in range(4)]))
+        self.assertEqual(len(analysis.starts_ending_at(0, 3, facing=1)[0]), 4)
+        self.assertEqual(analysis.end_states[1, 3].tolist(), [4, 4, 4, 4])
+        self.assertEqual(int(analysis.end_states.sum()), len(analysis))
+        # Each start wastes all but the moves it needs to reach the edge
+        self.assertEqual(int(analysis.wasted_moves.sum()), len(analysis) * 10 - 4 * 4 * (0 + 1 + 2 + 3))
+
+    def test_all_placements(self):
+        x_pos, y_pos, facing = all_placements(2, 1)
+        self.assertEqual(len(set(zip(x_pos.tolist(), y_pos.tolist(), facing.tolist()))), 3 * 2 * 4)
+        self.assertEqual((x_pos.max(), y_pos.max(), facing.min(), facing.max()), (2, 1, 1, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,276 @@
+"""Rovers shared between threads.
+
+A LockedRover wraps a MarsRover with a lock of its own, so any number of threads can
+send it commands. Each command is carried out as a whole before the next starts, and
+state() always gives a consistent position and facing.
+
+A RoverRegistry holds many rovers for a pool of worker threads. Commands submitted for a
+rover, from any number of threads, join that rover's own queue and are carried out in
+the order they were submitted. A rover with commands waiting is handed to one worker at
+a time, which works through the commands queued so far and hands the rover back, so
+each rover's commands never overlap while different rovers run on different workers.
+Rovers are found through a number of shards, each with its own lock, and each queue has
+its own lock too, so there is no lock that every command has to take.
+
+    with RoverRegistry() as registry:
+        registry.add_rover("curiosity", x_max=9, y_max=9)
+        registry.submit("curiosity", "PLACE 0,0,NORTH")
+        report = registry.submit("curiosity", "REPORT")
+        report.result()  # "0,0,NORTH"
+"""
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Hashable, List, Optional, Tuple
+import threading
+
+from toy_robot import MarsRover
+
+# The number of shards a registry's rovers are spread between by default.
+DEFAULT_SHARDS = 16
+
+# The most queued commands a worker carries out for one rover before handing it back,
+# so that a rover with a long queue can't keep a worker from other rovers.
+DRAIN_BATCH_SIZE = 256
+
+
+class LockedRover(object):
+    """A MarsRover which can be shared between threads.
+
+    Attributes:
+        rover - the rover. Only use it directly while holding lock
+        lock - the lock held while the rover carries out a command
+    """
+
+    __slots__ = ('rover', 'lock')
+
+    def __init__(self, rover: Optional[MarsRover] = None, **kwargs):
+        """Wrap a rover, or a new MarsRover created with kwargs."""
+        self.rover = rover if rover is not None else MarsRover(**kwargs)
+        self.lock = threading.Lock()
+
+    def recieve_command(self, command: str) -> Optional[str]:
+        """Carry out a command, as MarsRover.recieve_command."""
+        with self.lock:
+            return self.rover.recieve_command(command)
+
+    def run_batch(self, commands) -> List[Optional[str]]:
+        """Carry out a whole script without any other thread's commands coming between
+        its commands, as MarsRover.run_batch.
+        """
+        with self.lock:
+            return self.rover.run_batch(commands)
+
+    def state(self) -> Tuple[Optional[int], Optional[int], Optional[int], bool]:
+        """Return the rover's (x, y, facing, placed), all read at the same moment."""
+        with self.lock:
+            rover = self.rover
+            return rover.x_pos, rover.y_pos, rover.facing, rover.placed
+
+
+class _Mailbox(object):
+    """A rover in a registry, with its queue of (command, future) pairs.
+
+    Attributes:
+        rover - the LockedRover
+        lock - held while the queue or scheduled are changed
+        pending - the commands waiting to be carried out
+        scheduled - whether the rover has been handed to a worker
+    """
+
+    __slots__ = ('rover', 'lock', 'pending', 'scheduled')
+
+    def __init__(self, rover: LockedRover):
+        self.rover = rover
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.scheduled = False
+
+
+class RoverRegistry(object):
+    """Many rovers, with their commands carried out in order by a pool of threads.
+
+    Attributes:
+        shard_count - the number of shards the rovers are spread between
+    """
+
+    def __init__(self, shards: int = DEFAULT_SHARDS, workers: Optional[int] = None):
+        """Create an empty registry.
+
+        Arguments:
+        shards - the number of shards to spread the rovers between
+        workers - the number of worker threads. As for ThreadPoolExecutor by default
+        """
+        self.shard_count = shards
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="rover")
+        self._closed = False
+        # Mailboxes handed to a worker, kept here until their queues empty so that close
+        # can find them even once their rovers are removed.
+        self._scheduled = set()
+        self._scheduled_changed = threading.Condition()
+
+    def __enter__(self) -> 'RoverRegistry':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Return the number of rovers in the registry."""
+        return sum(len(mailboxes) for mailboxes, _ in self._shards)
+
+    def __contains__(self, rover_id: Hashable) -> bool:
+        mailboxes, _ = self._shard(rover_id)
+        return rover_id in mailboxes
+
+    def _shard(self, rover_id: Hashable):
+        return self._shards[hash(rover_id) % self.shard_count]
+
+    def _mailbox(self, rover_id: Hashable) -> _Mailbox:
+        mailboxes, _ = self._shard(rover_id)
+        try:
+            # Looking up a key is atomic, so needs no lock.
+            return mailboxes[rover_id]
+        except KeyError:
+            raise KeyError("No rover {!r} in the registry".format(rover_id)) from None
+
+    def add_rover(self, rover_id: Hashable, rover: Optional[MarsRover] = None, **kwargs) -> LockedRover:
+        """Add a rover to the registry.
+
+        Returns the rover as a LockedRover.
+
+        Arguments:
+        rover_id - the id to submit commands for the rover under
+        rover - the rover, or None to create a MarsRover with kwargs
+        """
+        mailboxes, lock = self._shard(rover_id)
+        locked = LockedRover(rover, **kwargs)
+        with lock:
+            if rover_id in mailboxes:
+                raise ValueError("Rover {!r} is already in the registry".format(rover_id))
+            mailboxes[rover_id] = _Mailbox(locked)
+        return locked
+
+    def remove_rover(self, rover_id: Hashable) -> LockedRover:
+        """Take a rover out of the registry. Commands already submitted for it are still
+        carried out.
+
+        Returns the rover as a LockedRover.
+        """
+        mailboxes, lock = self._shard(rover_id)
+        with lock:
+            mailbox = mailboxes.pop(rover_id, None)
+        if mailbox is None:
+            raise KeyError("No rover {!r} in the registry".format(rover_id))
+        return mailbox.rover
+
+    def rover(self, rover_id: Hashable) -> LockedRover:
+        """Return a rover in the registry as a LockedRover."""
+        return self._mailbox(rover_id).rover
+
+    def submit(self, rover_id: Hashable, command: str) -> Future:
+        """Queue a command for a rover. Commands for one rover are carried out in the
+        order they are submitted, across all threads.
+
+        Returns a Future for the output of the command, as MarsRover.recieve_command.
+        Raises RuntimeError once the registry is closed.
+
+        Arguments:
+        rover_id - the id of the rover
+        command - the command
+        """
+        return self.submit_many(rover_id, [command])[0]
+
+    def submit_many(self, rover_id: Hashable, commands) -> List[Future]:
+        """Queue several commands for a rover, keeping them together in its queue.
+
+        Returns a Future for the output of each command. Raises RuntimeError once the
+        registry is closed.
+        """
+        if self._closed:
+            raise RuntimeError("Registry is closed")
+        mailbox = self._mailbox(rover_id)
+        futures = [Future() for _ in commands]
+        with mailbox.lock:
+            mailbox.pending.extend(zip(commands, futures))
+            if mailbox.scheduled or not futures:
+                return futures
+            mailbox.scheduled = True
+            with self._scheduled_changed:
+                self._scheduled.add(mailbox)
+        self._hand_to_worker(mailbox)
+        return futures
+
+    def _hand_to_worker(self, mailbox: _Mailbox) -> None:
+        """Queue a scheduled mailbox to be drained, or fail its commands if the pool has
+        already been shut down.
+        """
+        try:
+            self._executor.submit(self._drain, mailbox)
+        except RuntimeError:
+            self._fail_pending(mailbox, unschedule=True)
+
+    def _unschedule(self, mailbox: _Mailbox) -> None:
+        """Take a rover back from the pool. Call while holding mailbox.lock."""
+        mailbox.scheduled = False
+        with self._scheduled_changed:
+            self._scheduled.discard(mailbox)
+            self._scheduled_changed.notify_all()
+
+    def _fail_pending(self, mailbox: _Mailbox, unschedule: bool = False) -> None:
+        """Fail every command still queued for a rover, as the registry is closed.
+
+        Arguments:
+        mailbox - the rover's mailbox
+        unschedule - whether to take the rover back from the pool as well
+        """
+        with mailbox.lock:
+            pending = list(mailbox.pending)
+            mailbox.pending.clear()
+            if unschedule:
+                self._unschedule(mailbox)
+        for _, future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("Registry is closed"))
+
+    def _drain(self, mailbox: _Mailbox) -> None:
+        """Carry out commands queued for a rover, then hand it back to the pool if more
+        are waiting.
+        """
+        with mailbox.lock:
+            batch = [mailbox.pending.popleft() for _ in range(min(len(mailbox.pending), DRAIN_BATCH_SIZE))]
+
+        locked = mailbox.rover
+        with locked.lock:
+            for command, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(locked.rover.recieve_command(command))
+                except Exception as error:
+                    future.set_exception(error)
+
+        with mailbox.lock:
+            if not mailbox.pending:
+                self._unschedule(mailbox)
+                return
+        self._hand_to_worker(mailbox)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop the worker threads. Commands can no longer be submitted.
+
+        Arguments:
+        wait - whether to wait for every queued command to be carried out, including
+               those for rovers since removed. Otherwise commands not yet started fail
+               with RuntimeError, and only those already running are finished
+        """
+        self._closed = True
+        with self._scheduled_changed:
+            if wait:
+                # Workers submit follow on work for rovers with long queues, so wait for
+                # the queues to empty before shutting the pool down.
+                self._scheduled_changed.wait_for(lambda: not self._scheduled)
+            scheduled = list(self._scheduled)
+        for mailbox in scheduled:
+            self._fail_pending(mailbox)
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,147 @@
+from rover_concurrent import DRAIN_BATCH_SIZE, LockedRover, RoverRegistry
+from toy_robot import MarsRover
+import random
+import threading
+import unittest
+
+class TestLockedRover(unittest.TestCase):
+
+    def _run_threads(self, target, count):
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_moves_from_many_threads(self):
+        rover = LockedRover(x_max=10, y_max=10000)
+        rover.recieve_command("PLACE 0,0,NORTH")
+        self._run_threads(lambda _: [rover.recieve_command("MOVE") for _ in range(500)], 8)
+        self.assertEqual(rover.state(), (0, 4000, 1, True))
+
+    def test_batches_are_not_interleaved(self):
+        rover = LockedRover(x_max=10, y_max=10)
+        outputs = []
+
+        def drive(i):
+            for _ in range(50):
+                outputs.append(rover.run_batch(["PLACE {},{},EAST".format(i, i), "REPORT", "MOVE", "REPORT"]))
+
+        self._run_threads(drive, 6)
+        for reports in outputs:
+            x_pos = int(reports[0].split(",")[0])
+            self.assertEqual(reports, ["{0},{0},EAST".format(x_pos), "{},{},EAST".format(x_pos + 1, x_pos)])
+
+    def test_wraps_existing_rover(self):
+        inner = MarsRover()
+        rover = LockedRover(inner)
+        self.assertIs(rover.rover, inner)
+        self.assertEqual(rover.state(), (None, None, None, False))
+
+
+class TestRoverRegistry(unittest.TestCase):
+
+    def test_report_after_place(self):
+        with RoverRegistry(shards=4, workers=2) as registry:
+            registry.add_rover("curiosity", x_max=9, y_max=9)
+            registry.submit("curiosity", "PLACE 0,0,NORTH")
+            self.assertEqual(registry.submit("curiosity", "REPORT").result(), "0,0,NORTH")
+
+    def test_commands_for_each_rover_run_in_order(self):
+        with RoverRegistry(shards=4, workers=4) as registry:
+            for rover_id in range(20):
+                registry.add_rover(rover_id, x_max=5, y_max=1000)
+                registry.submit(rover_id, "PLACE {},0,NORTH".format(rover_id % 6))
+            reports = {}
+            moves = [0] * 20
+            moves_lock = threading.Lock()
+
+            def produce(seed):
+                generator = random.Random(seed)
+                for _ in range(200):
+                    rover_id = generator.randrange(20)
+                    registry.submit(rover_id, "MOVE")
+                    reports.setdefault((seed, rover_id), []).append(registry.submit(rover_id, "REPORT"))
+                    with moves_lock:
+                        moves[rover_id] += 1
+
+            producers = [threading.Thread(target=produce, args=(seed,)) for seed in range(8)]
+            for producer in producers:
+                producer.start()
+            for producer in producers:
+                producer.join()
+
+            # Other producers' moves may come between a producer's own commands, but
+            # never reorder them, so each producer sees a rover climb with every REPORT.
+            for futures in reports.values():
+                heights = [int(future.result().split(",")[1]) for future in futures]
+                self.assertEqual(heights, sorted(set(heights)))
+            for rover_id in range(20):
+                self.assertEqual(registry.rover(rover_id).state(), (rover_id % 6, moves[rover_id], 1, True))
+
+    def test_submit_many_keeps_commands_together(self):
+        with RoverRegistry(workers=2) as registry:
+            registry.add_rover("spirit")
+            futures = registry.submit_many("spirit", ["PLACE 1,1,EAST", "MOVE", "LEFT", "REPORT"])
+            self.assertEqual([future.result() for future in futures], [None, None, None, "2,1,NORTH"])
+            self.assertEqual(registry.submit_many("spirit", []), [])
+
+    def test_errors_are_set_on_futures(self):
+        class FaultyRover(MarsRover):
+            def _move_rover(self):
+                raise RuntimeError("wheel stuck")
+
+        with RoverRegistry(workers=1) as registry:
+            registry.add_rover("faulty", FaultyRover())
+            registry.submit("faulty", "PLACE 0,0,NORTH")
+            failed = registry.submit("faulty", "MOVE")
+            report = registry.submit("faulty", "REPORT")
+            self.assertRaises(RuntimeError, failed.result)
+            self.assertEqual(report.result(), "0,0,NORTH")
+
+    def test_rover_ids(self):
+        with RoverRegistry(shards=3) as registry:
+            rover = registry.add_rover("opportunity")
+            self.assertRaises(ValueError, registry.add_rover, "opportunity")
+            self.assertRaises(KeyError, registry.submit, "sojourner", "MOVE")
+            self.assertIn("opportunity", registry)
+            self.assertEqual(len(registry), 1)
+            self.assertIs(registry.remove_rover("opportunity"), rover)
+            self.assertNotIn("opportunity", registry)
+            self.assertRaises(KeyError, registry.rover, "opportunity")
+            self.assertRaises(KeyError, registry.remove_rover, "opportunity")
+
+    def test_close_finishes_queued_commands(self):
+        registry = RoverRegistry(workers=2)
+        registry.add_rover("perseverance", x_max=0, y_max=5000)
+        registry.submit("perseverance", "PLACE 0,0,NORTH")
+        futures = [registry.submit("perseverance", "MOVE") for _ in range(2000)]
+        registry.close()
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertEqual(registry.rover("perseverance").state(), (0, 2000, 1, True))
+
+    def test_close_finishes_commands_for_removed_rovers(self):
+        registry = RoverRegistry(workers=2)
+        registry.add_rover("zhurong", x_max=0, y_max=5000)
+        futures = registry.submit_many("zhurong", ["PLACE 0,0,NORTH"] + ["MOVE"] * (DRAIN_BATCH_SIZE * 8))
+        rover = registry.remove_rover("zhurong")
+        registry.close()
+        self.assertTrue(all(future.done() and future.exception() is None for future in futures))
+        self.assertEqual(rover.state(), (0, DRAIN_BATCH_SIZE * 8, 1, True))
+        self.assertRaises(RuntimeError, registry.submit, "zhurong", "MOVE")
+
+    def test_close_without_waiting_resolves_every_command(self):
+        registry = RoverRegistry(workers=1)
+        registry.add_rover("yutu", x_max=0, y_max=5000)
+        futures = registry.submit_many("yutu", ["PLACE 0,0,NORTH"] + ["MOVE"] * (DRAIN_BATCH_SIZE * 8))
+        registry.remove_rover("yutu")
+        registry.close(wait=False)
+        for future in futures:
+            try:
+                future.result(timeout=10)
+            except RuntimeError:
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
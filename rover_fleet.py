@@ -0,0 +1,244 @@
+"""Vectorised simulation of many independent Mars Rovers in lockstep.
+
+RoverFleet holds the state of every rover in NumPy arrays, one element per rover,
+and applies each command to the whole fleet at once. Each rover behaves exactly
+as a MarsRover would given the same commands.
+
+Commands passed to recieve_command are rejected for the same reasons, and logged
+with the same messages, as a MarsRover's would be. Each message is logged once for
+the fleet, followed by the number of rovers that rejected the command.
+"""
+from time import perf_counter_ns
+from typing import List, Optional
+import logging
+
+import numpy as np
+
+from rover_logging import ensure_logging_configured
+from rover_metrics import (REJECT_INVALID_DIRECTION, REJECT_INVALID_PLACE, REJECT_INVALID_TURN, REJECT_NOT_PLACED,
+                           REJECT_OUT_OF_BOUNDS, REJECT_UNRECOGNISED)
+from rover_parser import split_place_command
+from rover_script import INT64_MAX, INT64_MIN, LEFT_TURN, OP_MOVE, OP_PLACE, OP_REPORT, OP_TURN, compile_script
+from toy_robot import DIRECTION_NAMES, DIRECTION_VALUES, REJECTION_MESSAGES, MarsRover
+
+# Change in position for a move in each direction, indexed by Direction value. Index 0
+# is used by rovers that have not been placed, which never move.
+_X_STEP = np.array([0, 0, 1, 0, -1], dtype=np.int64)
+_Y_STEP = np.array([0, 1, 0, -1, 0], dtype=np.int64)
+
+# New facing after a turn, indexed by the current Direction value.
+_LEFT_TURN = np.array([0, 4, 1, 2, 3], dtype=np.int8)
+_RIGHT_TURN = np.array([0, 2, 3, 4, 1], dtype=np.int8)
+
+
+class RoverFleet(object):
+    """A fleet of independent toy robot Mars Rovers, each on its own board.
+
+    Attributes:
+        x_pos - array of positions on the x axis. Only meaningful where placed is True
+        y_pos - array of positions on the y axis. Only meaningful where placed is True
+        facing - array of Direction values. 0 for rovers that have not been placed
+        placed - array indicating whether each rover has been placed yet
+        x_max - array of the maximum position possible on the x axis for each rover
+        y_max - array of the maximum position possible on the y axis for each rover
+        metrics - the RoverMetrics for the fleet, or None
+    """
+
+    # The fleet logs to the same logger as MarsRover.
+    logger = MarsRover.logger
+
+    def __init__(self, count: int, x_max=4, y_max=4, metrics=None):
+        """Create a fleet of count rovers, none of which have been placed.
+
+        Arguments:
+        count - the number of rovers in the fleet
+        x_max - the maximum x position, either one value for the fleet or one per rover
+        y_max - the maximum y position, either one value for the fleet or one per rover
+        metrics - a RoverMetrics to count and time the commands passed to
+                  recieve_command (see rover_metrics), or None. Each command counts once
+                  for the whole fleet, and each rover rejecting it counts as a rejection
+        """
+        ensure_logging_configured()
+        self.metrics = metrics
+        self.x_pos = np.zeros(count, dtype=np.int64)
+        self.y_pos = np.zeros(count, dtype=np.int64)
+        self.facing = np.zeros(count, dtype=np.int8)
+        self.placed = np.zeros(count, dtype=bool)
+        self.x_max = np.broadcast_to(np.asarray(x_max, dtype=np.int64), (count,)).copy()
+        self.y_max = np.broadcast_to(np.asarray(y_max, dtype=np.int64), (count,)).copy()
+
+    def __len__(self) -> int:
+        return len(self.placed)
+
+    def _select(self, mask) -> np.ndarray:
+        """Return a boolean array selecting the rovers a command applies to."""
+        if mask is None:
+            return np.ones(len(self), dtype=bool)
+        return np.asarray(mask, dtype=bool)
+
+    def place(self, x_pos, y_pos, facing, mask=None) -> np.ndarray:
+        """Place rovers at the specified coordinates facing the specified direction. Each
+        rover follows the rules of MarsRover._place_rover, so placements that are out of
+        bounds or face an unrecognised direction are ignored.
+
+        Returns an array that is True for each rover whose placement was valid and False
+        otherwise. Rovers excluded by mask are reported as False.
+
+        Arguments:
+        x_pos - the position on the x axis, either one value or one per rover
+        y_pos - the position on the y axis, either one value or one per rover
+        facing - the direction name (e.g. 'NORTH'), either one name or one per rover
+        mask - optional boolean array selecting which rovers to place
+        """
+        count = len(self)
+        x_pos = np.broadcast_to(np.asarray(x_pos, dtype=np.int64), (count,))
+        y_pos = np.broadcast_to(np.asarray(y_pos, dtype=np.int64), (count,))
+        if isinstance(facing, str):
+            facing = np.full(count, DIRECTION_VALUES.get(facing, 0), dtype=np.int8)
+        else:
+            facing = np.array([DIRECTION_VALUES.get(f, 0) for f in facing], dtype=np.int8)
+
+        valid = (self._select(mask)
+                 & (x_pos >= 0) & (x_pos <= self.x_max)
+                 & (y_pos >= 0) & (y_pos <= self.y_max)
+                 & (facing != 0))
+        self.x_pos[valid] = x_pos[valid]
+        self.y_pos[valid] = y_pos[valid]
+        self.facing[valid] = facing[valid]
+        self.placed |= valid
+        return valid
+
+    def turn(self, command: str, mask=None) -> np.ndarray:
+        """Turn rovers left or right through 90 degrees, following the rules of
+        MarsRover._turn_rover.
+
+        Returns an array that is True for each rover where the turn was valid (or was
+        ignored because the rover has not been placed) and False otherwise. Rovers
+        excluded by mask are reported as True.
+
+        Arguments:
+        command - the turn command. This must be one of "LEFT" or "RIGHT"
+        mask - optional boolean array selecting which rovers to turn
+        """
+        selected = self._select(mask)
+        if command == "LEFT":
+            table = _LEFT_TURN
+        elif command == "RIGHT":
+            table = _RIGHT_TURN
+        else:
+            return ~(selected & self.placed)
+
+        turning = selected & self.placed
+        self.facing[turning] = table[self.facing[turning]]
+        return np.ones(len(self), dtype=bool)
+
+    def move(self, mask=None) -> np.ndarray:
+        """Move each rover one unit in the direction it is facing, unless that would take
+        it out of bounds. This follows the rules of MarsRover._move_rover.
+
+        Returns an array that is True for each rover where the move succeeded (or was
+        ignored because the rover has not been placed) and False otherwise. Rovers
+        excluded by mask are reported as True.
+
+        Arguments:
+        mask - optional boolean array selecting which rovers to move
+        """
+        moving = self._select(mask) & self.placed
+        new_x = self.x_pos + _X_STEP[self.facing]
+        new_y = self.y_pos + _Y_STEP[self.facing]
+        valid = (moving
+                 & (new_x >= 0) & (new_x <= self.x_max)
+                 & (new_y >= 0) & (new_y <= self.y_max))
+        self.x_pos[valid] = new_x[valid]
+        self.y_pos[valid] = new_y[valid]
+        return valid | ~moving
+
+    def report(self) -> List[Optional[str]]:
+        """Return 'X,Y,F' for each rover, or None for rovers that have not been placed."""
+        return ["{},{},{}".format(x_pos, y_pos, DIRECTION_NAMES[facing]) if placed else None
+                for x_pos, y_pos, facing, placed
+                in zip(self.x_pos.tolist(), self.y_pos.tolist(),
+                       self.facing.tolist(), self.placed.tolist())]
+
+    def recieve_command(self, command: str) -> Optional[List[Optional[str]]]:
+        """Process a command for every rover in the fleet, as MarsRover.recieve_command
+        would for a single rover.
+
+        Returns the report for every rover if command is "REPORT". None otherwise.
+
+        Arguments:
+        command - the command to follow. Must be one of:
+                    PLACE X,Y,Z
+                    MOVE
+                    LEFT
+                    RIGHT
+                    REPORT
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            started = perf_counter_ns()
+
+        output = None
+        command_type = command.upper().split(" ")[0]
+        ops = compile_script([command]).ops
+        op = ops[0] if ops else None
+        if op == OP_MOVE:
+            self._rejected(~self.move(), "MOVE", REJECT_OUT_OF_BOUNDS)
+        elif op == OP_TURN:
+            self.turn("LEFT" if ops[1] == LEFT_TURN else "RIGHT")
+        elif op == OP_REPORT:
+            output = self.report()
+        elif op == OP_PLACE:
+            self._place_command(ops[1], ops[2], DIRECTION_NAMES[ops[3]])
+        elif command_type == "PLACE":
+            # A PLACE that doesn't compile may still split into arguments, but with a
+            # direction that isn't recognised, as MarsRover._ignore_command finds.
+            arguments, error = split_place_command(command.upper())
+            if arguments is None:
+                self._rejected(np.ones(len(self), dtype=bool), "PLACE", REJECT_INVALID_PLACE, error)
+            else:
+                self._place_command(*arguments)
+        elif command_type in ("LEFT", "RIGHT"):
+            self._rejected(self.placed, "TURN", REJECT_INVALID_TURN, command.upper())
+        else:
+            self._rejected(np.ones(len(self), dtype=bool), "COMMAND", REJECT_UNRECOGNISED, command.upper())
+
+        if op != OP_PLACE and command_type != "PLACE" and (op is not None or command_type in ("LEFT", "RIGHT")):
+            self._rejected(~self.placed, "COMMAND", REJECT_NOT_PLACED)
+        if metrics is not None:
+            metrics.record_command(command_type, perf_counter_ns() - started)
+        return output
+
+    def _place_command(self, x_pos: int, y_pos: int, facing: str) -> None:
+        """Place every rover as a PLACE command does, noting the rovers which reject it."""
+        if not (INT64_MIN <= x_pos <= INT64_MAX and INT64_MIN <= y_pos <= INT64_MAX):
+            # The coordinates don't fit the fleet's arrays, so are off every board.
+            self._rejected(np.ones(len(self), dtype=bool), "PLACE", REJECT_OUT_OF_BOUNDS, x_pos, y_pos)
+            return
+        valid = self.place(x_pos, y_pos, facing)
+        in_bounds = (x_pos >= 0) & (x_pos <= self.x_max) & (y_pos >= 0) & (y_pos <= self.y_max)
+        self._rejected(~in_bounds, "PLACE", REJECT_OUT_OF_BOUNDS, x_pos, y_pos)
+        self._rejected(in_bounds & ~valid, "PLACE", REJECT_INVALID_DIRECTION, facing)
+
+    def _rejected(self, rejected: np.ndarray, command: str, reason: str, *args) -> None:
+        """Count the rovers which rejected a command in the fleet's metrics, and log the
+        message a MarsRover would, once for all of them.
+
+        Arguments:
+        rejected - a boolean array selecting the rovers which rejected the command
+        command - the command, as a key of toy_robot.REJECTION_MESSAGES
+        reason - the reason for the rejection, one of rover_metrics.REJECTION_REASONS
+        args - the arguments of the message, or the message itself for an invalid PLACE
+        """
+        level = logging.INFO if reason == REJECT_NOT_PLACED else logging.ERROR
+        logging_enabled = self.logger.isEnabledFor(level)
+        if self.metrics is None and not logging_enabled:
+            return
+        count = int(np.count_nonzero(rejected))
+        if not count:
+            return
+        if self.metrics is not None:
+            self.metrics.reject(reason, count)
+        if logging_enabled:
+            message = args[0] if reason == REJECT_INVALID_PLACE else REJECTION_MESSAGES[command, reason] % args
+            self.logger.log(level, "%s (%s rovers)", message, count)
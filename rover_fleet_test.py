@@ -0,0 +1,98 @@
+from rover_logging import ROVER_LOGGER_NAME, RingBufferHandler
+from rover_metrics import RoverMetrics
+from toy_robot import MarsRover
+import logging
+import random
+import unittest
+
+try:
+    import numpy as np
+    from rover_fleet import RoverFleet
+except ImportError:
+    np = None
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestRoverFleet(unittest.TestCase):
+
+    def _check_fleet_matches_rovers(self, fleet, rovers):
+        self.assertEqual(fleet.report(), [rover._report() for rover in rovers])
+        self.assertEqual(fleet.placed.tolist(), [rover.placed for rover in rovers])
+
+    def test_fleet_initialisation(self):
+        fleet = RoverFleet(3, x_max=[1, 2, 3], y_max=5)
+        self.assertEqual(len(fleet), 3)
+        self.assertEqual(fleet.x_max.tolist(), [1, 2, 3])
+        self.assertEqual(fleet.y_max.tolist(), [5, 5, 5])
+        self.assertEqual(fleet.report(), [None, None, None])
+
+    def test_fleet_place(self):
+        fleet = RoverFleet(4, x_max=[4, 4, 2, 4])
+        valid = fleet.place([3, -1, 3, 1], 2, ["SOUTH", "NORTH", "EAST", "SOUTHWEST"])
+        self.assertEqual(valid.tolist(), [True, False, False, False])
+        self.assertEqual(fleet.report(), ["3,2,SOUTH", None, None, None])
+
+        valid = fleet.place(0, 0, "WEST", mask=[False, True, True, False])
+        self.assertEqual(valid.tolist(), [False, True, True, False])
+        self.assertEqual(fleet.report(), ["3,2,SOUTH", "0,0,WEST", "0,0,WEST", None])
+
+    def test_fleet_move_and_turn(self):
+        fleet = RoverFleet(3)
+        fleet.place([4, 0, 0], [3, 1, 0], ["NORTH", "SOUTH", "EAST"], mask=[True, True, False])
+        self.assertEqual(fleet.move().tolist(), [True, True, True])
+        self.assertEqual(fleet.move().tolist(), [False, False, True]) # Both placed rovers are at the edge
+        self.assertEqual(fleet.report(), ["4,4,NORTH", "0,0,SOUTH", None])
+        self.assertEqual(fleet.turn("LEFT").tolist(), [True, True, True])
+        self.assertEqual(fleet.report(), ["4,4,WEST", "0,0,EAST", None])
+        self.assertEqual(fleet.turn("UP").tolist(), [False, False, True]) # Invalid turn is only an error once placed
+        self.assertEqual(fleet.turn("RIGHT", mask=[False, True, False]).tolist(), [True, True, True])
+        self.assertEqual(fleet.report(), ["4,4,WEST", "0,0,SOUTH", None])
+
+    def test_fleet_matches_rovers_on_random_scripts(self):
+        commands = ["MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 0,0,NORTH", "PLACE 3,1,WEST",
+                    "PLACE 5,5,SOUTH", "PLACE 2,2,UP", "JUMP", "right now"]
+        generator = random.Random(2)
+        x_maxes = [generator.randint(0, 6) for _ in range(20)]
+        y_maxes = [generator.randint(0, 6) for _ in range(20)]
+        fleet = RoverFleet(20, x_max=x_maxes, y_max=y_maxes)
+        rovers = [MarsRover(x_max=x_max, y_max=y_max) for x_max, y_max in zip(x_maxes, y_maxes)]
+        for _ in range(500):
+            command = generator.choice(commands)
+            output = fleet.recieve_command(command)
+            expected = [rover.recieve_command(command) for rover in rovers]
+            if command == "REPORT":
+                self.assertEqual(output, expected)
+            else:
+                self.assertEqual(output, None)
+        self._check_fleet_matches_rovers(fleet, rovers)
+
+
+    def test_fleet_rejects_and_logs_as_rovers(self):
+        commands = ["MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 0,0,NORTH", "PLACE 5,5,SOUTH", "PLACE 2,2,UP", "PLACE 9,9,UP",
+                    "PLACE 1,2", "PLACE 99999999999999999999,0,UP", "JUMP", "right now"]
+        generator = random.Random(5)
+        handler = RingBufferHandler()
+        logger = logging.getLogger(ROVER_LOGGER_NAME)
+        logger.addHandler(handler)
+        try:
+            for _ in range(20):
+                x_max = generator.randint(0, 6)
+                fleet = RoverFleet(1, x_max=x_max, metrics=RoverMetrics())
+                rover = MarsRover(x_max=x_max, metrics=RoverMetrics())
+                for command in [generator.choice(commands) for _ in range(20)]:
+                    handler.clear()
+                    rover.recieve_command(command)
+                    # The fleet only logs why commands are rejected
+                    expected = [message + " (1 rovers)" for message in handler.messages()
+                                if not message.startswith(("Received", "Parsing", "Placing", "Moving", "Turning",
+                                                           "Reporting", "Successfully", "Invalid PLACE",
+                                                           "Invalid MOVE", "Invalid turn command will"))]
+                    handler.clear()
+                    fleet.recieve_command(command)
+                    self.assertEqual(handler.messages(), expected)
+                self.assertEqual(fleet.metrics.rejections, rover.metrics.rejections)
+        finally:
+            logger.removeHandler(handler)
+
+
+if __name__ == '__main__':
+    unittest.main()
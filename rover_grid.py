@@ -0,0 +1,194 @@
+"""A board shared by many Mars Rovers.
+
+Each cell can hold at most one rover. The Grid keeps a hash index of the occupied cells,
+so checking whether a move would collide with another rover takes the same time
+however large the board is and however many rovers are on it, and no memory is used
+for empty cells.
+"""
+from typing import Dict, Optional
+
+from toy_robot import MarsRover
+
+
+class Grid(object):
+    """A board shared by many rovers.
+
+    The board can be resized while rovers are on it, as long as none is left off it.
+    Its rovers always move within the board's current size.
+
+    Attributes:
+        x_max - the maximum position possible on the x axis
+        y_max - the maximum position possible on the y axis
+        obstacles - the obstacle map for the board (see rover_obstacles), or None
+        occupants - index of the placed rovers by cell key (see cell_key)
+    """
+
+    def __init__(self, x_max: int = 4, y_max: int = 4, obstacles=None):
+        self._x_max = x_max
+        self._y_max = y_max
+        self.obstacles = obstacles
+        self.occupants: Dict[int, GridRover] = {}
+
+    @property
+    def x_max(self) -> int:
+        return self._x_max
+
+    @x_max.setter
+    def x_max(self, value: int) -> None:
+        self.resize(value, self._y_max)
+
+    @property
+    def y_max(self) -> int:
+        return self._y_max
+
+    @y_max.setter
+    def y_max(self, value: int) -> None:
+        self.resize(self._x_max, value)
+
+    def resize(self, x_max: int, y_max: int) -> None:
+        """Change the size of the board, keeping every rover in its cell.
+
+        Raises ValueError, leaving the board as it was, if a placed rover would be left
+        off the board.
+
+        Arguments:
+        x_max - the new maximum position on the x axis
+        y_max - the new maximum position on the y axis
+        """
+        rovers = list(self.occupants.values())
+        for rover in rovers:
+            if rover.x_pos > x_max or rover.y_pos > y_max:
+                raise ValueError("Resizing the board to {} x {} would leave the rover at ({},{}) "
+                                 "off it".format(x_max, y_max, rover.x_pos, rover.y_pos))
+        self._x_max = x_max
+        self._y_max = y_max
+        # Cell keys depend on the width of the board, so the index is rebuilt.
+        self.occupants = {self.cell_key(rover.x_pos, rover.y_pos): rover for rover in rovers}
+
+    def __len__(self) -> int:
+        """Return the number of rovers placed on the board."""
+        return len(self.occupants)
+
+    def cell_key(self, x_pos: int, y_pos: int) -> int:
+        """Return the key of the cell at the specified coordinates, which must be in bounds."""
+        return y_pos * (self.x_max + 1) + x_pos
+
+    def rover_at(self, x_pos: int, y_pos: int) -> Optional['GridRover']:
+        """Return the rover in the cell at the specified coordinates, or None if it is empty."""
+        return self.occupants.get(self.cell_key(x_pos, y_pos))
+
+    def is_occupied(self, x_pos: int, y_pos: int) -> bool:
+        """Return True if a rover is in the cell at the specified coordinates."""
+        return self.cell_key(x_pos, y_pos) in self.occupants
+
+    def add_rover(self,
+                  x_pos: int = 0,
+                  y_pos: int = 0,
+                  facing: str = 'NORTH',
+                  placed: bool = False) -> 'GridRover':
+        """Create a rover on this board, placing it if needed.
+
+        Returns the new rover.
+
+        Arguments are as for MarsRover. The placement must be on an empty cell.
+        """
+        return GridRover(self, x_pos, y_pos, facing, placed)
+
+    def remove_rover(self, rover: 'GridRover') -> None:
+        """Take a rover off the board, freeing its cell. The rover is left unplaced."""
+        if rover.placed:
+            del self.occupants[self.cell_key(rover.x_pos, rover.y_pos)]
+        rover.x_pos = None
+        rover.y_pos = None
+        rover.facing = None
+        rover.placed = False
+
+    def _relocate(self, rover: 'GridRover', old_key: Optional[int]) -> None:
+        """Update the index after rover has moved to a new cell from the cell with old_key
+        (None if the rover had not been placed).
+        """
+        if old_key is not None:
+            del self.occupants[old_key]
+        self.occupants[self.cell_key(rover.x_pos, rover.y_pos)] = rover
+
+
+class GridRover(MarsRover):
+    """A Mars Rover sharing a Grid with other rovers. Rovers can't be placed in, or move
+    into, a cell holding another rover.
+
+    x_max, y_max and obstacles are read from the grid whenever they are needed, so the
+    rover follows any change to the grid. They can't be set to anything other than the
+    grid's own; resize the grid instead.
+
+    Attributes:
+        grid - the board the rover is on
+    """
+
+    __slots__ = ('grid',)
+
+    def __init__(self,
+                 grid: Grid,
+                 x_pos: int = 0,
+                 y_pos: int = 0,
+                 facing: str = 'NORTH',
+                 placed: bool = False):
+        self.grid = grid
+        super().__init__(x_pos, y_pos, grid.x_max, grid.y_max, facing, placed, grid.obstacles)
+
+    def _check_grid_value(self, name: str, value) -> None:
+        """Raise ValueError unless value is the grid's own value of attribute name."""
+        if value != getattr(self.grid, name):
+            raise ValueError("A GridRover's {} is that of its grid".format(name))
+
+    @property
+    def x_max(self) -> int:
+        return self.grid.x_max
+
+    @x_max.setter
+    def x_max(self, value: int) -> None:
+        self._check_grid_value("x_max", value)
+
+    @property
+    def y_max(self) -> int:
+        return self.grid.y_max
+
+    @y_max.setter
+    def y_max(self, value: int) -> None:
+        self._check_grid_value("y_max", value)
+
+    @property
+    def obstacles(self):
+        return self.grid.obstacles
+
+    @obstacles.setter
+    def obstacles(self, value) -> None:
+        if value is not self.grid.obstacles:
+            raise ValueError("A GridRover's obstacles are those of its grid")
+
+    def _cell_blocked(self, x_pos: int, y_pos: int) -> bool:
+        occupant = self.grid.occupants.get(self.grid.cell_key(x_pos, y_pos))
+        if occupant is not None and occupant is not self:
+            return True
+        return super()._cell_blocked(x_pos, y_pos)
+
+    def _can_run_compiled(self) -> bool:
+        return False
+
+    def _occupied_key(self) -> Optional[int]:
+        """Return the key of the cell the rover is in, or None if it has not been placed."""
+        return self.grid.cell_key(self.x_pos, self.y_pos) if self.placed else None
+
+    def _place_rover(self, x_pos: int, y_pos: int, facing: str) -> bool:
+        old_key = self._occupied_key()
+        if not super()._place_rover(x_pos, y_pos, facing):
+            return False
+        self.grid._relocate(self, old_key)
+        return True
+
+    def _move_rover(self) -> bool:
+        old_key = self._occupied_key()
+        if not super()._move_rover():
+            return False
+        if self.placed:
+            self.grid._relocate(self, old_key)
+        return True
@@ -0,0 +1,98 @@
+from rover_grid import Grid, GridRover
+import unittest
+
+class TestGrid(unittest.TestCase):
+
+    def test_add_rovers(self):
+        grid = Grid(x_max=5, y_max=5)
+        rover = grid.add_rover(x_pos=1, y_pos=2, facing="EAST", placed=True)
+        self.assertIsInstance(rover, GridRover)
+        self.assertEqual((rover.x_max, rover.y_max), (5, 5))
+        self.assertIs(grid.rover_at(1, 2), rover)
+        self.assertTrue(grid.is_occupied(1, 2))
+        self.assertFalse(grid.is_occupied(2, 1))
+        self.assertEqual(len(grid), 1)
+
+        # A second rover can't be placed on an occupied cell
+        self.assertRaises(Exception, grid.add_rover, x_pos=1, y_pos=2, placed=True)
+        other = grid.add_rover()
+        self.assertFalse(other._place_rover(1, 2, "NORTH"))
+        self.assertFalse(other.placed)
+        self.assertEqual(len(grid), 1)
+
+    def test_collision(self):
+        grid = Grid()
+        first = grid.add_rover(x_pos=0, y_pos=0, facing="EAST", placed=True)
+        second = grid.add_rover(x_pos=2, y_pos=0, facing="WEST", placed=True)
+        self.assertTrue(first._move_rover())
+        self.assertFalse(second._move_rover()) # First rover is in the way
+        self.assertEqual(second._report(), "2,0,WEST")
+        self.assertFalse(grid.is_occupied(0, 0))
+        self.assertIs(grid.rover_at(1, 0), first)
+
+        first.recieve_command("LEFT")
+        first.recieve_command("MOVE")
+        self.assertTrue(second._move_rover())
+        self.assertEqual(second._report(), "1,0,WEST")
+        self.assertEqual(sorted(grid.occupants), [grid.cell_key(1, 0), grid.cell_key(1, 1)])
+
+    def test_replace_rover(self):
+        grid = Grid()
+        rover = grid.add_rover(x_pos=3, y_pos=3, placed=True)
+        rover.recieve_command("PLACE 3,3,SOUTH") # Placing a rover on its own cell is allowed
+        rover.recieve_command("PLACE 0,4,SOUTH")
+        self.assertEqual(rover._report(), "0,4,SOUTH")
+        self.assertEqual(list(grid.occupants.values()), [rover])
+        self.assertIs(grid.rover_at(0, 4), rover)
+
+    def test_remove_rover(self):
+        grid = Grid()
+        rover = grid.add_rover(x_pos=3, y_pos=3, placed=True)
+        grid.remove_rover(rover)
+        self.assertEqual(len(grid), 0)
+        self.assertIsNone(rover._report())
+        self.assertTrue(grid.add_rover(x_pos=3, y_pos=3, placed=True).placed)
+
+    def test_run_batch_respects_collisions(self):
+        grid = Grid()
+        grid.add_rover(x_pos=2, y_pos=3, placed=True)
+        rover = grid.add_rover()
+        self.assertEqual(rover.run_batch(["REPORT", "PLACE 2,3,NORTH", "PLACE 2,0,NORTH"] + ["MOVE"] * 5 +
+                                         ["REPORT", "RIGHT", "RIGHT", "RIGHT", "MOVE", "REPORT"]),
+                         [None, "2,2,NORTH", "1,2,WEST"])
+        self.assertIs(grid.rover_at(1, 2), rover)
+        self.assertEqual(len(grid), 2)
+
+    def test_large_grid(self):
+        grid = Grid(x_max=10 ** 6, y_max=10 ** 6)
+        rover = grid.add_rover(x_pos=10 ** 6, y_pos=10 ** 6 - 1, facing="NORTH", placed=True)
+        grid.add_rover(x_pos=10 ** 6 - 1, y_pos=10 ** 6, placed=True)
+        self.assertEqual(rover.run_batch(["MOVE", "LEFT", "MOVE", "REPORT"]), ["1000000,1000000,WEST"])
+
+    def test_rovers_follow_a_resized_grid(self):
+        grid = Grid()
+        rover = grid.add_rover(x_pos=4, y_pos=4, facing="EAST", placed=True)
+        other = grid.add_rover(x_pos=1, y_pos=2, placed=True)
+        grid.resize(6, 5)
+        self.assertEqual((rover.x_max, rover.y_max), (6, 5))
+        self.assertIs(grid.rover_at(4, 4), rover)
+        self.assertIs(grid.rover_at(1, 2), other)
+        self.assertEqual(rover.run_batch(["MOVE", "MOVE", "MOVE", "LEFT", "MOVE", "MOVE", "REPORT"]),
+                         ["6,5,NORTH"])
+        self.assertIs(grid.rover_at(6, 5), rover)
+
+        # A grid can't shrink out from under its rovers
+        self.assertRaises(ValueError, grid.resize, 4, 4)
+        self.assertEqual((grid.x_max, grid.y_max), (6, 5))
+        grid.remove_rover(rover)
+        grid.x_max = 3
+        self.assertEqual(other.x_max, 3)
+        self.assertIs(grid.rover_at(1, 2), other)
+
+        # A rover's bounds are its grid's
+        self.assertRaises(ValueError, setattr, other, "x_max", 10)
+        other.x_max = 3
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,295 @@
+"""An append-only binary journal of the commands rovers accept.
+
+A JournaledRover appends every PLACE, MOVE, LEFT and RIGHT it accepts to a Journal, as a
+fixed width record holding the rover's id and the command as an opcode with its
+arguments (see rover_script). Rejected and ignored commands, and REPORTs, are not
+journaled, so the state of every rover can be rebuilt from the journal alone:
+
+    with Journal("rovers.journal") as journal:
+        rover = JournaledRover(journal, rover_id=7)
+        rover.recieve_command("PLACE 1,2,NORTH")
+        rover.recieve_command("MOVE")
+
+    load_journal("rovers.journal")  # {7: (1, 3, 1)}
+
+Records are gathered in memory and written, and synced to disk, a group at a time, so
+the cost of a write and a sync is shared by every record in the group. Each record
+carries a checksum. A record torn by a crash while it was being written can only be the
+last in the file, so a partial or damaged last record ends the journal and is cut off
+when the journal is next opened for writing. A damaged record with complete records
+after it means the file itself is corrupt, and raises ValueError rather than losing
+the records after it.
+
+compact_journal rewrites a journal as the last PLACE of each rover followed by the net
+moves and turns after it, so rebuilding state takes time in proportion to the number of
+rovers rather than the length of their history.
+"""
+from typing import Dict, Iterator, Tuple
+import os
+import struct
+import zlib
+
+from rover_script import LEFT_TURN, OP_MOVE, OP_PLACE, OP_TURN, RIGHT_TURN
+from toy_robot import DIRECTION_STEPS, MarsRover
+
+# The net move along each axis after a rover's last PLACE, written by compact_journal:
+#   OP_SHIFT x y - move x along the x axis and y along the y axis
+OP_SHIFT = 5
+
+# Record: rover id, two 64 bit arguments, opcode, a one byte argument, padding, and a
+# CRC-32 of everything before it. The arguments of each opcode are held as:
+#   OP_PLACE - x, y, facing
+#   OP_MOVE  - count, 0, 0
+#   OP_TURN  - 0, 0, quarter turns to the right
+#   OP_SHIFT - x, y, 0
+_RECORD = struct.Struct("<QqqBB2xI")
+_CHECKED = struct.Struct("<QqqBB2x")
+
+# The journal file starts with a magic number identifying the record format.
+JOURNAL_FORMAT = b"RJNL0001"
+
+# The number of records gathered before they are written together.
+GROUP_SIZE = 256
+
+# A rover's state rebuilt from a journal: (x, y, facing).
+RoverState = Tuple[int, int, int]
+
+
+def _pack(rover_id: int, op: int, first: int, second: int, small: int) -> bytes:
+    try:
+        checked = _CHECKED.pack(rover_id, first, second, op, small)
+    except struct.error:
+        raise ValueError("Command for rover {} does not fit in a journal record".format(rover_id)) from None
+    return checked + struct.pack("<I", zlib.crc32(checked))
+
+
+def _records(data: bytes) -> Iterator[Tuple[int, int, int, int, int]]:
+    """Yield (rover id, first, second, opcode, small argument) for each complete record in
+    the journal held in data, stopping at a torn last record. Raise ValueError for a
+    damaged record with complete records after it.
+    """
+    if not data.startswith(JOURNAL_FORMAT):
+        # An empty file, or one torn while its header was written, holds no records.
+        if JOURNAL_FORMAT.startswith(data):
+            return
+        raise ValueError("File is not a journal in format {}".format(JOURNAL_FORMAT.decode()))
+
+    for position in range(len(JOURNAL_FORMAT), len(data) - _RECORD.size + 1, _RECORD.size):
+        rover_id, first, second, op, small, crc = _RECORD.unpack_from(data, position)
+        if zlib.crc32(data[position:position + _CHECKED.size]) != crc:
+            if position + 2 * _RECORD.size <= len(data):
+                raise ValueError("Journal record at byte {} is corrupt".format(position))
+            return
+        yield rover_id, first, second, op, small
+
+
+def _read(path: str) -> bytes:
+    try:
+        with open(path, "rb") as journal_file:
+            return journal_file.read()
+    except FileNotFoundError:
+        return b""
+
+
+class Journal(object):
+    """Appends command records to a journal file.
+
+    Attributes:
+        path - the path of the journal file
+        group_size - the number of records gathered before they are written
+        sync - whether to wait for each group of records to reach the disk
+    """
+
+    def __init__(self, path: str, group_size: int = GROUP_SIZE, sync: bool = True):
+        self.path = path
+        self.group_size = group_size
+        self.sync = sync
+        self._pending = bytearray()
+        self._pending_count = 0
+
+        # Cut off anything after the last complete record, so new records follow on
+        # from it.
+        data = _read(path)
+        end = len(JOURNAL_FORMAT) + _RECORD.size * sum(1 for _ in _records(data))
+        if data.startswith(JOURNAL_FORMAT):
+            self._file = open(path, "r+b")
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(JOURNAL_FORMAT)
+
+    def __enter__(self) -> 'Journal':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, rover_id: int, op: int, first: int = 0, second: int = 0, small: int = 0) -> None:
+        """Add a record to the journal. Records are written once group_size of them have
+        been gathered, or on commit.
+
+        Arguments:
+        rover_id - the id of the rover
+        op - the opcode
+        first, second, small - the arguments of the opcode, as described for _RECORD
+        """
+        self._pending += _pack(rover_id, op, first, second, small)
+        self._pending_count += 1
+        if self._pending_count >= self.group_size:
+            self.commit()
+
+    def commit(self) -> None:
+        """Write every gathered record, and wait for them to reach the disk if sync is set."""
+        if self._pending:
+            self._file.write(self._pending)
+            self._pending.clear()
+            self._pending_count = 0
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Commit any gathered records and close the journal file."""
+        if self._file is not None:
+            self.commit()
+            self._file.close()
+            self._file = None
+
+
+class JournaledRover(MarsRover):
+    """A Mars Rover which appends every command it accepts to a Journal.
+
+    Scripts given to run_batch are journaled command by command, as are lines of bytes
+    given to rover_script.run_lines. A CompiledScript that doesn't have the commands it
+    was compiled from, such as one loaded with CompiledScript.from_bytes, has already
+    had its moves and turns folded together, so it is journaled as the commands its
+    opcodes stand for.
+
+    Attributes:
+        journal - the Journal
+        rover_id - the id the rover's records are journaled under
+    """
+
+    __slots__ = ('journal', 'rover_id')
+
+    def __init__(self, journal: Journal, rover_id: int = 0, *args, **kwargs):
+        """Arguments after journal and rover_id are as for MarsRover."""
+        self.journal = journal
+        self.rover_id = rover_id
+        super().__init__(*args, **kwargs)
+
+    def _can_run_compiled(self) -> bool:
+        return False
+
+    def _follows_each_command(self) -> bool:
+        return True
+
+    def _place_rover(self, x_pos: int, y_pos: int, facing: str) -> bool:
+        if not super()._place_rover(x_pos, y_pos, facing):
+            return False
+        self.journal.append(self.rover_id, OP_PLACE, self.x_pos, self.y_pos, self.facing)
+        return True
+
+    def _move_rover(self) -> bool:
+        placed = self.placed
+        if not super()._move_rover():
+            return False
+        if placed:
+            self.journal.append(self.rover_id, OP_MOVE, 1)
+        return True
+
+    def _turn_rover(self, command: str) -> bool:
+        placed = self.placed
+        if not super()._turn_rover(command):
+            return False
+        if placed:
+            self.journal.append(self.rover_id, OP_TURN, small=LEFT_TURN if command == "LEFT" else RIGHT_TURN)
+        return True
+
+
+def _fold(data: bytes) -> Dict[int, list]:
+    """Fold the records of a journal into [x, y, facing, place, shift x, shift y, turns]
+    for each rover, where place is the (x, y, facing) of the rover's last PLACE and the
+    shifts and turns are the net moves and turns since.
+    """
+    rovers = {}
+    steps = DIRECTION_STEPS
+    for rover_id, first, second, op, small in _records(data):
+        if op == OP_PLACE:
+            rovers[rover_id] = [first, second, small, (first, second, small), 0, 0, 0]
+            continue
+
+        rover = rovers.get(rover_id)
+        if rover is None:
+            raise ValueError("Journal has a record for rover {} before it is placed".format(rover_id))
+        if op == OP_MOVE:
+            x_step, y_step = steps[rover[2]]
+            first, second = x_step * first, y_step * first
+        if op == OP_MOVE or op == OP_SHIFT:
+            rover[0] += first
+            rover[1] += second
+            rover[4] += first
+            rover[5] += second
+        elif op == OP_TURN:
+            rover[2] = (rover[2] + small - 1) % 4 + 1
+            rover[6] = (rover[6] + small) % 4
+        else:
+            raise ValueError("Journal has an invalid opcode {}".format(op))
+    return rovers
+
+
+def load_journal(path: str) -> Dict[int, RoverState]:
+    """Rebuild the state of every rover in a journal.
+
+    Returns a dictionary mapping the id of every rover that has been placed to its
+    state (x, y, facing), with facing as a Direction value.
+
+    Arguments:
+    path - the path of the journal file
+    """
+    return {rover_id: (rover[0], rover[1], rover[2]) for rover_id, rover in _fold(_read(path)).items()}
+
+
+def restore_journaled(rover: MarsRover, path: str, rover_id: int = 0) -> bool:
+    """Set a rover to the state journaled for a rover id.
+
+    Returns True if the rover id has been placed in the journal, False (leaving the
+    rover unchanged) otherwise.
+
+    Arguments:
+    rover - the rover to restore
+    path - the path of the journal file
+    rover_id - the id of the rover in the journal
+    """
+    state = load_journal(path).get(rover_id)
+    if state is None:
+        return False
+    rover.x_pos, rover.y_pos, rover.facing = state
+    rover.placed = True
+    return True
+
+
+def compact_journal(path: str) -> None:
+    """Rewrite a journal as the last PLACE of each rover followed by the net moves and
+    turns after it. The compacted journal replaces the old one in a single step, so a
+    crash part way through leaves one or the other. No Journal may be writing to the
+    file meanwhile.
+
+    Arguments:
+    path - the path of the journal file
+    """
+    output = bytearray(JOURNAL_FORMAT)
+    for rover_id, rover in _fold(_read(path)).items():
+        place_x, place_y, place_facing = rover[3]
+        output += _pack(rover_id, OP_PLACE, place_x, place_y, place_facing)
+        if rover[4] or rover[5]:
+            output += _pack(rover_id, OP_SHIFT, rover[4], rover[5], 0)
+        if rover[6]:
+            output += _pack(rover_id, OP_TURN, 0, 0, rover[6])
+
+    with open(path + ".tmp", "wb") as compacted:
+        compacted.write(output)
+        compacted.flush()
+        os.fsync(compacted.fileno())
+    os.replace(path + ".tmp", path)
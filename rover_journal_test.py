@@ -0,0 +1,140 @@
+from rover_journal import (JOURNAL_FORMAT, Journal, JournaledRover, _records, compact_journal, load_journal,
+                           restore_journaled)
+from rover_obstacles import SparseObstacles
+from rover_replay import replay_log
+from rover_script import LEFT_TURN, OP_PLACE, OP_TURN, RIGHT_TURN
+from toy_robot import MarsRover
+import os
+import random
+import tempfile
+import unittest
+
+COMMANDS = ["MOVE", "MOVE", "MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 1,1,NORTH", "PLACE 9,9,EAST", "JUMP"]
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.journal_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.journal_dir.name, "rovers.journal")
+
+    def tearDown(self):
+        self.journal_dir.cleanup()
+
+    def _state(self, rover):
+        return (rover.x_pos, rover.y_pos, rover.facing)
+
+    def _drive(self, journal, count, seed):
+        generator = random.Random(seed)
+        rovers = [JournaledRover(journal, rover_id, x_max=generator.randint(1, 6), y_max=generator.randint(1, 6),
+                                 obstacles=SparseObstacles(6, 6, [(2, 2)]) if rover_id % 2 else None)
+                  for rover_id in range(count)]
+        for _ in range(3000):
+            generator.choice(rovers).recieve_command(generator.choice(COMMANDS))
+        return rovers
+
+    def test_rebuild(self):
+        with Journal(self.path, group_size=7, sync=False) as journal:
+            rovers = self._drive(journal, 5, 0)
+        self.assertEqual(load_journal(self.path),
+                         {rover.rover_id: self._state(rover) for rover in rovers if rover.placed})
+
+        restored = MarsRover()
+        self.assertTrue(restore_journaled(restored, self.path, rover_id=3))
+        self.assertEqual(restored._report(), rovers[3]._report())
+        self.assertFalse(restore_journaled(restored, self.path, rover_id=99))
+
+    def test_only_accepted_commands(self):
+        with Journal(self.path, sync=False) as journal:
+            rover = JournaledRover(journal, x_max=2, y_max=2)
+            for command in ["MOVE", "LEFT", "PLACE 5,5,NORTH", "PLACE 0,0,NORTH", "MOVE", "MOVE", "MOVE", "LEFT",
+                            "LEFT TWICE", "REPORT"]:
+                rover.recieve_command(command)
+        # Header, then PLACE, two moves and a turn
+        self.assertEqual(os.path.getsize(self.path), len(JOURNAL_FORMAT) + 4 * 32)
+        self.assertEqual(load_journal(self.path), {0: (0, 2, 4)})
+
+    def test_run_batch_journals_each_command(self):
+        with Journal(self.path, sync=False) as journal:
+            rover = JournaledRover(journal, 1, 0, 0, 4, 4, "NORTH", True)
+            self.assertEqual(rover.run_batch(["LEFT", "RIGHT", "MOVE", "REPORT"]), ["0,1,NORTH"])
+        self.assertEqual(os.path.getsize(self.path), len(JOURNAL_FORMAT) + 4 * 32)
+
+    def test_replayed_commands_are_journaled_as_sent(self):
+        log_path = os.path.join(self.journal_dir.name, "commands.log")
+        with open(log_path, "wb") as log:
+            log.write(b"PLACE 0,0,NORTH\nLEFT\nleft\r\nRIGHT\nLEFT\nMOVE\nREPORT")
+        with Journal(self.path, sync=False) as journal:
+            rover = JournaledRover(journal)
+            self.assertEqual(list(replay_log(rover, log_path)), ["0,0,SOUTH"])
+        with open(self.path, "rb") as journal_file:
+            ops = [(op, small) for _, _, _, op, small in _records(journal_file.read())]
+        self.assertEqual(ops, [(OP_PLACE, 1), (OP_TURN, LEFT_TURN), (OP_TURN, LEFT_TURN), (OP_TURN, RIGHT_TURN),
+                               (OP_TURN, LEFT_TURN)])
+
+    def test_group_commit(self):
+        journal = Journal(self.path, group_size=3, sync=False)
+        rover = JournaledRover(journal, placed=True)
+        rover.recieve_command("MOVE")
+        self.assertEqual(load_journal(self.path), {})
+        rover.recieve_command("RIGHT")
+        self.assertEqual(load_journal(self.path), {0: (0, 1, 2)})
+        rover.recieve_command("MOVE")
+        journal.commit()
+        self.assertEqual(load_journal(self.path), {0: (1, 1, 2)})
+        journal.close()
+
+    def test_torn_record(self):
+        with Journal(self.path, sync=False) as journal:
+            rover = JournaledRover(journal, placed=True)
+            rover.recieve_command("MOVE")
+            rover.recieve_command("MOVE")
+        with open(self.path, "r+b") as journal_file:
+            journal_file.truncate(os.path.getsize(self.path) - 5)
+        self.assertEqual(load_journal(self.path), {0: (0, 1, 1)})
+
+        # Reopening cuts off the torn record, so new records can be read after it
+        with Journal(self.path, sync=False) as journal:
+            rover = JournaledRover(journal, placed=True, facing="EAST")
+        self.assertEqual(load_journal(self.path), {0: (0, 0, 2)})
+
+        # A damaged last record is taken to be torn too
+        size = os.path.getsize(self.path)
+        with open(self.path, "r+b") as journal_file:
+            journal_file.seek(size - 3)
+            journal_file.write(b"\xff")
+        self.assertEqual(load_journal(self.path), {0: (0, 1, 1)})
+
+        # but a damaged record with more after it is corruption, and nothing is cut off
+        with open(self.path, "r+b") as journal_file:
+            journal_file.seek(len(JOURNAL_FORMAT) + 3)
+            journal_file.write(b"\xff")
+        self.assertRaises(ValueError, load_journal, self.path)
+        self.assertRaises(ValueError, Journal, self.path)
+        self.assertEqual(os.path.getsize(self.path), size)
+
+        with open(self.path, "wb") as journal_file:
+            journal_file.write(b"not a journal")
+        self.assertRaises(ValueError, load_journal, self.path)
+
+    def test_compaction(self):
+        with Journal(self.path, sync=False) as journal:
+            rovers = self._drive(journal, 4, 1)
+        expected = load_journal(self.path)
+        size = os.path.getsize(self.path)
+        compact_journal(self.path)
+        self.assertEqual(load_journal(self.path), expected)
+        self.assertLessEqual(os.path.getsize(self.path), len(JOURNAL_FORMAT) + 3 * 32 * len(expected))
+        self.assertLess(os.path.getsize(self.path), size)
+
+        # A compacted journal can be appended to and compacted again
+        with Journal(self.path, sync=False) as journal:
+            rovers[0].journal = journal
+            rovers[0].recieve_command("PLACE 0,0,SOUTH")
+            rovers[0].recieve_command("LEFT")
+        compact_journal(self.path)
+        self.assertEqual(load_journal(self.path)[0], (0, 0, 2))
+        self.assertEqual(load_journal(self.path), {rover.rover_id: self._state(rover) for rover in rovers if rover.placed})
+
+
+if __name__ == '__main__':
+    unittest.main()
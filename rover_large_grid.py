@@ -0,0 +1,128 @@
+"""Mars Rovers for very large boards.
+
+A LargeGridRover behaves exactly as a MarsRover, but keeps the size of its board in
+fixed width (signed 64 bit) integer storage. Every position it can reach therefore fits
+in 64 bits too, so its state can always be compiled against, snapshotted or loaded into
+a RoverFleet, and a board too large for that is refused when it is set.
+
+Moves are checked against limits worked out whenever the size of the board is set. A
+rover on the board can only leave it by moving off the edge it faces, so for each
+facing there is one coordinate value from which a move is refused, and checking a move
+takes a single comparison instead of four. No tuples are built for a move either. A
+rover left off the board when it shrinks has its moves checked in full, as a MarsRover
+does, and compiled scripts are run against it a step at a time, until it is back on the
+board.
+"""
+from array import array
+
+from rover_metrics import REJECT_BLOCKED, REJECT_OUT_OF_BOUNDS
+from rover_script import INT64_MAX, INT64_MIN
+from toy_robot import DIRECTION_NAMES, REJECTION_MESSAGES, MarsRover
+
+# The step taken along its axis by a move in each direction, indexed by Direction value.
+_STEPS = (None, 1, 1, -1, -1)
+
+
+def _fixed_width(value: int, name: str) -> int:
+    """Return value if it fits in a signed 64 bit integer. Raise ValueError otherwise."""
+    if not INT64_MIN <= value <= INT64_MAX:
+        raise ValueError("{} of {} does not fit in a 64 bit integer".format(name, value))
+    return value
+
+
+class LargeGridRover(MarsRover):
+    """A Mars Rover for boards up to the size of a 64 bit integer.
+
+    x_max and y_max are read and set as for a MarsRover, but setting a board size that
+    doesn't fit in a 64 bit integer raises ValueError.
+    """
+
+    __slots__ = ('_bounds', '_limits')
+
+    def __init__(self, *args, **kwargs):
+        """Arguments are as for MarsRover."""
+        self._bounds = array('q', [0, 0])
+        self._limits = None
+        super().__init__(*args, **kwargs)
+
+    def _set_bound(self, axis: int, value: int) -> None:
+        self._bounds[axis] = _fixed_width(value, "Board size")
+        self._refresh_limits()
+
+    def _refresh_limits(self) -> None:
+        x_max, y_max = self._bounds
+        if getattr(self, "placed", False) and not (0 <= self.x_pos <= x_max and 0 <= self.y_pos <= y_max):
+            # Off the board, a rover can't be kept on it by a check of the edge it faces
+            # alone.
+            self._limits = None
+        else:
+            # The coordinate from which a move is refused, for each facing. NORTH and
+            # SOUTH (odd Direction values) move along the y axis, EAST and WEST along the
+            # x axis.
+            self._limits = (None, y_max, x_max, 0, 0)
+
+    @property
+    def x_max(self) -> int:
+        return self._bounds[0]
+
+    @x_max.setter
+    def x_max(self, value: int) -> None:
+        self._set_bound(0, value)
+
+    @property
+    def y_max(self) -> int:
+        return self._bounds[1]
+
+    @y_max.setter
+    def y_max(self, value: int) -> None:
+        self._set_bound(1, value)
+
+    def _can_run_compiled(self) -> bool:
+        # The moves and placements below behave as a MarsRover's do, except for a rover
+        # off the board, which the clamps of a compiled run would put back on it.
+        return super()._can_run_compiled() and self._limits is not None
+
+    def _place_rover(self, x_pos: int, y_pos: int, facing: str) -> bool:
+        placed = super()._place_rover(x_pos, y_pos, facing)
+        if self._limits is None:
+            self._refresh_limits()
+        return placed
+
+    def _move_rover(self) -> bool:
+        if not self.placed:
+            return super()._move_rover()
+        if self._limits is None:
+            moved = super()._move_rover()
+            self._refresh_limits()
+            return moved
+
+        facing = self.facing
+        self.logger.info("Moving rover %s", DIRECTION_NAMES[facing])
+
+        x_pos = self.x_pos
+        y_pos = self.y_pos
+        if facing & 1:
+            if y_pos == self._limits[facing]:
+                return self._refuse_move(REJECT_OUT_OF_BOUNDS)
+            y_pos += _STEPS[facing]
+        else:
+            if x_pos == self._limits[facing]:
+                return self._refuse_move(REJECT_OUT_OF_BOUNDS)
+            x_pos += _STEPS[facing]
+
+        if self._cell_blocked(x_pos, y_pos):
+            return self._refuse_move(REJECT_BLOCKED)
+
+        self.x_pos = x_pos
+        self.y_pos = y_pos
+        if self.recorder is not None:
+            self.recorder.record(x_pos, y_pos, facing, True)
+
+        self.logger.info("Successfully moved rover %s to (%s,%s)",
+                         DIRECTION_NAMES[facing], x_pos, y_pos)
+        return True
+
+    def _refuse_move(self, reason: str) -> bool:
+        self.logger.error(REJECTION_MESSAGES["MOVE", reason])
+        self._rejected(reason)
+        return False
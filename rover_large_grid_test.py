@@ -0,0 +1,88 @@
+from rover_large_grid import LargeGridRover
+from rover_metrics import RoverMetrics
+from rover_obstacles import SparseObstacles
+from rover_script import INT64_MAX, compile_script
+from rover_snapshot import restore_rover, snapshot_rover
+from toy_robot import MarsRover
+import random
+import unittest
+
+class TestLargeGridRover(unittest.TestCase):
+
+    def _check_matches(self, x_max, y_max, obstacles=None, seed=0):
+        generator = random.Random(seed)
+        commands = ["MOVE", "MOVE", "MOVE", "LEFT", "RIGHT", "REPORT", "JUMP",
+                    "PLACE 0,0,NORTH", "PLACE {},{},SOUTH".format(x_max, y_max), "PLACE -1,0,EAST"]
+        script = [generator.choice(commands) for _ in range(2000)]
+        large = LargeGridRover(x_max=x_max, y_max=y_max, obstacles=obstacles, metrics=RoverMetrics())
+        rover = MarsRover(x_max=x_max, y_max=y_max, obstacles=obstacles, metrics=RoverMetrics())
+        for command in script:
+            self.assertEqual(large.recieve_command(command), rover.recieve_command(command))
+        self.assertEqual(large.metrics.rejections, rover.metrics.rejections)
+
+    def test_matches_mars_rover(self):
+        self._check_matches(4, 4)
+        self._check_matches(0, 7, seed=1)
+        self._check_matches(6, 5, SparseObstacles(6, 5, [(1, 1), (0, 3), (2, 0), (5, 5)]), seed=2)
+        self._check_matches(INT64_MAX, INT64_MAX, seed=3)
+
+    def test_edges_of_large_board(self):
+        size = 10 ** 9
+        rover = LargeGridRover(x_pos=size, y_pos=0, x_max=size, y_max=size, facing="EAST", placed=True)
+        self.assertFalse(rover._move_rover())
+        rover.recieve_command("LEFT")
+        self.assertTrue(rover._move_rover())
+        rover.recieve_command("LEFT")
+        self.assertTrue(rover._move_rover())
+        self.assertEqual(rover._report(), "{},1,WEST".format(size - 1))
+        rover.recieve_command("LEFT")
+        self.assertTrue(rover._move_rover())
+        self.assertFalse(rover._move_rover())
+        self.assertEqual(rover.run_batch(["MOVE", "RIGHT", "RIGHT", "MOVE", "MOVE", "REPORT"]), ["999999999,2,NORTH"])
+
+    def test_board_size(self):
+        self.assertRaises(ValueError, LargeGridRover, x_max=INT64_MAX + 1)
+        rover = LargeGridRover(x_pos=2, y_pos=2, facing="EAST", placed=True)
+        with self.assertRaises(ValueError):
+            rover.y_max = -2 ** 64
+        self.assertEqual((rover.x_max, rover.y_max), (4, 4))
+
+        # Changing the size of the board moves the edges the rover stops at
+        rover.x_max = 3
+        rover.recieve_command("MOVE")
+        rover.recieve_command("MOVE")
+        self.assertEqual(rover._report(), "3,2,EAST")
+
+    def test_board_shrinking_under_rover(self):
+        generator = random.Random(4)
+        commands = ["MOVE", "MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 1,1,EAST", "PLACE 3,3,NORTH", "SHRINK"]
+        for _ in range(200):
+            large = LargeGridRover(3, 3, facing="NORTH", placed=True)
+            rover = MarsRover(3, 3, facing="NORTH", placed=True)
+            for command in [generator.choice(commands) for _ in range(20)]:
+                if command == "SHRINK":
+                    large.x_max = rover.x_max = generator.randint(0, 4)
+                    large.y_max = rover.y_max = generator.randint(0, 4)
+                else:
+                    self.assertEqual(large.recieve_command(command), rover.recieve_command(command))
+                self.assertEqual(large._report(), rover._report())
+
+    def test_compiled_scripts_off_a_shrunken_board(self):
+        script = compile_script(["MOVE", "MOVE", "REPORT", "RIGHT", "MOVE", "REPORT"])
+        for rover_class in [LargeGridRover, MarsRover]:
+            rover = rover_class(3, 3, facing="NORTH", placed=True)
+            rover.x_max = rover.y_max = 1
+            self.assertEqual(rover.run_batch(script), ["3,3,NORTH", "3,3,EAST"])
+            self.assertEqual(rover_class(3, 3, facing="NORTH", placed=True).run_batch(script), ["3,4,NORTH", "4,4,EAST"])
+
+    def test_snapshot(self):
+        rover = LargeGridRover(x_pos=7, y_pos=3, x_max=10 ** 12, y_max=10, facing="WEST", placed=True)
+        restored = restore_rover(snapshot_rover(rover), LargeGridRover())
+        self.assertEqual((restored.x_max, restored.y_max), (10 ** 12, 10))
+        self.assertEqual(restored._report(), "7,3,WEST")
+        restored.recieve_command("MOVE")
+        self.assertEqual(restored._report(), "6,3,WEST")
+
+
+if __name__ == '__main__':
+    unittest.main()
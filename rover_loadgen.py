@@ -0,0 +1,127 @@
+"""Load generator for the rover server (see rover_server).
+
+Opens many concurrent sessions, each of which places its rover and then sends requests
+of MOVE, RIGHT, REPORT, driving the rover round a small square. Each session keeps up
+to a set number of requests in flight at once. The latency of a request is the time
+from sending it to reading the reply to its REPORT.
+
+Run against a server with:
+    python rover_loadgen.py --port 7878 --sessions 1000 --requests 100
+"""
+from collections import deque
+from typing import List, NamedTuple, Optional
+import argparse
+import asyncio
+import time
+
+from rover_server import DEFAULT_HOST, DEFAULT_PORT
+
+# The commands sent for each request. The rover never leaves its starting square, so
+# every move is accepted.
+REQUEST = b"MOVE\nRIGHT\nREPORT\n"
+
+
+class LoadResult(NamedTuple):
+    """The outcome of a load run.
+
+    Attributes:
+        requests - the number of requests answered
+        seconds - the time taken
+        throughput - requests answered per second
+        p50 - the median request latency, in seconds
+        p99 - the 99th percentile request latency, in seconds
+    """
+    requests: int
+    seconds: float
+    throughput: float
+    p50: float
+    p99: float
+
+
+def percentile(latencies: List[float], fraction: float) -> float:
+    """Return the latency below which fraction of the sorted latencies fall."""
+    if not latencies:
+        return 0.0
+    return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+
+async def _session(host: str, port: int, path: Optional[str],
+                   requests: int, pipeline: int, latencies: List[float]) -> None:
+    """Run one session, appending the latency of each of its requests to latencies."""
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    sent = deque()
+    in_flight = asyncio.Semaphore(pipeline)
+
+    async def send():
+        writer.write(b"PLACE 0,0,NORTH\n")
+        for _ in range(requests):
+            await in_flight.acquire()
+            sent.append(time.perf_counter())
+            writer.write(REQUEST)
+            await writer.drain()
+
+    sender = asyncio.ensure_future(send())
+    try:
+        for _ in range(requests):
+            if not await reader.readline():
+                raise ConnectionError("Server closed the session")
+            latencies.append(time.perf_counter() - sent.popleft())
+            in_flight.release()
+        await sender
+        writer.write(b"END\n")
+        await writer.drain()
+    finally:
+        sender.cancel()
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load(host: str = DEFAULT_HOST,
+                   port: int = DEFAULT_PORT,
+                   path: Optional[str] = None,
+                   sessions: int = 100,
+                   requests: int = 100,
+                   pipeline: int = 8) -> LoadResult:
+    """Drive a rover server with many concurrent sessions.
+
+    Returns the throughput and latency measured.
+
+    Arguments:
+    host - the address of a TCP server
+    port - the port of a TCP server
+    path - the path of a Unix socket server, used instead of host and port
+    sessions - the number of concurrent sessions
+    requests - the number of requests sent by each session
+    pipeline - the most requests each session has in flight at once
+    """
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*[_session(host, port, path, requests, pipeline, latencies)
+                           for _ in range(sessions)])
+    seconds = time.perf_counter() - started
+    latencies.sort()
+    return LoadResult(len(latencies), seconds, len(latencies) / seconds,
+                      percentile(latencies, 0.5), percentile(latencies, 0.99))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Generate load against a rover server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="the address of the server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="the TCP port of the server")
+    parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket at PATH instead of TCP")
+    parser.add_argument("--sessions", type=int, default=100, help="the number of concurrent sessions")
+    parser.add_argument("--requests", type=int, default=100, help="the number of requests per session")
+    parser.add_argument("--pipeline", type=int, default=8, help="the most requests in flight per session")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_load(args.host, args.port, args.unix, args.sessions, args.requests, args.pipeline))
+    print("{:,} requests in {:.2f}s: {:,.0f} requests/s, p50 {:.2f}ms, p99 {:.2f}ms".format(
+        result.requests, result.seconds, result.throughput, result.p50 * 1000, result.p99 * 1000))
+
+
+if __name__ == '__main__':
+    main()
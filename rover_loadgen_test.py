@@ -0,0 +1,29 @@
+from rover_loadgen import percentile, run_load
+from rover_logging import configure_logging
+from rover_server import start_server
+import unittest
+
+class TestRoverLoadgen(unittest.IsolatedAsyncioTestCase):
+
+    def test_percentile(self):
+        latencies = [float(value) for value in range(100)]
+        self.assertEqual(percentile(latencies, 0.5), 50.0)
+        self.assertEqual(percentile(latencies, 0.99), 99.0)
+        self.assertEqual(percentile(latencies, 1.0), 99.0)
+        self.assertEqual(percentile([], 0.99), 0.0)
+
+    async def test_run_load(self):
+        configure_logging("null")
+        server = await start_server(port=0)
+        try:
+            result = await run_load(port=server.sockets[0].getsockname()[1], sessions=20, requests=50, pipeline=4)
+        finally:
+            server.close()
+            await server.wait_closed()
+        self.assertEqual(result.requests, 1000)
+        self.assertGreater(result.throughput, 0)
+        self.assertLessEqual(result.p50, result.p99)
+
+
+if __name__ == '__main__':
+    unittest.main()
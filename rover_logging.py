@@ -0,0 +1,331 @@
+"""Logging modes for the Mars Rover.
+
+The rover logs every step of every command at INFO level. That is useful for auditing
+but costly when replaying long scripts, so set_log_mode chooses how much of it is
+kept:
+
+    full    - log everything (the default)
+    errors  - only log rejected and unrecognised commands
+    off     - log nothing. The rover skips all of its log formatting
+    sampled - log every Nth INFO message, and every error
+    ring    - also keep the most recent records in memory, in a RingBufferHandler.
+              Combine this with the null log sink to keep nothing else
+
+Log messages use deferred formatting, so a record is only turned into text if a
+handler actually writes it out.
+
+Where the records go is chosen once per process with configure_logging:
+
+    file   - write to a log file (MarsRover.log by default)
+    queue  - hand records to a background thread which writes them to the log file
+             in batches, so logging never blocks the rover
+    stream - write to stderr
+    null   - discard all records
+    root   - pass records on to the root logger, for applications that configure
+             logging themselves
+
+The first MarsRover created configures the "file" sink if configure_logging has not
+already been called. Only the rover's own logger is configured, so the logging set
+up by a host application is left alone.
+"""
+from collections import deque
+from typing import List, Optional
+import atexit
+import logging
+import threading
+
+# The name of the logger used by MarsRover.
+ROVER_LOGGER_NAME = 'toy_robot'
+
+LOG_MODES = ("full", "errors", "off", "sampled", "ring")
+
+LOG_SINKS = ("file", "queue", "stream", "null", "root")
+
+DEFAULT_LOG_FILE = 'MarsRover.log'
+
+# The format used by logging.basicConfig, which the rover originally configured.
+LOG_FORMAT = logging.BASIC_FORMAT
+
+# Number of records the queue sink's writer thread writes between flushes of the file.
+QUEUE_BATCH_SIZE = 1024
+
+# The sink chosen by configure_logging, the handler it added to the rover logger and,
+# for the queue sink, the listener thread writing records out.
+_configured_sink = None
+_sink_handler = None
+_queue_listener = None
+
+# Whether the rover logger's level was chosen by configure_logging rather than by
+# set_log_mode.
+_sink_set_level = False
+
+# Held while the sink is configured or shut down, so that rovers created on several
+# threads at once configure it only once.
+_sink_lock = threading.RLock()
+
+# The filter or handler installed by the most recent call to set_log_mode, if any.
+_installed_filter = None
+_installed_handler = None
+
+
+class RingBufferHandler(logging.Handler):
+    """A logging handler that keeps the most recent records in memory.
+
+    Records are stored unformatted, so the cost of formatting is only paid for the
+    records that are actually read back with messages().
+    """
+
+    def __init__(self, capacity: int = 10000):
+        """Create a handler holding at most capacity records.
+
+        Arguments:
+        capacity - the number of records to keep. Older records are discarded
+        """
+        super().__init__()
+        self.buffer = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.buffer.append(record)
+
+    def records(self) -> List[logging.LogRecord]:
+        """Return the buffered records, oldest first."""
+        return list(self.buffer)
+
+    def messages(self) -> List[str]:
+        """Return the formatted message of each buffered record, oldest first."""
+        return [record.getMessage() for record in self.buffer]
+
+    def clear(self) -> None:
+        """Discard all buffered records."""
+        self.buffer.clear()
+
+
+class SampleFilter(logging.Filter):
+    """A logging filter that lets through one in every N records below WARNING level.
+    Warnings and errors are always let through.
+    """
+
+    def __init__(self, every: int = 100):
+        """Create a filter passing one in every records.
+
+        Arguments:
+        every - the sampling interval. Must be at least 1
+        """
+        super().__init__()
+        if every < 1:
+            raise ValueError("Sampling interval must be at least 1")
+        self.every = every
+        self.seen = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        self.seen += 1
+        return (self.seen - 1) % self.every == 0
+
+
+def set_log_mode(mode: str = "full",
+                 capacity: int = 10000,
+                 sample_every: int = 100) -> Optional[RingBufferHandler]:
+    """Choose how much the Mars Rover logs. Any filter or ring buffer installed by a
+    previous call is removed first.
+
+    Returns the RingBufferHandler holding the records in "ring" mode. None otherwise.
+
+    Arguments:
+    mode - one of "full", "errors", "off", "sampled" or "ring"
+    capacity - the number of records kept in "ring" mode
+    sample_every - the sampling interval in "sampled" mode
+    """
+    if mode not in LOG_MODES:
+        raise ValueError("Unrecognised log mode {}".format(mode))
+
+    global _installed_filter, _installed_handler, _sink_set_level
+
+    logger = logging.getLogger(ROVER_LOGGER_NAME)
+    if _installed_filter is not None:
+        logger.removeFilter(_installed_filter)
+        _installed_filter = None
+    if _installed_handler is not None:
+        logger.removeHandler(_installed_handler)
+        _installed_handler = None
+    _sink_set_level = False
+
+    match mode:
+        case "full":
+            logger.setLevel(logging.INFO)
+        case "errors":
+            logger.setLevel(logging.ERROR)
+        case "off":
+            logger.setLevel(logging.CRITICAL + 1)
+        case "sampled":
+            logger.setLevel(logging.INFO)
+            _installed_filter = SampleFilter(sample_every)
+            logger.addFilter(_installed_filter)
+        case "ring":
+            logger.setLevel(logging.INFO)
+            _installed_handler = RingBufferHandler(capacity)
+            logger.addHandler(_installed_handler)
+            return _installed_handler
+
+    return None
+
+
+def _file_handler(filename: str, filemode: str) -> logging.Handler:
+    """Return a handler writing formatted records to filename. The file is not opened
+    (or truncated) until the first record is written.
+    """
+    handler = logging.FileHandler(filename, mode=filemode, delay=True)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """A FileHandler that only flushes the log file after every flush_every records, and
+    when it is closed. The file is not opened until the first record is written.
+    """
+
+    def __init__(self, filename: str, mode: str = 'a', flush_every: int = QUEUE_BATCH_SIZE):
+        super().__init__(filename, mode=mode, delay=True)
+        self.flush_every = flush_every
+        self.unflushed = 0
+
+    def flush(self) -> None:
+        self.unflushed += 1
+        if self.unflushed >= self.flush_every:
+            super().flush()
+            self.unflushed = 0
+
+    def close(self) -> None:
+        super().flush()
+        super().close()
+
+
+def _deferred_queue_handler_class(handlers):
+    """Return a QueueHandler class which leaves formatting records to the thread that
+    writes them out. The rover only logs immutable arguments, so records can safely be
+    passed between threads before they are formatted.
+    """
+    class DeferredQueueHandler(handlers.QueueHandler):
+        def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+            return record
+
+    return DeferredQueueHandler
+
+
+def configure_logging(sink: str = "file",
+                      filename: str = DEFAULT_LOG_FILE,
+                      filemode: str = 'w',
+                      force: bool = False) -> bool:
+    """Choose where the Mars Rover's log records are written. This only takes effect the
+    first time it is called in a process, unless force is set.
+
+    Returns True if the sink was configured, False if one had already been chosen.
+
+    Arguments:
+    sink - one of "file", "queue", "stream", "null" or "root"
+    filename - the log file used by the "file" and "queue" sinks
+    filemode - the mode the log file is opened with. 'w' truncates it, 'a' appends
+    force - replace a sink configured by an earlier call
+    """
+    if sink not in LOG_SINKS:
+        raise ValueError("Unrecognised log sink {}".format(sink))
+    with _sink_lock:
+        return _configure_sink(sink, filename, filemode, force)
+
+
+def _configure_sink(sink: str, filename: str, filemode: str, force: bool) -> bool:
+    global _configured_sink, _sink_handler, _queue_listener, _sink_set_level
+
+    if _configured_sink is not None:
+        if not force:
+            return False
+        shutdown_logging()
+
+    logger = logging.getLogger(ROVER_LOGGER_NAME)
+    match sink:
+        case "file":
+            _sink_handler = _file_handler(filename, filemode)
+        case "queue":
+            from logging import handlers
+            import queue
+
+            # The listener thread formats the records and writes them to the file in
+            # batches, so only the cheap enqueue happens on the caller's thread.
+            record_queue = queue.SimpleQueue()
+            file_handler = BufferedFileHandler(filename, mode=filemode)
+            file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            _queue_listener = handlers.QueueListener(record_queue, file_handler)
+            _queue_listener.start()
+            _sink_handler = _deferred_queue_handler_class(handlers)(record_queue)
+        case "stream":
+            _sink_handler = logging.StreamHandler()
+            _sink_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        case "null":
+            _sink_handler = logging.NullHandler()
+
+    _configured_sink = sink
+    if sink == "root":
+        return True
+
+    logger.addHandler(_sink_handler)
+    logger.propagate = False
+
+    # Records sent to the null sink are thrown away, so don't create them at all unless
+    # a level has been chosen explicitly with set_log_mode.
+    _sink_set_level = logger.level == logging.NOTSET
+    if _sink_set_level:
+        logger.setLevel(logging.CRITICAL + 1 if sink == "null" else logging.INFO)
+
+    return True
+
+
+def ensure_logging_configured() -> None:
+    """Configure the default log sink if no sink has been chosen yet."""
+    if _configured_sink is None:
+        configure_logging()
+
+
+def logs_each_command() -> bool:
+    """Return True if the rover logs the steps of each command it handles, as it does in
+    the "full", "sampled" and "ring" modes. Scripts run with MarsRover.run_batch are
+    compiled and so skip those messages, so callers promising a log of every command
+    should pass the commands to recieve_command one at a time instead.
+    """
+    return logging.getLogger(ROVER_LOGGER_NAME).isEnabledFor(logging.INFO)
+
+
+def configured_sink() -> Optional[str]:
+    """Return the name of the configured log sink, or None if none has been chosen."""
+    return _configured_sink
+
+
+def shutdown_logging() -> None:
+    """Flush and remove the configured log sink. The next MarsRover created will
+    configure the default sink again.
+    """
+    with _sink_lock:
+        _shutdown_sink()
+
+
+def _shutdown_sink() -> None:
+    global _configured_sink, _sink_handler, _queue_listener, _sink_set_level
+
+    logger = logging.getLogger(ROVER_LOGGER_NAME)
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.close()
+        _queue_listener = None
+    if _sink_handler is not None:
+        logger.removeHandler(_sink_handler)
+        _sink_handler.close()
+        _sink_handler = None
+        logger.propagate = True
+    if _sink_set_level:
+        logger.setLevel(logging.NOTSET)
+        _sink_set_level = False
+    _configured_sink = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,140 @@
+from rover_logging import (ROVER_LOGGER_NAME, RingBufferHandler, SampleFilter, configure_logging,
+                           configured_sink, set_log_mode, shutdown_logging)
+from toy_robot import MarsRover
+import logging
+import os
+import tempfile
+import threading
+import unittest
+
+class TestRoverLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.log_dir.name, "rover.log")
+
+    def tearDown(self):
+        set_log_mode("full")
+        logging.getLogger(ROVER_LOGGER_NAME).setLevel(logging.NOTSET)
+        shutdown_logging()
+        self.log_dir.cleanup()
+
+    def _read_log(self):
+        with open(self.log_file) as log:
+            return log.read().splitlines()
+
+    def test_ring_mode_keeps_recent_records(self):
+        handler = set_log_mode("ring", capacity=3)
+        rover = MarsRover()
+        rover.recieve_command("PLACE 1,2,EAST")
+        rover.recieve_command("MOVE")
+        self.assertEqual(handler.messages(), ["Received command MOVE",
+                                              "Moving rover EAST",
+                                              "Successfully moved rover EAST to (2,2)"])
+        handler.clear()
+        self.assertEqual(handler.records(), [])
+
+    def test_errors_mode(self):
+        handler = RingBufferHandler()
+        logger = logging.getLogger(ROVER_LOGGER_NAME)
+        logger.addHandler(handler)
+        try:
+            set_log_mode("errors")
+            rover = MarsRover(x_pos=4, y_pos=4, facing="NORTH", placed=True)
+            rover.recieve_command("MOVE")
+            rover.recieve_command("LEFT")
+            self.assertEqual(handler.messages(), ["Move would take rover out of bounds",
+                                                  "Invalid MOVE command will be ignored"])
+        finally:
+            logger.removeHandler(handler)
+
+    def test_off_mode(self):
+        handler = RingBufferHandler()
+        logger = logging.getLogger(ROVER_LOGGER_NAME)
+        logger.addHandler(handler)
+        try:
+            set_log_mode("off")
+            rover = MarsRover()
+            self.assertEqual(rover.run_batch(["PLACE 0,0,NORTH", "MOVE", "STOP", "REPORT"]), ["0,1,NORTH"])
+            rover.recieve_command("STOP")
+            self.assertEqual(handler.records(), [])
+        finally:
+            logger.removeHandler(handler)
+
+    def test_sample_filter(self):
+        sample_filter = SampleFilter(every=3)
+        info = logging.LogRecord("test", logging.INFO, __file__, 0, "message", None, None)
+        error = logging.LogRecord("test", logging.ERROR, __file__, 0, "message", None, None)
+        self.assertEqual([sample_filter.filter(info) for _ in range(7)],
+                         [True, False, False, True, False, False, True])
+        self.assertTrue(sample_filter.filter(error))
+        self.assertRaises(ValueError, SampleFilter, 0)
+
+    def test_invalid_mode(self):
+        self.assertRaises(ValueError, set_log_mode, "verbose")
+
+    def test_file_sink(self):
+        self.assertTrue(configure_logging("file", filename=self.log_file, force=True))
+        self.assertEqual(configured_sink(), "file")
+        rover = MarsRover()
+        rover.recieve_command("STOP")
+        shutdown_logging()
+        self.assertEqual(self._read_log(), ["INFO:toy_robot:Initialising Mars Rover",
+                                            "INFO:toy_robot:Initialised Mars Rover, board dimensions 4 x 4",
+                                            "INFO:toy_robot:Received command STOP",
+                                            "ERROR:toy_robot:Unrecognosed command STOP will be ignored"])
+
+    def test_queue_sink(self):
+        configure_logging("queue", filename=self.log_file, force=True)
+        rover = MarsRover()
+        for _ in range(2000):
+            rover.recieve_command("STOP")
+        shutdown_logging()
+        log = self._read_log()
+        self.assertEqual(len(log), 4002)
+        self.assertEqual(log[-1], "ERROR:toy_robot:Unrecognosed command STOP will be ignored")
+
+    def test_sink_is_chosen_once(self):
+        configure_logging("null", force=True)
+        self.assertFalse(configure_logging("file", filename=self.log_file))
+        self.assertEqual(configured_sink(), "null")
+        self.assertFalse(logging.getLogger(ROVER_LOGGER_NAME).isEnabledFor(logging.ERROR))
+        MarsRover().recieve_command("STOP")
+        self.assertFalse(os.path.exists(self.log_file))
+        self.assertRaises(ValueError, configure_logging, "syslog", force=True)
+
+    def test_log_file_not_created_until_written(self):
+        set_log_mode("off")
+        configure_logging("file", filename=self.log_file, force=True)
+        MarsRover().recieve_command("MOVE")
+        self.assertFalse(os.path.exists(self.log_file))
+
+    def test_rover_configures_default_sink(self):
+        shutdown_logging()
+        self.assertEqual(configured_sink(), None)
+        set_log_mode("off")
+        MarsRover()
+        self.assertEqual(configured_sink(), "file")
+
+    def test_rovers_created_on_many_threads_configure_one_sink(self):
+        shutdown_logging()
+        set_log_mode("off")
+        logger = logging.getLogger(ROVER_LOGGER_NAME)
+        handlers = len(logger.handlers)
+        start = threading.Barrier(8)
+
+        def create():
+            start.wait()
+            MarsRover()
+
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(configured_sink(), "file")
+        self.assertEqual(len(logger.handlers), handlers + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""Counters and latency histograms for the commands rovers handle.
+
+A RoverMetrics passed as a rover's (or fleet's) metrics counts every command handled by
+recieve_command by type, counts rejected commands by the reason they were rejected, and
+records the time taken by each command in a histogram per command type. One RoverMetrics
+can be shared by any number of rovers to gather their metrics together. Rovers without
+metrics, the default, do none of this.
+
+The histograms keep a fixed number of buckets per power of two, in the manner of
+HdrHistogram, so each records any latency with a relative error of at most
+1 / 2 ** significant_bits in constant time and space.
+"""
+from typing import Dict, List
+
+# The command types counted. Commands whose first word is none of these are counted as
+# UNRECOGNISED.
+COMMAND_TYPES = ("PLACE", "MOVE", "LEFT", "RIGHT", "REPORT", "UNRECOGNISED")
+
+# The reasons a command can be rejected, or ignored in the case of REJECT_NOT_PLACED.
+# MarsRover and RoverFleet both count rejections under these.
+REJECT_INVALID_PLACE = "invalid_place"
+REJECT_OUT_OF_BOUNDS = "out_of_bounds"
+REJECT_INVALID_DIRECTION = "invalid_direction"
+REJECT_BLOCKED = "blocked"
+REJECT_INVALID_TURN = "invalid_turn"
+REJECT_UNRECOGNISED = "unrecognised"
+REJECT_NOT_PLACED = "not_placed"
+REJECTION_REASONS = (REJECT_INVALID_PLACE, REJECT_OUT_OF_BOUNDS, REJECT_INVALID_DIRECTION, REJECT_BLOCKED,
+                     REJECT_INVALID_TURN, REJECT_UNRECOGNISED, REJECT_NOT_PLACED)
+
+# The percentiles given for each histogram in a snapshot.
+SNAPSHOT_PERCENTILES = (50, 90, 99, 99.9)
+
+# Default number of bits of each latency kept by a histogram.
+SIGNIFICANT_BITS = 5
+
+
+class LatencyHistogram(object):
+    """A histogram of non-negative integer values, such as latencies in nanoseconds.
+
+    Values below 2 ** significant_bits each have their own bucket. Above that, each
+    power of two is split into 2 ** significant_bits buckets of equal width.
+
+    Attributes:
+        significant_bits - the number of leading bits of each value kept
+        count - the number of values recorded
+        total - the sum of the values recorded
+        min - the smallest value recorded, or None
+        max - the largest value recorded, or None
+    """
+
+    def __init__(self, significant_bits: int = SIGNIFICANT_BITS):
+        self.significant_bits = significant_bits
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._sub_buckets = 1 << significant_bits
+        self._buckets = [0] * (self._sub_buckets * 2)
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_buckets:
+            return value
+        shift = value.bit_length() - self.significant_bits - 1
+        return self._sub_buckets * (shift + 1) + (value >> shift) - self._sub_buckets
+
+    def _lowest(self, index: int) -> int:
+        """Return the smallest value that falls in the bucket at index."""
+        if index < 2 * self._sub_buckets:
+            return index
+        shift = index // self._sub_buckets - 1
+        return (index % self._sub_buckets + self._sub_buckets) << shift
+
+    def record(self, value: int) -> None:
+        """Record a value, which must not be negative."""
+        index = self._index(value)
+        if index >= len(self._buckets):
+            self._buckets.extend([0] * (index + 1 - len(self._buckets)))
+        self._buckets[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> int:
+        """Return the value at or below which percent of the recorded values fall, to
+        within the precision of the histogram, or 0 if no values have been recorded. The
+        value is rounded up to the top of its bucket, so it is never an underestimate.
+        """
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, bucket in enumerate(self._buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(max(self._lowest(index + 1) - 1, self.min), self.max)
+        return self.max
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        """Add the values recorded by another histogram with the same precision."""
+        if other.significant_bits != self.significant_bits:
+            raise ValueError("Histograms have different precisions")
+        if len(other._buckets) > len(self._buckets):
+            self._buckets.extend([0] * (len(other._buckets) - len(self._buckets)))
+        for index, bucket in enumerate(other._buckets):
+            self._buckets[index] += bucket
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return a summary of the histogram: count, min, max, mean and percentiles."""
+        summary = {"count": self.count,
+                   "min": self.min or 0,
+                   "max": self.max or 0,
+                   "mean": self.total / self.count if self.count else 0.0}
+        for percent in SNAPSHOT_PERCENTILES:
+            summary["p{:g}".format(percent)] = self.percentile(percent)
+        return summary
+
+
+class RoverMetrics(object):
+    """Metrics for the commands handled by one or more rovers.
+
+    Attributes:
+        commands - the number of commands handled, by command type
+        rejections - the number of commands rejected, by reason
+        latency - a LatencyHistogram of the time taken to handle commands, in
+                  nanoseconds, by command type
+    """
+
+    def __init__(self, significant_bits: int = SIGNIFICANT_BITS):
+        self.commands = dict.fromkeys(COMMAND_TYPES, 0)
+        self.rejections = dict.fromkeys(REJECTION_REASONS, 0)
+        self.latency = {command_type: LatencyHistogram(significant_bits) for command_type in COMMAND_TYPES}
+
+    def record_command(self, command_type: str, nanoseconds: int) -> None:
+        """Count a command and record how long it took.
+
+        Arguments:
+        command_type - the first word of the command
+        nanoseconds - the time taken to handle the command
+        """
+        if command_type not in self.commands:
+            command_type = "UNRECOGNISED"
+        self.commands[command_type] += 1
+        self.latency[command_type].record(nanoseconds)
+
+    def reject(self, reason: str, count: int = 1) -> None:
+        """Count rejected commands.
+
+        Arguments:
+        reason - one of REJECTION_REASONS
+        count - the number of commands rejected
+        """
+        self.rejections[reason] += count
+
+    def merge(self, other: 'RoverMetrics') -> None:
+        """Add the metrics gathered by another RoverMetrics."""
+        for command_type, count in other.commands.items():
+            self.commands[command_type] += count
+            self.latency[command_type].merge(other.latency[command_type])
+        for reason, count in other.rejections.items():
+            self.rejections[reason] += count
+
+    def reset(self) -> None:
+        """Set every counter and histogram back to zero."""
+        self.__init__(self.latency["MOVE"].significant_bits)
+
+    def snapshot(self) -> dict:
+        """Return a copy of the metrics as plain dictionaries, ready to be saved as JSON.
+        Histograms are summarised, and only included for command types that have been
+        handled.
+        """
+        return {"commands": dict(self.commands),
+                "rejections": dict(self.rejections),
+                "latency_ns": {command_type: histogram.snapshot()
+                               for command_type, histogram in self.latency.items() if histogram.count}}
+
+    def to_prometheus(self, prefix: str = "rover") -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines: List[str] = ["# TYPE {}_commands_total counter".format(prefix)]
+        lines += ['{}_commands_total{{type="{}"}} {}'.format(prefix, command_type, count)
+                  for command_type, count in self.commands.items()]
+        lines.append("# TYPE {}_rejections_total counter".format(prefix))
+        lines += ['{}_rejections_total{{reason="{}"}} {}'.format(prefix, reason, count)
+                  for reason, count in self.rejections.items()]
+        lines.append("# TYPE {}_command_latency_ns summary".format(prefix))
+        for command_type, histogram in self.latency.items():
+            if not histogram.count:
+                continue
+            for percent in SNAPSHOT_PERCENTILES:
+                lines.append('{}_command_latency_ns{{type="{}",quantile="{:g}"}} {}'.format(
+                    prefix, command_type, percent / 100, histogram.percentile(percent)))
+            lines.append('{}_command_latency_ns_sum{{type="{}"}} {}'.format(prefix, command_type, histogram.total))
+            lines.append('{}_command_latency_ns_count{{type="{}"}} {}'.format(prefix, command_type, histogram.count))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,132 @@
+from rover_metrics import LatencyHistogram, RoverMetrics
+from rover_obstacles import SparseObstacles
+from rover_script import CompiledScript, compile_script
+from toy_robot import MarsRover
+import json
+import random
+import unittest
+
+try:
+    from rover_fleet import RoverFleet
+except ImportError:
+    RoverFleet = None
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_small_values_are_exact(self):
+        histogram = LatencyHistogram()
+        for value in range(32):
+            histogram.record(value)
+        self.assertEqual(histogram.percentile(50), 15)
+        self.assertEqual(histogram.percentile(100), 31)
+        self.assertEqual((histogram.min, histogram.max, histogram.count), (0, 31, 32))
+
+    def test_precision(self):
+        generator = random.Random(8)
+        values = sorted(generator.randint(1, 10 ** 9) for _ in range(10000))
+        histogram = LatencyHistogram(significant_bits=5)
+        for value in values:
+            histogram.record(value)
+        for percent in [1, 50, 90, 99, 99.9]:
+            exact = values[max(0, int(-(-len(values) * percent // 100)) - 1)]
+            self.assertLessEqual(abs(histogram.percentile(percent) - exact), exact / 32)
+        self.assertEqual(histogram.percentile(100), values[-1])
+        self.assertEqual(LatencyHistogram().percentile(99), 0)
+
+    def test_merge(self):
+        first, second, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for value in [5, 500, 5000]:
+            first.record(value)
+            both.record(value)
+        for value in [7, 7 * 10 ** 6]:
+            second.record(value)
+            both.record(value)
+        first.merge(second)
+        self.assertEqual(first.snapshot(), both.snapshot())
+        with self.assertRaises(ValueError):
+            first.merge(LatencyHistogram(significant_bits=3))
+
+
+class TestRoverMetrics(unittest.TestCase):
+
+    COMMANDS = ["MOVE", "REPORT", "PLACE 0,0,NORTH", "PLACE 9,9,NORTH", "PLACE 1,1,UP", "PLACE 1,1",
+                "LEFT", "MOVE", "RIGHT", "LEFT TWICE", "MOVE", "MOVE", "JUMP", "REPORT"]
+
+    def test_rover_metrics(self):
+        metrics = RoverMetrics()
+        rover = MarsRover(obstacles=SparseObstacles(4, 4, [(0, 2)]), metrics=metrics)
+        for command in self.COMMANDS:
+            rover.recieve_command(command)
+
+        self.assertEqual(metrics.commands, {"PLACE": 4, "MOVE": 4, "LEFT": 2, "RIGHT": 1,
+                                            "REPORT": 2, "UNRECOGNISED": 1})
+        self.assertEqual(metrics.rejections, {"invalid_place": 1, "out_of_bounds": 2, "invalid_direction": 1,
+                                              "blocked": 1, "invalid_turn": 1, "unrecognised": 1,
+                                              "not_placed": 2})
+        self.assertEqual(metrics.latency["MOVE"].count, 4)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(json.loads(json.dumps(snapshot)), snapshot)
+        self.assertEqual(set(snapshot["latency_ns"]), {"PLACE", "MOVE", "LEFT", "RIGHT", "REPORT", "UNRECOGNISED"})
+        self.assertGreater(snapshot["latency_ns"]["MOVE"]["p99"], 0)
+
+    def test_run_batch_counts_every_command(self):
+        metrics = RoverMetrics()
+        MarsRover(metrics=metrics).run_batch(self.COMMANDS)
+        self.assertEqual(sum(metrics.commands.values()), len(self.COMMANDS))
+
+    def test_compiled_scripts_are_counted(self):
+        commands = ["MOVE", "PLACE 0,0,NORTH", "MOVE", "MOVE", "MOVE", "MOVE", "MOVE", "MOVE", "LEFT", "LEFT",
+                    "RIGHT", "LEFT", "LEFT", "REPORT"]
+        metrics = RoverMetrics()
+        self.assertEqual(MarsRover(metrics=metrics).run_batch(compile_script(commands)), ["0,4,EAST"])
+
+        expected = RoverMetrics()
+        MarsRover(metrics=expected).run_batch(commands)
+        self.assertEqual(metrics.commands, expected.commands)
+        self.assertEqual(metrics.rejections, expected.rejections)
+        self.assertEqual(metrics.latency["MOVE"].count, 7)
+        self.assertEqual(metrics.latency["LEFT"].count, 4)
+
+        script = CompiledScript.from_bytes(compile_script(commands).to_bytes())
+        self.assertRaises(ValueError, MarsRover(metrics=RoverMetrics()).run_batch, script)
+
+    def test_shared_merge_and_reset(self):
+        shared = RoverMetrics()
+        separate = [RoverMetrics(), RoverMetrics()]
+        for metrics in separate:
+            for rover_metrics in [metrics, shared]:
+                MarsRover(metrics=rover_metrics).run_batch(["PLACE 0,0,SOUTH", "MOVE", "REPORT"])
+        separate[0].merge(separate[1])
+        self.assertEqual(separate[0].commands, shared.commands)
+        self.assertEqual(separate[0].rejections, shared.rejections)
+        self.assertEqual(separate[0].latency["MOVE"].count, 2)
+
+        shared.reset()
+        self.assertEqual(sum(shared.commands.values()), 0)
+        self.assertEqual(shared.snapshot()["latency_ns"], {})
+
+    def test_prometheus(self):
+        metrics = RoverMetrics()
+        MarsRover(metrics=metrics).run_batch(["PLACE 0,0,SOUTH", "MOVE"])
+        text = metrics.to_prometheus()
+        self.assertIn('rover_commands_total{type="MOVE"} 1\n', text)
+        self.assertIn('rover_rejections_total{reason="out_of_bounds"} 1\n', text)
+        self.assertIn('rover_command_latency_ns_count{type="PLACE"} 1\n', text)
+        self.assertNotIn('type="REPORT",quantile', text)
+
+    @unittest.skipIf(RoverFleet is None, "NumPy is not installed")
+    def test_fleet_metrics(self):
+        metrics = RoverMetrics()
+        fleet = RoverFleet(3, x_max=[0, 1, 5], metrics=metrics)
+        for command in ["MOVE", "PLACE 1,0,EAST", "MOVE", "LEFT TWICE", "JUMP", "REPORT"]:
+            fleet.recieve_command(command)
+        self.assertEqual(metrics.commands["MOVE"], 2)
+        self.assertEqual(metrics.rejections["not_placed"], 3 + 1 + 1 + 1)
+        self.assertEqual(metrics.rejections["out_of_bounds"], 1 + 1)
+        self.assertEqual(metrics.rejections["invalid_turn"], 2)
+        self.assertEqual(metrics.rejections["unrecognised"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+"""Terrain obstacle maps for the Mars Rover.
+
+An obstacle store records which cells of a board are blocked. A rover given a store
+refuses to be placed in, or move into, a blocked cell, just as it refuses positions
+out of bounds. Two stores are provided, and either can be passed as a rover's
+obstacles:
+
+    SparseObstacles - a hash set of blocked cells, for maps with few obstacles
+    BitmapObstacles - a packed bitmap with one bit per cell, for dense maps
+
+Both answer is_blocked in constant time whatever the size of the map.
+"""
+from typing import Iterable, Tuple, Union
+import os
+
+# Approximate memory used by each entry in a SparseObstacles set, in bytes. Used to
+# choose between the stores when loading a map.
+SPARSE_BYTES_PER_OBSTACLE = 64
+
+
+class SparseObstacles(object):
+    """Obstacles held as a set of blocked cells.
+
+    Attributes:
+        x_max - the maximum position on the x axis of the board the map covers
+        y_max - the maximum position on the y axis of the board the map covers
+        version - incremented whenever a cell is blocked or unblocked
+    """
+
+    def __init__(self, x_max: int, y_max: int, cells: Iterable[Tuple[int, int]] = ()):
+        """Create a map of a board with the specified cells blocked.
+
+        Arguments:
+        x_max - the maximum position on the x axis of the board
+        y_max - the maximum position on the y axis of the board
+        cells - the (x, y) coordinates of each blocked cell
+        """
+        self.x_max = x_max
+        self.y_max = y_max
+        self.version = 0
+        self._cells = set()
+        for x_pos, y_pos in cells:
+            self.add(x_pos, y_pos)
+
+    def __len__(self) -> int:
+        """Return the number of blocked cells."""
+        return len(self._cells)
+
+    def _key(self, x_pos: int, y_pos: int) -> int:
+        return y_pos * (self.x_max + 1) + x_pos
+
+    def add(self, x_pos: int, y_pos: int) -> None:
+        """Block the cell at the specified coordinates, which must be on the board."""
+        if x_pos > self.x_max or x_pos < 0 or y_pos > self.y_max or y_pos < 0:
+            raise ValueError("Coordinates ({},{}) are out of bounds".format(x_pos, y_pos))
+        key = self._key(x_pos, y_pos)
+        if key not in self._cells:
+            self._cells.add(key)
+            self.version += 1
+
+    def discard(self, x_pos: int, y_pos: int) -> None:
+        """Unblock the cell at the specified coordinates, if it is blocked."""
+        if self.is_blocked(x_pos, y_pos):
+            self._cells.discard(self._key(x_pos, y_pos))
+            self.version += 1
+
+    def is_blocked(self, x_pos: int, y_pos: int) -> bool:
+        """Return True if the cell at the specified coordinates is blocked. Cells off the
+        map are never blocked.
+        """
+        return (0 <= x_pos <= self.x_max and 0 <= y_pos <= self.y_max
+                and y_pos * (self.x_max + 1) + x_pos in self._cells)
+
+
+class BitmapObstacles(object):
+    """Obstacles held as a packed bitmap with one bit per cell, in rows of x.
+
+    Attributes:
+        x_max - the maximum position on the x axis of the board the map covers
+        y_max - the maximum position on the y axis of the board the map covers
+        bits - the bitmap. Bit (key % 8) of byte (key // 8) is set for a blocked cell,
+               where key is y * (x_max + 1) + x
+        version - incremented whenever a cell is blocked or unblocked
+    """
+
+    def __init__(self, x_max: int, y_max: int, cells: Iterable[Tuple[int, int]] = ()):
+        """Create a map of a board with the specified cells blocked.
+
+        Arguments:
+        x_max - the maximum position on the x axis of the board
+        y_max - the maximum position on the y axis of the board
+        cells - the (x, y) coordinates of each blocked cell
+        """
+        self.x_max = x_max
+        self.y_max = y_max
+        self.bits = bytearray(((x_max + 1) * (y_max + 1) + 7) // 8)
+        self.version = 0
+        self._count = 0
+        for x_pos, y_pos in cells:
+            self.add(x_pos, y_pos)
+
+    @classmethod
+    def from_array(cls, blocked) -> 'BitmapObstacles':
+        """Create a map from a two dimensional NumPy array of booleans, indexed [y, x],
+        which is True for each blocked cell.
+        """
+        import numpy as np
+
+        blocked = np.asarray(blocked, dtype=bool)
+        obstacles = cls(blocked.shape[1] - 1, blocked.shape[0] - 1)
+        obstacles.bits[:] = np.packbits(blocked.ravel(), bitorder='little').tobytes()
+        obstacles._count = int(blocked.sum())
+        return obstacles
+
+    def __len__(self) -> int:
+        """Return the number of blocked cells."""
+        return self._count
+
+    def add(self, x_pos: int, y_pos: int) -> None:
+        """Block the cell at the specified coordinates, which must be on the board."""
+        if x_pos > self.x_max or x_pos < 0 or y_pos > self.y_max or y_pos < 0:
+            raise ValueError("Coordinates ({},{}) are out of bounds".format(x_pos, y_pos))
+        if not self.is_blocked(x_pos, y_pos):
+            key = y_pos * (self.x_max + 1) + x_pos
+            self.bits[key >> 3] |= 1 << (key & 7)
+            self._count += 1
+            self.version += 1
+
+    def discard(self, x_pos: int, y_pos: int) -> None:
+        """Unblock the cell at the specified coordinates, if it is blocked."""
+        if self.is_blocked(x_pos, y_pos):
+            key = y_pos * (self.x_max + 1) + x_pos
+            self.bits[key >> 3] &= ~(1 << (key & 7))
+            self._count -= 1
+            self.version += 1
+
+    def is_blocked(self, x_pos: int, y_pos: int) -> bool:
+        """Return True if the cell at the specified coordinates is blocked. Cells off the
+        map are never blocked.
+        """
+        if not (0 <= x_pos <= self.x_max and 0 <= y_pos <= self.y_max):
+            return False
+        key = y_pos * (self.x_max + 1) + x_pos
+        return bool(self.bits[key >> 3] >> (key & 7) & 1)
+
+
+ObstacleStore = Union[SparseObstacles, BitmapObstacles]
+
+
+def _read_cells(path: str) -> Iterable[Tuple[int, int]]:
+    """Read blocked cells from a text file with one 'X,Y' pair per line. Blank lines and
+    lines starting with '#' are ignored.
+    """
+    with open(path) as cells:
+        for line_number, line in enumerate(cells, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                x_pos, y_pos = line.split(",")
+                yield int(x_pos), int(y_pos)
+            except ValueError:
+                raise ValueError("{}:{}: invalid obstacle {}".format(path, line_number, line)) from None
+
+
+def load_obstacles(path: str, x_max: int, y_max: int, backend: str = "auto") -> ObstacleStore:
+    """Load an obstacle map from a file.
+
+    The file is either a NumPy .npy file holding a two dimensional boolean array indexed
+    [y, x], or a text file listing the blocked cells with one 'X,Y' pair per line.
+
+    Returns the obstacle store.
+
+    Arguments:
+    path - the path of the file
+    x_max - the maximum position on the x axis of the board
+    y_max - the maximum position on the y axis of the board
+    backend - "sparse", "bitmap", or "auto" to choose whichever uses less memory
+    """
+    if backend not in ("auto", "sparse", "bitmap"):
+        raise ValueError("Unrecognised obstacle backend {}".format(backend))
+
+    if os.path.splitext(path)[1] == ".npy":
+        import numpy as np
+
+        blocked = np.load(path)
+        if blocked.shape != (y_max + 1, x_max + 1):
+            raise ValueError("Obstacle map {} does not match a {} x {} board".format(path, x_max, y_max))
+        if backend == "sparse":
+            y_blocked, x_blocked = np.nonzero(blocked)
+            return SparseObstacles(x_max, y_max, zip(x_blocked.tolist(), y_blocked.tolist()))
+        return BitmapObstacles.from_array(blocked)
+
+    cells = list(_read_cells(path))
+    bitmap_bytes = (x_max + 1) * (y_max + 1) / 8
+    if backend == "bitmap" or (backend == "auto" and bitmap_bytes < len(cells) * SPARSE_BYTES_PER_OBSTACLE):
+        return BitmapObstacles(x_max, y_max, cells)
+    return SparseObstacles(x_max, y_max, cells)
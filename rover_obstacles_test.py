@@ -0,0 +1,111 @@
+from rover_grid import Grid
+from rover_obstacles import BitmapObstacles, SparseObstacles, load_obstacles
+from toy_robot import MarsRover
+import os
+import random
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class TestRoverObstacles(unittest.TestCase):
+
+    def setUp(self):
+        self.map_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.map_dir.cleanup()
+
+    def _check_store(self, store_class):
+        obstacles = store_class(4, 3, [(1, 1), (4, 3)])
+        self.assertEqual(len(obstacles), 2)
+        self.assertTrue(obstacles.is_blocked(1, 1))
+        self.assertTrue(obstacles.is_blocked(4, 3))
+        self.assertFalse(obstacles.is_blocked(3, 4))
+        self.assertFalse(obstacles.is_blocked(5, 1)) # Off the map cells are never blocked
+        self.assertFalse(obstacles.is_blocked(-4, 2))
+        version = obstacles.version
+        obstacles.add(1, 1)
+        self.assertEqual(len(obstacles), 2)
+        self.assertEqual(obstacles.version, version)
+        obstacles.discard(1, 1)
+        obstacles.discard(0, 0)
+        self.assertFalse(obstacles.is_blocked(1, 1))
+        self.assertEqual(len(obstacles), 1)
+        self.assertEqual(obstacles.version, version + 1)
+        self.assertRaises(ValueError, obstacles.add, 5, 0)
+
+    def test_sparse_obstacles(self):
+        self._check_store(SparseObstacles)
+
+    def test_bitmap_obstacles(self):
+        self._check_store(BitmapObstacles)
+
+    def test_rover_avoids_obstacles(self):
+        for store_class in [SparseObstacles, BitmapObstacles]:
+            rover = MarsRover(obstacles=store_class(4, 4, [(1, 2), (2, 1)]))
+            self.assertFalse(rover._place_rover(1, 2, "NORTH"))
+            self.assertFalse(rover.placed)
+            self.assertTrue(rover._place_rover(1, 1, "EAST"))
+            self.assertFalse(rover._move_rover())
+            self.assertEqual(rover._report(), "1,1,EAST")
+            rover._turn_rover("LEFT")
+            self.assertFalse(rover._move_rover())
+            rover._turn_rover("LEFT")
+            self.assertTrue(rover._move_rover())
+            self.assertEqual(rover._report(), "0,1,WEST")
+
+    def test_run_batch_with_obstacles_matches_recieve_command(self):
+        commands = ["MOVE", "MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 0,0,NORTH", "PLACE 3,1,WEST", "PLACE 2,2,SOUTH"]
+        generator = random.Random(4)
+        obstacles = SparseObstacles(4, 4, [(generator.randint(0, 4), generator.randint(0, 4)) for _ in range(6)])
+        for _ in range(20):
+            command_list = [generator.choice(commands) for _ in range(100)]
+            rover = MarsRover(obstacles=obstacles)
+            expected = [output for command, output in zip(command_list, map(rover.recieve_command, command_list))
+                        if command == "REPORT"]
+            self.assertEqual(MarsRover(obstacles=obstacles).run_batch(command_list), expected)
+
+    def test_grid_with_obstacles(self):
+        grid = Grid(obstacles=SparseObstacles(4, 4, [(0, 2)]))
+        rover = grid.add_rover(x_pos=0, y_pos=0, placed=True)
+        grid.add_rover(x_pos=1, y_pos=1, placed=True)
+        self.assertEqual(rover.run_batch(["MOVE", "MOVE", "RIGHT", "MOVE", "REPORT"]), ["0,1,EAST"])
+
+    def test_load_obstacles_from_text(self):
+        path = os.path.join(self.map_dir.name, "map.txt")
+        with open(path, "w") as map_file:
+            map_file.write("# Crater\n1,1\n\n2,3\n")
+        obstacles = load_obstacles(path, 4, 4)
+        self.assertIsInstance(obstacles, BitmapObstacles) # A 5 x 5 bitmap is smaller than a set
+        self.assertTrue(obstacles.is_blocked(2, 3))
+        obstacles = load_obstacles(path, 10 ** 6, 10 ** 6)
+        self.assertIsInstance(obstacles, SparseObstacles)
+        self.assertEqual(len(obstacles), 2)
+        self.assertIsInstance(load_obstacles(path, 4, 4, backend="sparse"), SparseObstacles)
+        self.assertRaises(ValueError, load_obstacles, path, 1, 1)
+
+        with open(path, "w") as map_file:
+            map_file.write("1,1\n1 2\n")
+        self.assertRaises(ValueError, load_obstacles, path, 4, 4)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_load_obstacles_from_npy(self):
+        path = os.path.join(self.map_dir.name, "map.npy")
+        blocked = np.zeros((3, 5), dtype=bool)
+        blocked[2, 4] = blocked[0, 1] = True
+        np.save(path, blocked)
+        for backend in ["auto", "sparse", "bitmap"]:
+            obstacles = load_obstacles(path, 4, 2, backend=backend)
+            self.assertEqual(len(obstacles), 2)
+            self.assertTrue(obstacles.is_blocked(4, 2))
+            self.assertTrue(obstacles.is_blocked(1, 0))
+            self.assertFalse(obstacles.is_blocked(0, 1))
+        self.assertRaises(ValueError, load_obstacles, path, 4, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
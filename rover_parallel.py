@@ -0,0 +1,85 @@
+"""Parallel execution of many independent rover scripts.
+
+Each script is run against a fresh MarsRover on its own board. Scripts are shared out
+between a pool of worker processes in chunks, to keep the cost of passing work between
+processes low, and the results come back in the same order as the scripts.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Union
+import os
+
+from rover_logging import configure_logging
+from rover_script import CompiledScript
+from toy_robot import MarsRover
+
+# Number of chunks of scripts to aim for per worker. More chunks balance the work
+# between workers better, at the cost of more round trips between processes.
+CHUNKS_PER_WORKER = 4
+
+
+class RoverScript(NamedTuple):
+    """A script of commands along with the size of the board to run it on.
+
+    Attributes:
+        commands - the commands, or a CompiledScript
+        x_max - the maximum position possible on the x axis
+        y_max - the maximum position possible on the y axis
+    """
+    commands: Union[Sequence[str], CompiledScript]
+    x_max: int = 4
+    y_max: int = 4
+
+
+def run_script(script: Union[RoverScript, Sequence[str], CompiledScript]) -> List[Optional[str]]:
+    """Run a script against a new rover that has not been placed.
+
+    Returns the output of every REPORT in the script, as MarsRover.run_batch does.
+
+    Arguments:
+    script - a RoverScript, or just the commands to run on the default board
+    """
+    if not isinstance(script, RoverScript):
+        script = RoverScript(script)
+    return MarsRover(x_max=script.x_max, y_max=script.y_max).run_batch(script.commands)
+
+
+def _initialise_worker(log_sink: str) -> None:
+    """Choose the log sink for a worker process, replacing any inherited from the parent
+    so that workers don't all truncate and write to the same log file.
+    """
+    configure_logging(log_sink, force=True)
+
+
+def run_scripts_parallel(scripts: Iterable[Union[RoverScript, Sequence[str], CompiledScript]],
+                         workers: Optional[int] = None,
+                         chunksize: Optional[int] = None,
+                         log_sink: Optional[str] = None) -> List[List[Optional[str]]]:
+    """Run many independent scripts across a pool of worker processes.
+
+    Returns a list holding the REPORT outputs of each script, in the same order as
+    scripts.
+
+    Arguments:
+    scripts - the scripts to run. Each is a RoverScript, or just the commands to run on
+              the default board
+    workers - the number of worker processes. The number of CPUs by default. With one
+              worker and no log_sink the scripts are run in this process, and logged as
+              this process's logging is configured
+    chunksize - the number of scripts sent to a worker at a time. By default the scripts
+                are split into about CHUNKS_PER_WORKER chunks per worker
+    log_sink - the log sink used by the worker processes, as for configure_logging.
+               "null" by default. Given a log sink, even a single worker runs in a
+               process of its own, so that this process's log sink is left alone
+    """
+    scripts = list(scripts)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 and log_sink is None:
+        return [run_script(script) for script in scripts]
+    if log_sink is None:
+        log_sink = "null"
+
+    if chunksize is None:
+        chunksize = max(1, len(scripts) // (workers * CHUNKS_PER_WORKER))
+
+    with ProcessPoolExecutor(workers, initializer=_initialise_worker, initargs=(log_sink,)) as pool:
+        return list(pool.map(run_script, scripts, chunksize=chunksize))
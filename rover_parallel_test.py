@@ -0,0 +1,47 @@
+from rover_parallel import RoverScript, run_script, run_scripts_parallel
+from rover_logging import configured_sink
+from rover_script import compile_script
+import os
+import tempfile
+import unittest
+
+class TestRoverParallel(unittest.TestCase):
+
+    def _scripts(self):
+        return [RoverScript(["PLACE 0,0,NORTH"] + ["MOVE"] * i + ["REPORT"], x_max=i % 3, y_max=i % 5)
+                for i in range(40)]
+
+    def test_run_script(self):
+        self.assertEqual(run_script(["PLACE 1,2,EAST", "MOVE", "REPORT"]), ["2,2,EAST"])
+        self.assertEqual(run_script(RoverScript(["PLACE 1,2,EAST", "MOVE", "REPORT"], x_max=1, y_max=2)), ["1,2,EAST"])
+        self.assertEqual(run_script(RoverScript(["PLACE 1,2,EAST", "REPORT"], x_max=1, y_max=1)), [None])
+        self.assertEqual(run_script(compile_script(["PLACE 1,2,EAST", "LEFT", "REPORT"])), ["1,2,NORTH"])
+
+    def test_run_scripts_parallel_keeps_order(self):
+        scripts = self._scripts()
+        expected = [run_script(script) for script in scripts]
+        self.assertEqual(expected[7], ["0,2,NORTH"])
+        self.assertEqual(run_scripts_parallel(scripts, workers=2, chunksize=3), expected)
+        self.assertEqual(run_scripts_parallel(scripts, workers=2), expected)
+        self.assertEqual(run_scripts_parallel(scripts, workers=1), expected)
+
+    def test_run_scripts_parallel_no_scripts(self):
+        self.assertEqual(run_scripts_parallel([], workers=2), [])
+
+    def test_single_worker_honours_log_sink(self):
+        sink = configured_sink()
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                self.assertEqual(run_scripts_parallel(self._scripts()[:3], workers=1, log_sink="file"),
+                                 [["0,0,NORTH"], ["0,1,NORTH"], ["0,2,NORTH"]])
+                with open("MarsRover.log") as log:
+                    self.assertIn("Initialising Mars Rover", log.read())
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(configured_sink(), sink)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""A parser for rover commands held as strings or as bytes.
+
+parse_command tells what a command is, and gives the arguments of a PLACE command, in
+one step. A bare MOVE, LEFT, RIGHT or REPORT, by far the most common commands, is found
+with a single dictionary lookup covering every upper and lower case spelling, as a
+string or as bytes, and gives a shared result tuple, so parsing it allocates nothing and
+skips the upper-casing and splitting MarsRover.recieve_command used to do.
+
+Other commands are upper-cased and split once, at the first space, and a PLACE command's
+arguments are split at commas and looked up or converted straight to the result, with
+no further passes over the command. Commands held as ASCII bytes, such as the lines of
+a command log or a network stream, are parsed as bytes without being decoded, since
+ASCII bytes upper-case, split and convert with int() just as strings do.
+
+parse_command accepts exactly the commands MarsRover.recieve_command has always followed
+and rejects the rest.
+"""
+from itertools import product
+from typing import Optional, Tuple, Union
+
+# The kinds of command parse_command gives. COMMAND_INVALID covers every command that
+# MarsRover.recieve_command does not follow: unrecognised commands, turns with arguments,
+# and PLACE commands it can't parse or which face an unrecognised direction.
+COMMAND_INVALID = 0
+COMMAND_PLACE = 1
+COMMAND_MOVE = 2
+COMMAND_LEFT = 3
+COMMAND_RIGHT = 4
+COMMAND_REPORT = 5
+
+# The name of each kind of command, indexed by kind.
+COMMAND_NAMES = (None, "PLACE", "MOVE", "LEFT", "RIGHT", "REPORT")
+
+# The Direction value of each direction, as in toy_robot.
+_DIRECTIONS = (("NORTH", 1), ("EAST", 2), ("SOUTH", 3), ("WEST", 4))
+
+# A parsed command: (kind, x, y, facing). x, y and facing (a Direction value) are 0 for
+# everything but PLACE.
+ParsedCommand = Tuple[int, int, int, int]
+
+_INVALID = (COMMAND_INVALID, 0, 0, 0)
+_MOVE = (COMMAND_MOVE, 0, 0, 0)
+_LEFT = (COMMAND_LEFT, 0, 0, 0)
+_RIGHT = (COMMAND_RIGHT, 0, 0, 0)
+_REPORT = (COMMAND_REPORT, 0, 0, 0)
+
+
+def _spellings(word: str) -> Tuple[bytes, ...]:
+    """Return every upper and lower case spelling of word, as bytes."""
+    return tuple("".join(spelling).encode() for spelling in product(*[(c.lower(), c) for c in word]))
+
+
+# Every spelling of the commands without arguments, as strings and as bytes.
+_BARE = {}
+for _word, _parsed in [("MOVE", _MOVE), ("LEFT", _LEFT), ("RIGHT", _RIGHT), ("REPORT", _REPORT)]:
+    for _spelling in _spellings(_word):
+        _BARE[_spelling] = _BARE[_spelling.decode()] = _parsed
+del _word, _parsed, _spelling
+
+_TEXT_SEPARATORS = (" ", ",", "PLACE")
+_BYTE_SEPARATORS = (b" ", b",", b"PLACE")
+_TEXT_DIRECTIONS = dict(_DIRECTIONS)
+_BYTE_DIRECTIONS = {name.encode(): value for name, value in _DIRECTIONS}
+
+
+def split_place_command(command: str) -> Tuple[Optional[Tuple[int, int, str]], Optional[str]]:
+    """Split a PLACE command of the form 'PLACE X,Y,F' into its arguments.
+
+    Returns a tuple (arguments, error). For a valid command arguments is the tuple
+    (int(X), int(Y), F) and error is None. Otherwise arguments is None and error
+    describes why the command could not be parsed. The direction F is not validated.
+
+    Arguments:
+    command - the PLACE command to split
+    """
+    split_command = command.split(" ")
+    if len(split_command) < 2:
+        return None, "PLACE command does not contain coordinates"
+    elif len(split_command) > 2:
+        return None, "PLACE command includes unrecognised arguments"
+
+    if split_command[0] != "PLACE":
+        return None, "Invalid command for PLACE operation"
+
+    arguments = split_command[1].split(",")
+    if len(arguments) != 3:
+        return None, "PLACE command includes invlaid arguments"
+
+    try:
+        return (int(arguments[0]), int(arguments[1]), arguments[2]), None
+    except ValueError:
+        return None, "PLACE command includes non integer coordinates"
+
+
+def _parse_upper(command, separators, directions) -> ParsedCommand:
+    """Parse an upper case command, held as a string or as bytes.
+
+    Arguments:
+    command - the command
+    separators - the space, comma and PLACE verb of the same type as command
+    directions - mapping from direction names of the same type as command to Direction
+                 values
+    """
+    space, comma, place = separators
+    verb, separator, arguments = command.partition(space)
+    parsed = _BARE.get(verb)
+    if parsed is not None:
+        # Moves and reports ignore anything after the verb, but turns can't have any.
+        if separator and (parsed is _LEFT or parsed is _RIGHT):
+            return _INVALID
+        return parsed
+
+    # A PLACE command holds exactly one space, followed by three arguments.
+    if verb != place or not separator or space in arguments:
+        return _INVALID
+    arguments = arguments.split(comma)
+    if len(arguments) != 3:
+        return _INVALID
+    facing = directions.get(arguments[2])
+    if facing is None:
+        return _INVALID
+    try:
+        return (COMMAND_PLACE, int(arguments[0]), int(arguments[1]), facing)
+    except ValueError:
+        return _INVALID
+
+
+def parse_command(command: Union[str, bytes, bytearray, memoryview]) -> ParsedCommand:
+    """Parse a rover command.
+
+    Returns a tuple (kind, x, y, facing), where kind is one of the COMMAND_ constants.
+    x, y and facing (as a Direction value) are the arguments of a PLACE command, and 0
+    for every other command.
+
+    Arguments:
+    command - the command, as a string or as bytes without a line ending. Bytes that
+              aren't ASCII are decoded as UTF-8, replacing anything invalid. A
+              bytearray or memoryview is copied to bytes first
+    """
+    parsed = _BARE.get(command) if type(command) is str or type(command) is bytes else None
+    if parsed is not None:
+        return parsed
+
+    if isinstance(command, str):
+        return _parse_upper(command.upper(), _TEXT_SEPARATORS, _TEXT_DIRECTIONS)
+
+    data = command if type(command) is bytes else bytes(command)
+    if data.isascii():
+        return _parse_upper(data.upper(), _BYTE_SEPARATORS, _BYTE_DIRECTIONS)
+    # Upper-casing can turn characters outside ASCII into ASCII letters, so decode and
+    # upper-case them as a string.
+    return _parse_upper(data.decode("utf-8", "replace").upper(), _TEXT_SEPARATORS, _TEXT_DIRECTIONS)
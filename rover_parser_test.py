@@ -0,0 +1,112 @@
+from rover_parser import (COMMAND_INVALID, COMMAND_LEFT, COMMAND_MOVE, COMMAND_PLACE, COMMAND_REPORT,
+                          COMMAND_RIGHT, parse_command, split_place_command)
+from toy_robot import DIRECTION_VALUES, MarsRover
+import random
+import unittest
+
+# Pieces fuzzed commands are built from: verbs in various cases, separators, signs,
+# whitespace int() skips, digits, directions and non-ASCII characters whose upper case
+# forms are ASCII.
+PIECES = ["PLACE", "place", "PlAcE", "MOVE", "move", "LEFT", "left", "RIGHT", "Right", "REPORT", "report",
+          " ", " ", ",", ",", "-", "+", "_", "0", "1", "7", "42", "12345678901234567890", "\t", "\x0b", "\r",
+          "\x1c", "NORTH", "north", "EaSt", "SOUTH", "west", "WESTERLY", "ı", "ſ", "٣", "é", "ﬁ", "x", "\x00"]
+
+
+def reference_parse(command: str):
+    """Parse a command with the rules recieve_command used before rover_parser."""
+    command = command.upper()
+    match command.split(" ")[0]:
+        case "PLACE":
+            arguments, _ = split_place_command(command)
+            if arguments is None or arguments[2] not in DIRECTION_VALUES:
+                return (COMMAND_INVALID, 0, 0, 0)
+            return (COMMAND_PLACE, arguments[0], arguments[1], DIRECTION_VALUES[arguments[2]])
+        case "MOVE":
+            return (COMMAND_MOVE, 0, 0, 0)
+        case "LEFT" | "RIGHT":
+            kinds = {"LEFT": COMMAND_LEFT, "RIGHT": COMMAND_RIGHT}
+            return (kinds.get(command, COMMAND_INVALID), 0, 0, 0)
+        case "REPORT":
+            return (COMMAND_REPORT, 0, 0, 0)
+        case _:
+            return (COMMAND_INVALID, 0, 0, 0)
+
+
+def fuzz_corpus(seed: int, count: int):
+    generator = random.Random(seed)
+    for _ in range(count):
+        if generator.random() < 0.5:
+            # Mostly well formed PLACE commands with a piece or two swapped in.
+            parts = [generator.choice(["PLACE", "place"]), " ", str(generator.randint(-20, 20)), ",",
+                     str(generator.randint(-20, 20)), ",", generator.choice(["NORTH", "east", "South", "WEST"])]
+            for _ in range(generator.randint(0, 2)):
+                parts.insert(generator.randint(0, len(parts)), generator.choice(PIECES))
+        else:
+            parts = [generator.choice(PIECES) for _ in range(generator.randint(0, 6))]
+        yield "".join(parts)
+
+
+class TestParser(unittest.TestCase):
+
+    def test_commands(self):
+        self.assertEqual(parse_command("MOVE"), (COMMAND_MOVE, 0, 0, 0))
+        self.assertEqual(parse_command(b"move now"), (COMMAND_MOVE, 0, 0, 0))
+        self.assertEqual(parse_command(b"Left"), (COMMAND_LEFT, 0, 0, 0))
+        self.assertEqual(parse_command(bytearray(b"RIGHT")), (COMMAND_RIGHT, 0, 0, 0))
+        self.assertEqual(parse_command(b"RIGHT NOW")[0], COMMAND_INVALID)
+        self.assertEqual(parse_command(memoryview(b"report 1")), (COMMAND_REPORT, 0, 0, 0))
+        self.assertEqual(parse_command("PLACE 1,2,NORTH"), (COMMAND_PLACE, 1, 2, 1))
+        self.assertEqual(parse_command(b"place -3,40,west"), (COMMAND_PLACE, -3, 40, 4))
+        self.assertEqual(parse_command(b"PLACE +1,\t2_0,EAST"), (COMMAND_PLACE, 1, 20, 2))
+        self.assertEqual(parse_command("PLACE {0},-{0},SOUTH".format(10 ** 30)), (COMMAND_PLACE, 10 ** 30, -10 ** 30, 3))
+        for command in ["", "JUMP", "PLACE", "PLACE ", "PLACE 1,2", "PLACE 1,2,NORTH,", "PLACE 1, 2,NORTH",
+                        "PLACE 1,2,NORTHWEST", "PLACE 1,2,NORTH ", "PLACE a,2,NORTH", "PLACE 1__0,2,NORTH",
+                        "PLACE -,2,NORTH", "MOVES", " MOVE", "LEFT "]:
+            self.assertEqual(parse_command(command), (COMMAND_INVALID, 0, 0, 0), command)
+
+    def test_non_ascii(self):
+        # Upper-casing these gives ASCII, which the original parser then accepted.
+        self.assertEqual(parse_command("rıght"), (COMMAND_RIGHT, 0, 0, 0))
+        self.assertEqual(parse_command("place ٣,1,ſouth".encode()), (COMMAND_PLACE, 3, 1, 3))
+        self.assertEqual(parse_command(b"MOVE \xff"), (COMMAND_MOVE, 0, 0, 0))
+
+    def test_fuzz_matches_original_parser(self):
+        for command in fuzz_corpus(22, 20000):
+            expected = reference_parse(command)
+            data = command.encode("utf-8")
+            self.assertEqual(parse_command(command), expected, repr(command))
+            self.assertEqual(parse_command(data), expected, repr(command))
+            self.assertEqual(parse_command(bytearray(data)), expected, repr(command))
+            self.assertEqual(parse_command(memoryview(data)), expected, repr(command))
+
+    def test_fuzz_bytes(self):
+        generator = random.Random(23)
+        for _ in range(5000):
+            data = bytes(generator.choice(b"PLACEmoveRIGHTreport ,-+_09\t\x80\xff\xc3\xa9") for _ in range(generator.randint(0, 12)))
+            self.assertEqual(parse_command(data), reference_parse(data.decode("utf-8", "replace")), repr(data))
+
+    def test_fuzz_rover(self):
+        # A rover driven one command at a time, and one running the compiled script,
+        # end up in the same state as the original parser would leave them.
+        commands = list(fuzz_corpus(24, 5000))
+        rover = MarsRover(x_max=20, y_max=20)
+        reports = [rover.recieve_command(command) for command in commands]
+        batch = MarsRover(x_max=20, y_max=20)
+        self.assertEqual(batch.run_batch(commands), [report for command, report in zip(commands, reports)
+                                                     if reference_parse(command)[0] == COMMAND_REPORT])
+        self.assertEqual(batch._report(), rover._report())
+
+        expected = MarsRover(x_max=20, y_max=20)
+        for command in commands:
+            kind, x_pos, y_pos, facing = reference_parse(command)
+            if kind == COMMAND_PLACE and 0 <= x_pos <= 20 and 0 <= y_pos <= 20:
+                expected.x_pos, expected.y_pos, expected.facing, expected.placed = x_pos, y_pos, facing, True
+            elif kind == COMMAND_MOVE and expected.placed:
+                expected._move_rover()
+            elif kind in (COMMAND_LEFT, COMMAND_RIGHT) and expected.placed:
+                expected._turn_rover("LEFT" if kind == COMMAND_LEFT else "RIGHT")
+        self.assertEqual(rover._report(), expected._report())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,335 @@
+"""Plan the commands that drive a Mars Rover to a target cell.
+
+The planner finds the cheapest sequence of MOVE, LEFT and RIGHT commands that takes a
+rover from a start state to a goal, where each move costs 1 and each turn costs
+turn_cost. On a board with no obstacles the cheapest plan is a straight run along one
+axis and then the other, so it is worked out directly in constant time however large
+the board. Otherwise the plan is found with an A* search over (x, y, facing), using the
+cost of the plan on an empty board as the heuristic, which keeps the search close to
+the direct route when one exists.
+
+The worst case is a goal that can't be reached: the search then has to rule out every
+state it can reach, which takes time in proportion to the area of the board. A start
+or goal walled in by its neighbours is spotted up front. Otherwise the search may
+expand every state on the board, four for each cell, up to MAX_EXPANSIONS, or as many
+as the caller allows, and raises SearchLimitError if it gives up before settling
+whether the goal can be reached.
+
+Plans are cached by start, goal, board and obstacle map version, so the map can be
+changed between plans without returning stale results.
+"""
+from array import array
+from functools import lru_cache
+from itertools import count
+from typing import List, Optional, Tuple, Union
+import heapq
+
+from rover_script import LEFT_TURN, OP_MOVE, OP_TURN, RIGHT_TURN, CompiledScript
+from toy_robot import DIRECTION_STEPS, DIRECTION_VALUES, LEFT_TURNS, RIGHT_TURNS, Direction
+
+# The number of plans kept in the cache.
+PLAN_CACHE_SIZE = 1024
+
+# The most states the search may expand before giving up on a goal, by default. A
+# search on a board with fewer states than this is never given up. This is several
+# seconds of searching.
+MAX_EXPANSIONS = 1000000
+
+# The number of turn commands needed to make a net turn of 0, 1, 2 or 3 quarter turns
+# to the right.
+_TURN_COMMANDS = (0, 1, 2, 1)
+
+# The heading needed to move along each axis in the positive and negative direction.
+_EAST, _WEST, _NORTH, _SOUTH = (Direction.EAST.value, Direction.WEST.value,
+                                Direction.NORTH.value, Direction.SOUTH.value)
+
+Facing = Union[Direction, str, int]
+
+# A plan as runs of (command, count).
+Runs = Tuple[Tuple[str, int], ...]
+
+
+class SearchLimitError(RuntimeError):
+    """Raised when the search around obstacles gives up before finding a plan or
+    showing that there is none.
+    """
+
+
+def _facing_value(facing: Facing) -> int:
+    """Return the Direction value of facing, given as a Direction, its name or its value."""
+    if isinstance(facing, Direction):
+        return facing.value
+    if isinstance(facing, str) and facing.upper() in DIRECTION_VALUES:
+        return DIRECTION_VALUES[facing.upper()]
+    if isinstance(facing, int) and 1 <= facing <= 4:
+        return facing
+    raise ValueError("Invalid direction {}".format(facing))
+
+
+def _turn_runs(facing: int, heading: int) -> Runs:
+    """Return the turn commands that take a rover from facing to heading."""
+    quarter_turns = (heading - facing) % 4
+    if quarter_turns == 3:
+        return (("LEFT", 1),)
+    return (("RIGHT", quarter_turns),) if quarter_turns else ()
+
+
+def _direct_legs(x_pos: int, y_pos: int, facing: int,
+                 x_goal: int, y_goal: int, goal_facing: Optional[int]) -> Tuple[int, List[Tuple[int, int]]]:
+    """Find the cheapest way to reach the goal on an empty board.
+
+    Returns a tuple (turns, legs), where legs lists the (heading, distance) of each
+    straight run and turns is the number of turn commands needed.
+    """
+    legs = []
+    if x_goal != x_pos:
+        legs.append((_EAST if x_goal > x_pos else _WEST, abs(x_goal - x_pos)))
+    if y_goal != y_pos:
+        legs.append((_NORTH if y_goal > y_pos else _SOUTH, abs(y_goal - y_pos)))
+
+    best = None
+    for order in (legs, legs[::-1]):
+        turns = 0
+        current = facing
+        for heading, _ in order:
+            turns += _TURN_COMMANDS[(heading - current) % 4]
+            current = heading
+        if goal_facing is not None:
+            turns += _TURN_COMMANDS[(goal_facing - current) % 4]
+        if best is None or turns < best[0]:
+            best = (turns, order)
+    return best
+
+
+def _direct_runs(x_pos: int, y_pos: int, facing: int,
+                 x_goal: int, y_goal: int, goal_facing: Optional[int]) -> Runs:
+    """Return the cheapest plan on an empty board."""
+    runs = []
+    for heading, distance in _direct_legs(x_pos, y_pos, facing, x_goal, y_goal, goal_facing)[1]:
+        runs.extend(_turn_runs(facing, heading))
+        runs.append(("MOVE", distance))
+        facing = heading
+    if goal_facing is not None:
+        runs.extend(_turn_runs(facing, goal_facing))
+    return tuple(runs)
+
+
+def _walled_in(x_pos: int, y_pos: int, x_max: int, y_max: int, is_blocked) -> bool:
+    """Return True if every cell next to a cell is blocked or off the board."""
+    for step_x, step_y in DIRECTION_STEPS[1:]:
+        next_x = x_pos + step_x
+        next_y = y_pos + step_y
+        if 0 <= next_x <= x_max and 0 <= next_y <= y_max and not is_blocked(next_x, next_y):
+            return False
+    return True
+
+
+def _search(x_pos: int, y_pos: int, facing: int,
+            x_goal: int, y_goal: int, goal_facing: Optional[int],
+            x_max: int, y_max: int, is_blocked, turn_cost: int, max_expansions: int) -> Optional[Runs]:
+    """A* search for the cheapest plan around obstacles.
+
+    The cost of the direct plan on an empty board never overestimates the cost around
+    obstacles, and is consistent, so the first time the goal is taken from the heap
+    the plan to it is the cheapest. When the goal can be reached, the time taken depends
+    on the size of the detours the obstacles force, not on the size of the board. When
+    it can't, every reachable state would have to be expanded, so the search stops
+    after max_expansions of them.
+
+    Returns the plan, or None if the goal can't be reached. Raises SearchLimitError if
+    the search gave up.
+    """
+    if (x_pos, y_pos) != (x_goal, y_goal) and (_walled_in(x_pos, y_pos, x_max, y_max, is_blocked)
+                                               or _walled_in(x_goal, y_goal, x_max, y_max, is_blocked)):
+        return None
+
+    # The turn part of the heuristic only depends on which side of the goal the rover
+    # is on along each axis and the way it is facing, so it is tabulated up front,
+    # indexed by [(sign of x_goal - x) + 1][(sign of y_goal - y) + 1][facing].
+    turn_costs = [[[0] + [turn_cost * _direct_legs(0, 0, f, x_side, y_side, goal_facing)[0] for f in range(1, 5)]
+                   for y_side in (-1, 0, 1)]
+                  for x_side in (-1, 0, 1)]
+
+    def heuristic(x, y, f):
+        x_gap = x_goal - x
+        y_gap = y_goal - y
+        return (abs(x_gap) + abs(y_gap)
+                + turn_costs[(x_gap > 0) - (x_gap < 0) + 1][(y_gap > 0) - (y_gap < 0) + 1][f])
+
+    start = (x_pos, y_pos, facing)
+    costs = {start: 0}
+    parents = {start: None}
+    tie_breaker = count()
+    estimate = heuristic(*start)
+    # Entries are (estimated total cost, estimated remaining cost, order, cost, state).
+    # Preferring the smallest remaining cost on ties heads straight for the goal.
+    heap = [(estimate, estimate, next(tie_breaker), 0, start)]
+    push = heapq.heappush
+    pop = heapq.heappop
+
+    expansions = 0
+    while heap:
+        _, _, _, cost, state = pop(heap)
+        if cost > costs[state]:
+            continue
+        expansions += 1
+        if expansions > max_expansions:
+            raise SearchLimitError("Search gave up after {} states".format(max_expansions))
+
+        x, y, f = state
+        if x == x_goal and y == y_goal and (goal_facing is None or f == goal_facing):
+            commands = []
+            while parents[state] is not None:
+                state, command = parents[state]
+                commands.append(command)
+            commands.reverse()
+            return _to_runs(commands)
+
+        step_x, step_y = DIRECTION_STEPS[f]
+        next_x = x + step_x
+        next_y = y + step_y
+        moves = [(x, y, LEFT_TURNS[f], turn_cost, "LEFT"), (x, y, RIGHT_TURNS[f], turn_cost, "RIGHT")]
+        if 0 <= next_x <= x_max and 0 <= next_y <= y_max and not is_blocked(next_x, next_y):
+            moves.append((next_x, next_y, f, 1, "MOVE"))
+
+        for next_x, next_y, next_facing, step_cost, command in moves:
+            next_state = (next_x, next_y, next_facing)
+            next_cost = cost + step_cost
+            if next_cost < costs.get(next_state, next_cost + 1):
+                costs[next_state] = next_cost
+                parents[next_state] = (state, command)
+                remaining = heuristic(next_x, next_y, next_facing)
+                push(heap, (next_cost + remaining, remaining, next(tie_breaker), next_cost, next_state))
+    return None
+
+
+class _PlanCommands(object):
+    """The commands of a plan, produced from its runs each time they are iterated over,
+    so that a plan script keeps its commands without holding one for every move.
+    """
+
+    __slots__ = ('runs',)
+
+    def __init__(self, runs: Runs):
+        self.runs = runs
+
+    def __iter__(self):
+        for command, repeats in self.runs:
+            for _ in range(repeats):
+                yield command
+
+
+def _to_runs(commands: List[str]) -> Runs:
+    """Fold a list of commands into runs of (command, count)."""
+    runs = []
+    for command in commands:
+        if runs and runs[-1][0] == command:
+            runs[-1][1] += 1
+        else:
+            runs.append([command, 1])
+    return tuple((command, repeats) for command, repeats in runs)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _cached_plan(start: Tuple[int, int, int], goal: Tuple[int, int, Optional[int]],
+                 x_max: int, y_max: int, obstacles, version: int, turn_cost: int,
+                 max_expansions: int) -> Optional[Runs]:
+    """Plan from start to goal. The obstacle map version is part of the cache key, so a
+    plan is made afresh once the map changes. A search that gives up raises, so is
+    never cached.
+    """
+    if obstacles is None or not len(obstacles):
+        return _direct_runs(*start, *goal)
+    return _search(*start, *goal, x_max, y_max, obstacles.is_blocked, turn_cost, max_expansions)
+
+
+def _plan_runs(start: Tuple[int, int, Facing], goal: tuple,
+               x_max: int, y_max: int, obstacles, turn_cost: int,
+               max_expansions: Optional[int]) -> Optional[Runs]:
+    """Check the start and goal, then return the cached plan between them."""
+    if turn_cost < 0:
+        raise ValueError("Turn cost must not be negative")
+    if max_expansions is None:
+        max_expansions = min(4 * (x_max + 1) * (y_max + 1), MAX_EXPANSIONS)
+
+    x_pos, y_pos, facing = start
+    if not (0 <= x_pos <= x_max and 0 <= y_pos <= y_max):
+        raise ValueError("Start ({},{}) is out of bounds".format(x_pos, y_pos))
+    if obstacles is not None and obstacles.is_blocked(x_pos, y_pos):
+        raise ValueError("Start ({},{}) is blocked".format(x_pos, y_pos))
+
+    x_goal, y_goal = goal[0], goal[1]
+    goal_facing = _facing_value(goal[2]) if len(goal) > 2 and goal[2] is not None else None
+    if not (0 <= x_goal <= x_max and 0 <= y_goal <= y_max):
+        return None
+    if obstacles is not None and obstacles.is_blocked(x_goal, y_goal):
+        return None
+
+    version = obstacles.version if obstacles is not None else 0
+    return _cached_plan((x_pos, y_pos, _facing_value(facing)), (x_goal, y_goal, goal_facing),
+                        x_max, y_max, obstacles, version, turn_cost, max_expansions)
+
+
+def plan_path(start: Tuple[int, int, Facing],
+              goal: tuple,
+              x_max: int = 4,
+              y_max: int = 4,
+              obstacles=None,
+              turn_cost: int = 1,
+              max_expansions: Optional[int] = None) -> Optional[List[str]]:
+    """Plan the cheapest commands that drive a rover from start to goal.
+
+    Returns the list of MOVE, LEFT and RIGHT commands to pass to recieve_command, which
+    is empty if the rover is already at the goal, or None if the goal is off the board
+    or can't be reached around the obstacles. Raises SearchLimitError if the search
+    around the obstacles gives up after max_expansions states.
+
+    Arguments:
+    start - the (x, y, facing) of the rover, where facing is a Direction, its name or its value
+    goal - the (x, y) cell to reach, or (x, y, facing) to also end up facing a given way
+    x_max - the maximum position on the x axis of the board
+    y_max - the maximum position on the y axis of the board
+    obstacles - the obstacle map for the board (see rover_obstacles), or None
+    turn_cost - the cost of a turn, where a move costs 1
+    max_expansions - the number of states the search around obstacles may expand
+                     before giving up, or None for every state on the board up to
+                     MAX_EXPANSIONS
+    """
+    runs = _plan_runs(start, goal, x_max, y_max, obstacles, turn_cost, max_expansions)
+    if runs is None:
+        return None
+    return [command for command, repeats in runs for _ in range(repeats)]
+
+
+def plan_script(start: Tuple[int, int, Facing],
+                goal: tuple,
+                x_max: int = 4,
+                y_max: int = 4,
+                obstacles=None,
+                turn_cost: int = 1,
+                max_expansions: Optional[int] = None) -> Optional[CompiledScript]:
+    """Plan the cheapest commands that drive a rover from start to goal, as a compiled
+    script. Long runs of moves are held as a single opcode, so unlike plan_path this
+    takes the same time and memory however far the goal is on a board with no obstacles.
+
+    Returns the script, or None if the goal can't be reached. Raises SearchLimitError
+    as plan_path does.
+
+    Arguments are as for plan_path.
+    """
+    runs = _plan_runs(start, goal, x_max, y_max, obstacles, turn_cost, max_expansions)
+    if runs is None:
+        return None
+
+    ops = array('q')
+    for command, repeats in runs:
+        if command == "MOVE":
+            ops.extend((OP_MOVE, repeats))
+        else:
+            ops.extend((OP_TURN, (repeats * (LEFT_TURN if command == "LEFT" else RIGHT_TURN)) % 4))
+    return CompiledScript(ops, sum(repeats for _, repeats in runs), _PlanCommands(runs))
+
+
+def clear_plan_cache() -> None:
+    """Empty the plan cache, releasing the obstacle maps it refers to."""
+    _cached_plan.cache_clear()
@@ -0,0 +1,157 @@
+from rover_obstacles import BitmapObstacles, SparseObstacles
+from rover_planner import (MAX_EXPANSIONS, SearchLimitError, _cached_plan, _direct_runs, _search, clear_plan_cache,
+                           plan_path, plan_script)
+from rover_script import run_compiled
+from toy_robot import DIRECTION_STEPS, DIRECTION_VALUES, LEFT_TURNS, RIGHT_TURNS, Direction, MarsRover
+import heapq
+import itertools
+import random
+import unittest
+
+def plan_cost(runs, turn_cost=1):
+    return sum(repeats * (1 if command == "MOVE" else turn_cost) for command, repeats in runs)
+
+def cheapest_cost(start, goal, x_max, y_max, obstacles, turn_cost):
+    """Find the cost of the cheapest plan by Dijkstra's algorithm, with no heuristic."""
+    goal_facing = DIRECTION_VALUES[goal[2]] if goal[2] is not None else None
+    costs = {start: 0}
+    heap = [(0, start)]
+    while heap:
+        cost, (x_pos, y_pos, facing) = heapq.heappop(heap)
+        if (x_pos, y_pos) == goal[:2] and goal_facing in (None, facing):
+            return cost
+        step_x, step_y = DIRECTION_STEPS[facing]
+        moves = [(cost + turn_cost, (x_pos, y_pos, LEFT_TURNS[facing])),
+                 (cost + turn_cost, (x_pos, y_pos, RIGHT_TURNS[facing]))]
+        if 0 <= x_pos + step_x <= x_max and 0 <= y_pos + step_y <= y_max \
+                and not obstacles.is_blocked(x_pos + step_x, y_pos + step_y):
+            moves.append((cost + 1, (x_pos + step_x, y_pos + step_y, facing)))
+        for next_cost, state in moves:
+            if next_cost < costs.get(state, next_cost + 1):
+                costs[state] = next_cost
+                heapq.heappush(heap, (next_cost, state))
+    return None
+
+class TestRoverPlanner(unittest.TestCase):
+
+    def setUp(self):
+        clear_plan_cache()
+
+    def _drive(self, start, plan, x_max=4, y_max=4, obstacles=None):
+        rover = MarsRover(start[0], start[1], x_max, y_max, start[2], True, obstacles)
+        for command in plan:
+            rover.recieve_command(command)
+        return rover.recieve_command("REPORT")
+
+    def test_plan_on_empty_board(self):
+        plan = plan_path((0, 0, "NORTH"), (3, 2))
+        self.assertEqual(plan, ["MOVE", "MOVE", "RIGHT", "MOVE", "MOVE", "MOVE"])
+        self.assertEqual(self._drive((0, 0, "NORTH"), plan), "3,2,EAST")
+        self.assertEqual(plan_path((0, 0, Direction.SOUTH), (0, 2)), ["RIGHT", "RIGHT", "MOVE", "MOVE"])
+        self.assertEqual(plan_path((1, 1, 2), (1, 1, "WEST")), ["RIGHT", "RIGHT"])
+        self.assertEqual(plan_path((1, 1, "EAST"), (1, 1)), [])
+
+    def test_unreachable_goals(self):
+        self.assertIsNone(plan_path((0, 0, "NORTH"), (5, 0)))
+        walled = SparseObstacles(4, 4, [(1, 0), (1, 1), (0, 1)])
+        self.assertIsNone(plan_path((0, 0, "NORTH"), (4, 4), obstacles=walled))
+        self.assertIsNone(plan_path((2, 2, "NORTH"), (1, 1), obstacles=walled))
+
+    def test_unreachable_goal_on_large_board(self):
+        size = 700
+        walled_in = SparseObstacles(size, size, [(350, 349), (350, 351), (349, 350), (351, 350)])
+        self.assertIsNone(plan_path((0, 0, "NORTH"), (350, 350), size, size, walled_in))
+
+        # The goal's neighbours are open, but a ring around them is not.
+        ringed = SparseObstacles(size, size, [(x_pos, y_pos) for x_pos in range(348, 353) for y_pos in range(348, 353)
+                                              if max(abs(x_pos - 350), abs(y_pos - 350)) == 2])
+        self.assertRaises(SearchLimitError, plan_path, (0, 0, "NORTH"), (350, 350), size, size, ringed,
+                          max_expansions=1000)
+        self.assertIsNotNone(plan_path((347, 350, "NORTH"), (346, 350), size, size, ringed, max_expansions=1000))
+
+    def test_search_limit_is_not_cached(self):
+        # A wall across the board at x = 150 with a gap at the top
+        wall = SparseObstacles(300, 300, [(150, y_pos) for y_pos in range(300)])
+        self.assertRaises(SearchLimitError, plan_script, (0, 0, "NORTH"), (300, 0), 300, 300, wall,
+                          max_expansions=1000)
+        plan = plan_path((0, 0, "NORTH"), (300, 0), 300, 300, wall)
+        self.assertEqual(self._drive((0, 0, "NORTH"), plan, 300, 300, wall), "300,0,SOUTH")
+
+    def test_invalid_start(self):
+        with self.assertRaises(ValueError):
+            plan_path((5, 0, "NORTH"), (0, 0))
+        with self.assertRaises(ValueError):
+            plan_path((0, 0, "UP"), (0, 0))
+        with self.assertRaises(ValueError):
+            plan_path((1, 1, "NORTH"), (0, 0), obstacles=SparseObstacles(4, 4, [(1, 1)]))
+
+    def test_direct_plans_are_optimal(self):
+        # The search on an empty map finds the true cheapest plans to check the direct
+        # plans against.
+        empty = SparseObstacles(3, 2)
+        facings = [1, 2, 3, 4]
+        for turn_cost in [1, 3]:
+            for x_pos, y_pos, facing, x_goal, y_goal in itertools.product(range(4), range(3), facings, range(4), range(3)):
+                for goal_facing in [None] + facings:
+                    direct = _direct_runs(x_pos, y_pos, facing, x_goal, y_goal, goal_facing)
+                    searched = _search(x_pos, y_pos, facing, x_goal, y_goal, goal_facing,
+                                       3, 2, empty.is_blocked, turn_cost, MAX_EXPANSIONS)
+                    self.assertEqual(plan_cost(direct, turn_cost), plan_cost(searched, turn_cost))
+
+    def test_plan_around_obstacles(self):
+        # A wall along x = 2 with a gap at the top
+        for store in [SparseObstacles, BitmapObstacles]:
+            obstacles = store(4, 4, [(2, 0), (2, 1), (2, 2), (2, 3)])
+            plan = plan_path((0, 0, "EAST"), (4, 0), obstacles=obstacles)
+            self.assertEqual(self._drive((0, 0, "EAST"), plan, obstacles=obstacles), "4,0,SOUTH")
+            self.assertEqual(len(plan), 15)
+
+    def test_plans_are_cheapest_around_random_obstacles(self):
+        generator = random.Random(2)
+        for _ in range(30):
+            obstacles = SparseObstacles(5, 5, [(generator.randint(0, 5), generator.randint(0, 5)) for _ in range(10)])
+            obstacles.discard(0, 0)
+            goal = (generator.randint(0, 5), generator.randint(0, 5), generator.choice([None, "NORTH", "WEST"]))
+            for turn_cost in [0, 1, 10]:
+                expected = cheapest_cost((0, 0, 1), goal, 5, 5, obstacles, turn_cost)
+                plan = plan_path((0, 0, "NORTH"), goal, 5, 5, obstacles, turn_cost)
+                if expected is None:
+                    self.assertIsNone(plan)
+                    continue
+                self.assertEqual(sum(1 if command == "MOVE" else turn_cost for command in plan), expected)
+                report = self._drive((0, 0, "NORTH"), plan, 5, 5, obstacles).split(",")
+                self.assertEqual((int(report[0]), int(report[1])), goal[:2])
+                if goal[2] is not None:
+                    self.assertEqual(report[2], goal[2])
+
+    def test_cache_follows_map_version(self):
+        obstacles = SparseObstacles(4, 4, [(4, 4)])
+        first = plan_path((0, 0, "NORTH"), (0, 4), obstacles=obstacles)
+        self.assertEqual(first, ["MOVE"] * 4)
+        plan_path((0, 0, "NORTH"), (0, 4), obstacles=obstacles)
+        self.assertEqual(_cached_plan.cache_info().hits, 1)
+
+        obstacles.add(0, 2)
+        replanned = plan_path((0, 0, "NORTH"), (0, 4), obstacles=obstacles)
+        self.assertNotEqual(replanned, first)
+        self.assertEqual(self._drive((0, 0, "NORTH"), replanned, obstacles=obstacles)[:3], "0,4")
+
+    def test_plan_script_on_huge_board(self):
+        size = 10 ** 9
+        script = plan_script((0, 0, "NORTH"), (size, size // 2, "WEST"), size, size)
+        self.assertEqual(len(script), size + size // 2 + 3)
+        rover = MarsRover(0, 0, size, size, "NORTH", True)
+        run_compiled(rover, script)
+        self.assertEqual(rover.recieve_command("REPORT"), "{},{},WEST".format(size, size // 2))
+
+    def test_search_on_large_board(self):
+        size = 10 ** 6
+        obstacles = SparseObstacles(size, size, [(50, y_pos) for y_pos in range(100)])
+        script = plan_script((0, 0, "EAST"), (100, 0), size, size, obstacles)
+        rover = MarsRover(0, 0, size, size, "EAST", True, obstacles)
+        rover.run_batch(script)
+        self.assertEqual((rover.x_pos, rover.y_pos), (100, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""Replay of rover command logs from disk.
+
+The log is memory-mapped rather than read into memory, and scanned a chunk at a time
+for newline separated commands, which are compiled straight from the bytes and run
+against a MarsRover (or, for a rover that follows each command, such as a
+JournaledRover, run one at a time; see rover_script.run_lines). The map means only the
+chunk being replayed has to be held in memory, however large the log. It is not zero
+copy: each chunk is copied out of the map and split into a bytes object per line, since
+the parser looks commands up by their bytes. No line is decoded into a string though.
+
+A replay can be limited to a range of byte offsets so that several workers can share
+one log file between them, and long replays can record checkpoints (see rover_snapshot)
+so they can carry on where they left off after a crash.
+"""
+from typing import Iterator, List, Optional, Tuple
+import mmap
+import os
+
+from rover_script import run_lines
+from rover_snapshot import Checkpointer, load_checkpoint
+from toy_robot import MarsRover
+
+# Approximate number of bytes of the log scanned and run at a time.
+CHUNK_SIZE = 1 << 22
+
+# Number of commands replayed between checkpoints.
+CHECKPOINT_EVERY = 1 << 20
+
+
+def _line_start(log: mmap.mmap, offset: int) -> int:
+    """Return the offset of the first line starting at or after offset."""
+    if offset <= 0:
+        return 0
+    if log[offset - 1] == ord("\n"):
+        return offset
+    newline = log.find(b"\n", offset)
+    return len(log) if newline < 0 else newline + 1
+
+
+def iter_log_chunks(path: str,
+                    start: int = 0,
+                    end: Optional[int] = None,
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[List[bytes], int]]:
+    """Scan a command log for lines, a chunk at a time.
+
+    Every line starting at an offset in the range [start, end) is included, even if it
+    finishes after end. Splitting a log into adjacent ranges therefore gives each line
+    to exactly one range.
+
+    Yields a tuple (lines, offset) for each chunk, where lines is a list of the commands
+    in the chunk as bytes without their newlines and offset is where the next chunk
+    starts. The lines are copies, taken from a copy of the chunk, so they stay valid
+    after the log is closed, and memory use follows chunk_size rather than the size of
+    the log.
+
+    Arguments:
+    path - the path of the command log
+    start - the byte offset to start from
+    end - the byte offset to stop at. The end of the log by default
+    chunk_size - the approximate number of bytes to scan for each chunk
+    """
+    if os.path.getsize(path) == 0:
+        return
+
+    with open(path, "rb") as log_file, \
+            mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log:
+        end = len(log) if end is None else min(end, len(log))
+        position = _line_start(log, start)
+        while position < end:
+            # Finish the chunk at the end of the line holding its last byte, so the
+            # last line may run on past end.
+            newline = log.find(b"\n", min(position + chunk_size, end) - 1)
+            stop = len(log) if newline < 0 else newline + 1
+            # Slicing the map copies the chunk, and splitting it copies each line again.
+            # Lines are wanted as bytes for the parser's lookups, and the copies can
+            # outlive the map, so the compiled script can keep them.
+            lines = log[position:stop].split(b"\n")
+            if newline >= 0:
+                lines.pop()
+            yield lines, stop
+            position = stop
+
+
+def replay_log(rover: MarsRover,
+               path: str,
+               start: int = 0,
+               end: Optional[int] = None,
+               chunk_size: int = CHUNK_SIZE) -> Iterator[Optional[str]]:
+    """Replay a log of newline separated commands against a rover.
+
+    Yields the output of every REPORT in the log, in order. As with
+    MarsRover.recieve_command, a REPORT issued before the rover is placed gives None.
+
+    Arguments:
+    rover - the rover to drive
+    path - the path of the command log
+    start - the byte offset to start from. Replay starts at the first line beginning at
+            or after this offset
+    end - the byte offset to stop at. Lines beginning before this offset are replayed
+    chunk_size - the approximate number of bytes to scan and run at a time
+    """
+    for lines, _ in iter_log_chunks(path, start, end, chunk_size):
+        yield from run_lines(rover, lines)
+
+
+def replay_log_checkpointed(rover: MarsRover,
+                            path: str,
+                            checkpoint_path: str,
+                            every: int = CHECKPOINT_EVERY,
+                            end: Optional[int] = None,
+                            chunk_size: int = CHUNK_SIZE) -> Iterator[Optional[str]]:
+    """Replay a log of newline separated commands against a rover, checkpointing the
+    rover every so many commands.
+
+    If the checkpoint file already holds a checkpoint, the rover is first restored from
+    it and the replay carries on from the offset it records. Otherwise the replay starts
+    at the beginning of the log with the rover as it is.
+
+    Yields the output of every REPORT replayed, as replay_log does. After a restart the
+    reports of commands run since the last checkpoint are yielded again.
+
+    Arguments:
+    rover - the rover to drive
+    path - the path of the command log
+    checkpoint_path - the path of the checkpoint file
+    every - the number of commands to replay between checkpoints
+    end - the byte offset to stop at. Lines beginning before this offset are replayed
+    chunk_size - the approximate number of bytes to scan and run at a time
+    """
+    start = load_checkpoint(checkpoint_path, rover) or 0
+    with Checkpointer(checkpoint_path) as checkpointer:
+        due = every
+        offset = start
+        for lines, next_offset in iter_log_chunks(path, start, end, chunk_size):
+            # Split the chunk where checkpoints fall due, working out the offset just
+            # past each piece from the lengths of its lines.
+            while len(lines) >= due:
+                piece, lines = lines[:due], lines[due:]
+                yield from run_lines(rover, piece)
+                offset = min(offset + sum(len(line) + 1 for line in piece), next_offset)
+                checkpointer.checkpoint(rover, offset)
+                due = every
+            if lines:
+                yield from run_lines(rover, lines)
+                due -= len(lines)
+            offset = next_offset
+        if due != every:
+            checkpointer.checkpoint(rover, offset)
+
+
+def split_log(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a command log into byte ranges of about the same size, one per worker.
+
+    Returns a list of (start, end) offsets which can be passed to replay_log. Between
+    them the ranges replay every line in the log exactly once.
+
+    Arguments:
+    path - the path of the command log
+    parts - the number of ranges to split the log into
+    """
+    size = os.path.getsize(path)
+    return [(size * part // parts, size * (part + 1) // parts) for part in range(parts)]
@@ -0,0 +1,87 @@
+from rover_replay import iter_log_chunks, replay_log, replay_log_checkpointed, split_log
+from toy_robot import MarsRover
+import os
+import random
+import tempfile
+import unittest
+
+class TestRoverReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.log_dir.name, "commands.log")
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def _write_log(self, data):
+        with open(self.path, "wb") as log:
+            log.write(data)
+
+    def test_replay_log(self):
+        self._write_log(b"REPORT\nPLACE 1,2,EAST\nmove\r\nMOVE\nLeft\nMOVE\nREPORT\nJUMP\n\nREPORT")
+        self.assertEqual(list(replay_log(MarsRover(), self.path)), [None, "3,3,NORTH", "3,3,NORTH"])
+        self.assertEqual(list(replay_log(MarsRover(), self.path, chunk_size=1)), [None, "3,3,NORTH", "3,3,NORTH"])
+
+    def test_replay_empty_log(self):
+        self._write_log(b"")
+        self.assertEqual(list(replay_log(MarsRover(), self.path)), [])
+
+    def test_replay_matches_recieve_command(self):
+        commands = ["MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 0,0,NORTH", "PLACE 3,1,WEST",
+                    "place 2,2,south", "PLACE 2,2,UP", "rıght", "REPORT NOW"]
+        generator = random.Random(3)
+        command_list = [generator.choice(commands) for _ in range(2000)]
+        self._write_log("\n".join(command_list).encode() + b"\n")
+
+        rover = MarsRover()
+        expected = []
+        for command in command_list:
+            output = rover.recieve_command(command)
+            if command.upper().split(" ")[0] == "REPORT":
+                expected.append(output)
+        self.assertEqual(list(replay_log(MarsRover(), self.path, chunk_size=100)), expected)
+
+    def test_split_log_covers_every_line_once(self):
+        self._write_log(b"".join(b"PLACE %d,0,NORTH\n" % i for i in range(100)))
+        lines = []
+        for start, end in split_log(self.path, 7):
+            for chunk, _ in iter_log_chunks(self.path, start, end, chunk_size=50):
+                lines.extend(chunk)
+        self.assertEqual(lines, [b"PLACE %d,0,NORTH" % i for i in range(100)])
+
+    def test_replay_from_offset(self):
+        self._write_log(b"PLACE 0,0,NORTH\nMOVE\nREPORT\nPLACE 4,4,SOUTH\nREPORT\n")
+        self.assertEqual(list(replay_log(MarsRover(), self.path, start=3)), [None, "4,4,SOUTH"])
+        self.assertEqual(list(replay_log(MarsRover(), self.path, start=0, end=17)), [])
+        self.assertEqual(list(replay_log(MarsRover(), self.path, start=0, end=28)), ["0,1,NORTH"])
+
+    def test_replay_resumes_from_checkpoint(self):
+        commands = ["MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 0,0,NORTH", "PLACE 3,1,WEST", "JUMP"]
+        generator = random.Random(4)
+        self._write_log("\n".join(generator.choice(commands) for _ in range(5000)).encode())
+        checkpoint_path = os.path.join(self.log_dir.name, "replay.ckpt")
+        expected_rover = MarsRover()
+        expected = list(replay_log(expected_rover, self.path))
+
+        for chunk_size in [1, 100, 1 << 20]:
+            # Stop part way through, as if the replay had crashed, then carry on from the
+            # last checkpoint with a fresh rover.
+            reports = replay_log_checkpointed(MarsRover(), self.path, checkpoint_path, every=300, chunk_size=chunk_size)
+            for _ in range(len(expected) // 2):
+                next(reports)
+            reports.close()
+
+            rover = MarsRover()
+            resumed = list(replay_log_checkpointed(rover, self.path, checkpoint_path, every=300, chunk_size=chunk_size))
+            self.assertLess(len(resumed), len(expected))
+            self.assertEqual(resumed, expected[len(expected) - len(resumed):])
+            self.assertEqual(rover.recieve_command("REPORT"), expected_rover.recieve_command("REPORT"))
+
+            # Once finished, resuming replays nothing
+            self.assertEqual(list(replay_log_checkpointed(rover, self.path, checkpoint_path)), [])
+            os.remove(checkpoint_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,368 @@
+"""Pre-compiled command scripts for the Mars Rover.
+
+A script is tokenised once into a compact array of integer opcodes. The opcodes can
+then be run against a MarsRover in a tight loop, skipping the upper-casing, splitting,
+dispatch and logging that MarsRover.recieve_command does for every command.
+
+While compiling, runs of consecutive MOVE commands are folded into a single opcode
+with a count, and runs of consecutive turns into a single net turn. A run of N moves
+can only ever push the rover along one axis, so it is applied as one clamp against
+the edge of the board, and running a script takes time in proportion to the number
+of runs rather than the number of commands.
+"""
+from array import array
+from typing import Iterable, List, Optional
+import struct
+import sys
+
+from rover_parser import COMMAND_LEFT, COMMAND_MOVE, COMMAND_PLACE, COMMAND_REPORT, COMMAND_RIGHT, parse_command
+from toy_robot import DIRECTION_NAMES, MarsRover
+
+# Opcodes and the arguments that follow them in the array:
+#   OP_MOVE count         - move count times
+#   OP_TURN quarter_turns - turn right through 90 degrees 1, 2 or 3 times
+#   OP_REPORT
+#   OP_PLACE x y facing   - facing is a Direction value
+# Commands which recieve_command would ignore whatever the rover's state (unrecognised
+# commands, unparseable PLACE commands and so on) are not compiled at all.
+OP_MOVE = 1
+OP_TURN = 2
+OP_REPORT = 3
+OP_PLACE = 4
+
+# The number of quarter turns to the right made by each turn command.
+LEFT_TURN = 3
+RIGHT_TURN = 1
+
+# The number of arguments following each opcode.
+_ARGUMENT_COUNTS = {OP_MOVE: 1, OP_TURN: 1, OP_REPORT: 0, OP_PLACE: 3}
+
+# Header of a compiled script saved as bytes: a magic number identifying the opcode
+# format, followed by the number of commands in the original script. The opcodes follow
+# as little endian 64 bit integers. Change the magic number whenever the opcodes change.
+_SCRIPT_HEADER = struct.Struct("<4sQ")
+SCRIPT_FORMAT = b"RSC1"
+
+# Limits of the signed 64 bit integers the opcode array holds.
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+
+class CompiledScript(object):
+    """A script of rover commands compiled into opcodes.
+
+    Attributes:
+        ops - the opcode array
+        command_count - the number of commands in the original script
+        commands - the commands of the original script, as strings or lines of bytes,
+                   or None if they aren't known. Any iterable that can be iterated more
+                   than once. Rovers that follow each command are given these rather
+                   than the opcodes. They are not saved by to_bytes
+    """
+
+    def __init__(self, ops: array, command_count: int, commands: Optional[Iterable] = None):
+        self.ops = ops
+        self.command_count = command_count
+        self.commands = commands
+
+    def __len__(self) -> int:
+        return self.command_count
+
+    def to_bytes(self) -> bytes:
+        """Return the script as bytes, which from_bytes turns back into a script."""
+        ops = self.ops
+        if sys.byteorder != "little":
+            ops = array('q', ops)
+            ops.byteswap()
+        return _SCRIPT_HEADER.pack(SCRIPT_FORMAT, self.command_count) + ops.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CompiledScript':
+        """Load a script saved with to_bytes. The opcodes are checked, so a script loaded
+        from a damaged or out of date file can't put a rover into an invalid state.
+
+        Raises ValueError if data does not hold a valid script.
+        """
+        if len(data) < _SCRIPT_HEADER.size or (len(data) - _SCRIPT_HEADER.size) % 8:
+            raise ValueError("Compiled script has an invalid length")
+        magic, command_count = _SCRIPT_HEADER.unpack_from(data)
+        if magic != SCRIPT_FORMAT:
+            raise ValueError("Compiled script is not in format {}".format(SCRIPT_FORMAT.decode()))
+
+        ops = array('q', data[_SCRIPT_HEADER.size:])
+        if sys.byteorder != "little":
+            ops.byteswap()
+
+        i = 0
+        while i < len(ops):
+            op = ops[i]
+            if op not in _ARGUMENT_COUNTS or i + _ARGUMENT_COUNTS[op] >= len(ops):
+                raise ValueError("Compiled script has an invalid opcode at {}".format(i))
+            if (op == OP_MOVE and ops[i + 1] < 1) or (op == OP_TURN and not 1 <= ops[i + 1] <= 3) \
+                    or (op == OP_PLACE and not 1 <= ops[i + 3] <= 4):
+                raise ValueError("Compiled script has an invalid argument at {}".format(i + 1))
+            i += _ARGUMENT_COUNTS[op] + 1
+
+        return cls(ops, command_count)
+
+
+class _ScriptCompiler(object):
+    """Builds an opcode array one command at a time, folding runs of moves and turns.
+
+    Attributes:
+        ops - the opcode array built so far
+        last_start - the index in ops of the last opcode, or -1
+        previous_start - the index in ops of the opcode before the last one, or -1
+    """
+
+    def __init__(self):
+        self.ops = array('q')
+        self.last_start = -1
+        self.previous_start = -1
+
+    def _last_op(self) -> Optional[int]:
+        return self.ops[self.last_start] if self.last_start >= 0 else None
+
+    def _emit(self, *op) -> None:
+        self.previous_start = self.last_start
+        self.last_start = len(self.ops)
+        self.ops.extend(op)
+
+    def move(self) -> None:
+        if self._last_op() == OP_MOVE:
+            self.ops[self.last_start + 1] += 1
+        else:
+            self._emit(OP_MOVE, 1)
+
+    def turn(self, quarter_turns: int) -> None:
+        if self._last_op() != OP_TURN:
+            self._emit(OP_TURN, quarter_turns)
+            return
+
+        quarter_turns = (self.ops[self.last_start + 1] + quarter_turns) % 4
+        if quarter_turns:
+            self.ops[self.last_start + 1] = quarter_turns
+            return
+
+        # The turns cancel out, so drop them. A turn never directly follows another
+        # turn, so the opcode before this one can't be a turn needing to be dropped too.
+        del self.ops[self.last_start:]
+        self.last_start = self.previous_start
+        self.previous_start = -1
+
+    def report(self) -> None:
+        self._emit(OP_REPORT)
+
+    def place(self, x_pos: int, y_pos: int, facing: int) -> None:
+        self._emit(OP_PLACE, x_pos, y_pos, facing)
+
+    def command(self, command) -> None:
+        """Compile a single command, as a string or as bytes, following the same rules as
+        MarsRover.recieve_command. Commands that can never have an effect are skipped.
+        """
+        kind, x_pos, y_pos, facing = parse_command(command)
+        if kind == COMMAND_MOVE:
+            self.move()
+        elif kind == COMMAND_LEFT:
+            self.turn(LEFT_TURN)
+        elif kind == COMMAND_RIGHT:
+            self.turn(RIGHT_TURN)
+        elif kind == COMMAND_REPORT:
+            self.report()
+        elif kind == COMMAND_PLACE:
+            # A coordinate outside the 64 bit range can never be on a 64 bit board so
+            # compile it as a placement that will always be rejected. Larger boards are
+            # given the commands instead (see run_compiled).
+            if not INT64_MIN <= x_pos <= INT64_MAX or not INT64_MIN <= y_pos <= INT64_MAX:
+                x_pos = y_pos = -1
+            self.place(x_pos, y_pos, facing)
+
+
+def compile_script(commands: Iterable[str]) -> CompiledScript:
+    """Compile a script of rover commands into opcodes.
+
+    Returns a CompiledScript that can be passed to MarsRover.run_batch or run_compiled,
+    which keeps the commands for rovers that follow each command.
+
+    Arguments:
+    commands - an iterable of command strings, as accepted by MarsRover.recieve_command
+    """
+    commands = commands if isinstance(commands, tuple) else tuple(commands)
+    compiler = _ScriptCompiler()
+    for command in commands:
+        compiler.command(command)
+
+    return CompiledScript(compiler.ops, len(commands), commands)
+
+
+def compile_lines(lines: Iterable[bytes]) -> CompiledScript:
+    """Compile a script of rover commands held as lines of bytes, such as the lines of a
+    command log. A trailing carriage return is removed from each line. The lines are
+    parsed straight from the bytes (see rover_parser), and any that aren't ASCII are
+    read as UTF-8.
+
+    Returns a CompiledScript that can be passed to MarsRover.run_batch or run_compiled,
+    which keeps the lines for rovers that follow each command.
+
+    Arguments:
+    lines - an iterable of commands as bytes, without line endings
+    """
+    lines = lines if isinstance(lines, tuple) else tuple(lines)
+    compiler = _ScriptCompiler()
+    for line in lines:
+        if line[-1:] == b"\r":
+            line = line[:-1]
+        compiler.command(line)
+
+    return CompiledScript(compiler.ops, len(lines), lines)
+
+
+def run_lines(rover: MarsRover, lines: Iterable[bytes]) -> List[Optional[str]]:
+    """Run a script of rover commands held as lines of bytes against a rover, as
+    rover.run_batch(compile_lines(lines)) does. A rover that follows each command (see
+    MarsRover._follows_each_command) is given the commands themselves, decoded as
+    UTF-8, without compiling them at all.
+
+    Returns the output of every REPORT in the script, in order.
+
+    Arguments:
+    rover - the rover to drive
+    lines - an iterable of commands as bytes, without line endings
+    """
+    if not rover._follows_each_command():
+        return rover.run_batch(compile_lines(lines))
+    return _run_commands(rover, lines)
+
+
+def _run_commands(rover: MarsRover, commands: Iterable) -> List[Optional[str]]:
+    """Pass each command of a script to rover.recieve_command in turn. Commands given as
+    lines of bytes have a trailing carriage return removed and are decoded as UTF-8.
+    """
+    reports = []
+    for command in commands:
+        if isinstance(command, bytes):
+            command = str(command[:-1] if command[-1:] == b"\r" else command, "utf-8", "replace")
+        output = rover.recieve_command(command)
+        if parse_command(command)[0] == COMMAND_REPORT:
+            reports.append(output)
+    return reports
+
+
+def _run_compiled_stepwise(rover: MarsRover, script: CompiledScript) -> List[Optional[str]]:
+    """Run a compiled script one step at a time through the rover's own place, turn and
+    move methods, for rovers whose state can't be worked on directly.
+    """
+    ops = script.ops
+    op_count = len(ops)
+    reports = []
+
+    i = 0
+    while i < op_count:
+        op = ops[i]
+        i += 1
+        if op == OP_MOVE:
+            # Once a move in a run is refused, the rest of the run is refused too.
+            if rover.placed:
+                for _ in range(ops[i]):
+                    if not rover._move_rover():
+                        break
+            i += 1
+        elif op == OP_TURN:
+            if ops[i] == LEFT_TURN:
+                rover._turn_rover("LEFT")
+            else:
+                for _ in range(ops[i]):
+                    rover._turn_rover("RIGHT")
+            i += 1
+        elif op == OP_REPORT:
+            reports.append(rover._report())
+        else:
+            rover._place_rover(ops[i], ops[i + 1], DIRECTION_NAMES[ops[i + 2]])
+            i += 3
+
+    return reports
+
+
+def run_compiled(rover: MarsRover, script: CompiledScript) -> List[Optional[str]]:
+    """Run a compiled script against a rover, updating the rover's state in place.
+
+    Returns the output of every REPORT in the script, in order. A REPORT issued before
+    the rover has been placed gives None, as it does from MarsRover.recieve_command.
+
+    A rover that follows each command (see MarsRover._follows_each_command) is given
+    the commands the script was compiled from, so its metrics see every command with
+    its own type and latency and its recorder records the steps the commands really
+    take, rather than the folded moves and turns. Raises ValueError if the rover has
+    metrics or a recorder and the script doesn't have its commands, as a script loaded
+    with from_bytes doesn't. A rover on a board too large for 64 bit coordinates is
+    given the commands too, and raises ValueError likewise if the script doesn't have
+    them.
+
+    Arguments:
+    rover - the rover to drive
+    script - the compiled script to run
+    """
+    if rover._follows_each_command():
+        if script.commands is not None:
+            return _run_commands(rover, script.commands)
+        if rover.metrics is not None or rover.recorder is not None:
+            raise ValueError("Compiled script has no commands for the rover's metrics or recorder to follow")
+    if rover.x_max > INT64_MAX or rover.y_max > INT64_MAX:
+        # A PLACE beyond the 64 bit range is compiled as one that is always refused,
+        # which only holds on a board that fits in 64 bits.
+        if script.commands is None:
+            raise ValueError("Compiled script has no commands to run on a board larger than 64 bits")
+        return _run_commands(rover, script.commands)
+    if not rover._can_run_compiled():
+        return _run_compiled_stepwise(rover, script)
+
+    ops = script.ops
+    op_count = len(ops)
+    names = DIRECTION_NAMES
+    reports = []
+
+    # Work on local copies of the rover's state and write them back at the end.
+    x_pos = rover.x_pos
+    y_pos = rover.y_pos
+    facing = rover.facing
+    placed = rover.placed
+    x_max = rover.x_max
+    y_max = rover.y_max
+
+    i = 0
+    while i < op_count:
+        op = ops[i]
+        i += 1
+        if op == OP_MOVE:
+            # A run of moves goes in a straight line, so it stops at the edge of the board.
+            if placed:
+                count = ops[i]
+                if facing == 1:
+                    y_pos = min(y_pos + count, y_max)
+                elif facing == 2:
+                    x_pos = min(x_pos + count, x_max)
+                elif facing == 3:
+                    y_pos = max(y_pos - count, 0)
+                else:
+                    x_pos = max(x_pos - count, 0)
+            i += 1
+        elif op == OP_TURN:
+            if placed:
+                facing = (facing + ops[i] - 1) % 4 + 1
+            i += 1
+        elif op == OP_REPORT:
+            reports.append("{},{},{}".format(x_pos, y_pos, names[facing]) if placed else None)
+        else:
+            new_x = ops[i]
+            new_y = ops[i + 1]
+            if 0 <= new_x <= x_max and 0 <= new_y <= y_max:
+                x_pos = new_x
+                y_pos = new_y
+                facing = ops[i + 2]
+                placed = True
+            i += 3
+
+    rover.x_pos = x_pos
+    rover.y_pos = y_pos
+    rover.facing = facing
+    rover.placed = placed
+    return reports
@@ -0,0 +1,146 @@
+"""A cache of compiled rover scripts, keyed by a hash of their commands.
+
+Scripts that are run over and over are compiled once (see rover_script). The compiled
+scripts are kept in memory, most recently used first, and optionally saved to a
+directory so they survive between runs. Running a cached script only costs a hash of
+its text, with no parsing or validation of its commands.
+
+    cache = ScriptCache(directory="script-cache")
+    for x_pos, y_pos in placements:
+        MarsRover(x_pos, y_pos, placed=True).run_batch(cache.get(commands))
+"""
+from collections import OrderedDict
+from typing import Optional, Sequence, Union
+import hashlib
+import os
+import tempfile
+
+from rover_script import SCRIPT_FORMAT, CompiledScript, compile_lines, compile_script
+
+# The number of compiled scripts kept in memory by default.
+DEFAULT_CACHE_SIZE = 1024
+
+# File name extension of cached scripts on disk.
+CACHE_SUFFIX = ".rsc"
+
+
+def script_hash(commands: Union[Sequence[str], Sequence[bytes]]) -> str:
+    """Return a hash identifying a script, which changes whenever any of its commands,
+    or the format of compiled scripts, changes. Commands given as bytes hash differently
+    from the same commands given as strings, since they compile differently: a trailing
+    carriage return is stripped from lines of bytes (see compile_lines) but not from
+    strings.
+
+    Arguments:
+    commands - the commands of the script, as strings or as bytes
+    """
+    digest = hashlib.blake2b(SCRIPT_FORMAT, digest_size=20)
+    as_bytes = bool(commands) and isinstance(commands[0], bytes)
+    digest.update(b"B" if as_bytes else b"S")
+    separator = b"\n" if as_bytes else "\n"
+    text = separator.join(commands)
+    if text.count(separator) == max(len(commands) - 1, 0):
+        digest.update(b"%d\n" % len(commands))
+        digest.update(text if isinstance(text, bytes) else text.encode("utf-8", "surrogatepass"))
+    else:
+        # Some command holds a newline, so joining the commands would be ambiguous.
+        # Prefix each one with its length instead.
+        digest.update(b"*")
+        for command in commands:
+            data = command if isinstance(command, bytes) else command.encode("utf-8", "surrogatepass")
+            digest.update(b"%d\n" % len(data))
+            digest.update(data)
+    return digest.hexdigest()
+
+
+class ScriptCache(object):
+    """An LRU cache of compiled scripts, backed by an optional on-disk cache.
+
+    Attributes:
+        maxsize - the most compiled scripts kept in memory
+        directory - the directory compiled scripts are saved to, or None to only cache
+                    scripts in memory
+        hits - the number of scripts found in memory
+        disk_hits - the number of scripts loaded from disk
+        misses - the number of scripts compiled
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, directory: Optional[str] = None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._scripts = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        """Return the number of scripts held in memory."""
+        return len(self._scripts)
+
+    def clear(self) -> None:
+        """Empty the in-memory cache. Scripts saved to disk are kept."""
+        self._scripts.clear()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def _load(self, key: str) -> Optional[CompiledScript]:
+        """Load a script from disk, or return None if it isn't there or is damaged."""
+        try:
+            with open(self._path(key), "rb") as cached:
+                return CompiledScript.from_bytes(cached.read())
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, key: str, script: CompiledScript) -> None:
+        """Save a script to disk, writing a temporary file and renaming it into place so
+        that other processes never see a partly written script.
+        """
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as output:
+                output.write(script.to_bytes())
+            os.replace(temporary, self._path(key))
+        except OSError:
+            # The disk cache is only an optimisation, so carry on without it.
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+    def get(self, commands: Union[Sequence[str], Sequence[bytes]]) -> CompiledScript:
+        """Return the compiled form of a script, compiling it only if it is in neither
+        the in-memory nor the on-disk cache.
+
+        Arguments:
+        commands - the commands of the script, as strings or as lines of bytes (see
+                   rover_script.compile_lines)
+        """
+        commands = commands if isinstance(commands, (list, tuple)) else list(commands)
+        key = script_hash(commands)
+
+        script = self._scripts.get(key)
+        if script is not None:
+            self._scripts.move_to_end(key)
+            self.hits += 1
+            return script
+
+        script = self._load(key) if self.directory is not None else None
+        if script is not None:
+            self.disk_hits += 1
+            script.commands = tuple(commands)
+        else:
+            self.misses += 1
+            if commands and isinstance(commands[0], bytes):
+                script = compile_lines(commands)
+            else:
+                script = compile_script(commands)
+            if self.directory is not None:
+                self._save(key, script)
+
+        self._scripts[key] = script
+        if len(self._scripts) > self.maxsize:
+            self._scripts.popitem(last=False)
+        return script
@@ -0,0 +1,85 @@
+from rover_script import CompiledScript, compile_script
+from rover_script_cache import CACHE_SUFFIX, ScriptCache, script_hash
+from toy_robot import MarsRover
+import os
+import tempfile
+import unittest
+
+SCRIPT = ["PLACE 1,2,EAST", "MOVE", "LEFT", "MOVE", "REPORT", "JUMP", "RIGHT", "MOVE", "REPORT"]
+
+class TestScriptCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_script_to_bytes(self):
+        script = compile_script(SCRIPT)
+        loaded = CompiledScript.from_bytes(script.to_bytes())
+        self.assertEqual(loaded.ops, script.ops)
+        self.assertEqual(len(loaded), len(SCRIPT))
+
+    def test_damaged_script_is_rejected(self):
+        data = compile_script(SCRIPT).to_bytes()
+        for damaged in [data[:-1], data[:-16], b"XXXX" + data[4:], data[:-8] + b"\x09" + bytes(7),
+                        data.replace(b"\x02" + bytes(7), b"\x07" + bytes(7))]:
+            with self.assertRaises(ValueError):
+                CompiledScript.from_bytes(damaged)
+
+    def test_script_hash(self):
+        self.assertEqual(script_hash(SCRIPT), script_hash(list(SCRIPT)))
+        self.assertNotEqual(script_hash(SCRIPT), script_hash(SCRIPT[:-1]))
+        self.assertNotEqual(script_hash(["MOVE\nLEFT", "REPORT"]), script_hash(["MOVE", "LEFT\nREPORT"]))
+        self.assertNotEqual(script_hash(["MOVE\nLEFT"]), script_hash(["MOVE", "LEFT"]))
+        self.assertNotEqual(script_hash([]), script_hash([""]))
+
+    def test_memory_cache(self):
+        cache = ScriptCache(maxsize=2)
+        script = cache.get(SCRIPT)
+        self.assertIs(cache.get(list(SCRIPT)), script)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(MarsRover().run_batch(script), ["2,3,NORTH", "3,3,EAST"])
+        self.assertEqual(MarsRover(x_max=2).run_batch(script), ["2,3,NORTH", "2,3,EAST"])
+
+        cache.get(["MOVE"])
+        cache.get(["LEFT"])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNot(cache.get(SCRIPT), script)
+        self.assertEqual(cache.misses, 4)
+
+    def test_lines_of_bytes(self):
+        cache = ScriptCache()
+        script = cache.get([command.encode() for command in SCRIPT])
+        self.assertEqual(script.ops, compile_script(SCRIPT).ops)
+
+    def test_bytes_and_strings_are_cached_apart(self):
+        # compile_lines strips a trailing carriage return but compile_script doesn't.
+        cache = ScriptCache()
+        cache.get([b"PLACE 0,0,NORTH", b"MOVE\r", b"REPORT"])
+        commands = ["PLACE 0,0,NORTH", "MOVE\r", "REPORT"]
+        self.assertNotEqual(script_hash(commands), script_hash([command.encode() for command in commands]))
+        self.assertEqual(MarsRover().run_batch(cache.get(commands)), ["0,0,NORTH"])
+        self.assertEqual(cache.misses, 2)
+
+    def test_disk_cache(self):
+        first = ScriptCache(directory=self.cache_dir.name)
+        script = first.get(SCRIPT)
+        self.assertEqual(os.listdir(self.cache_dir.name), [script_hash(SCRIPT) + CACHE_SUFFIX])
+
+        second = ScriptCache(directory=self.cache_dir.name)
+        self.assertEqual(second.get(SCRIPT).ops, script.ops)
+        self.assertEqual((second.disk_hits, second.misses), (1, 0))
+
+        # A damaged file is compiled again and replaced
+        with open(os.path.join(self.cache_dir.name, script_hash(SCRIPT) + CACHE_SUFFIX), "wb") as cached:
+            cached.write(b"junk")
+        third = ScriptCache(directory=self.cache_dir.name)
+        self.assertEqual(third.get(SCRIPT).ops, script.ops)
+        self.assertEqual((third.disk_hits, third.misses), (0, 1))
+        self.assertEqual(ScriptCache(directory=self.cache_dir.name).get(SCRIPT).ops, script.ops)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+from rover_script import OP_MOVE, OP_PLACE, OP_REPORT, OP_TURN, CompiledScript, compile_script, run_compiled
+from toy_robot import Direction, MarsRover
+import random
+import unittest
+
+class TestRoverScript(unittest.TestCase):
+
+    def _run_line_by_line(self, rover, command_list):
+        return_values = []
+        for command in command_list:
+            output = rover.recieve_command(command)
+            if command.upper().split(" ")[0] == "REPORT":
+                return_values.append(output)
+        return return_values
+
+    def _check_matches_line_by_line(self, command_list, **rover_args):
+        expected_rover = MarsRover(**rover_args)
+        batch_rover = MarsRover(**rover_args)
+        expected = self._run_line_by_line(expected_rover, command_list)
+        self.assertEqual(batch_rover.run_batch(command_list), expected)
+        for field in ["x_pos", "y_pos", "facing", "placed", "x_max", "y_max"]:
+            self.assertEqual(getattr(batch_rover, field), getattr(expected_rover, field))
+
+    def test_compile_skips_commands_with_no_effect(self):
+        script = compile_script(["PLACE 1,2,EAST", "STOP", "PLACE 1,2,DOWN", "PLACE 1,2",
+                                 "LEFT TWICE", "move", "REPORT"])
+        self.assertEqual(len(script), 7)
+        self.assertEqual(list(script.ops), [OP_PLACE, 1, 2, Direction.EAST.value, OP_MOVE, 1, OP_REPORT])
+
+    def test_compile_folds_runs(self):
+        script = compile_script(["MOVE"] * 10000 + ["LEFT"] * 5 + ["STOP", "RIGHT", "RIGHT", "MOVE", "REPORT"])
+        self.assertEqual(list(script.ops), [OP_MOVE, 10000, OP_TURN, 1, OP_MOVE, 1, OP_REPORT])
+
+        # Turns which cancel each other out are dropped, joining up the runs of moves either side
+        script = compile_script(["MOVE", "LEFT", "RIGHT", "MOVE", "RIGHT", "RIGHT", "LEFT", "LEFT", "MOVE", "REPORT"])
+        self.assertEqual(list(script.ops), [OP_MOVE, 3, OP_REPORT])
+        script = compile_script(["REPORT", "LEFT", "LEFT", "LEFT", "LEFT", "LEFT", "REPORT"])
+        self.assertEqual(list(script.ops), [OP_REPORT, OP_TURN, 3, OP_REPORT])
+
+    def test_run_batch_long_runs(self):
+        command_list = ["PLACE 2,3,SOUTH"] + ["MOVE"] * 1000 + ["REPORT"] + ["LEFT"] * 7 + ["MOVE"] * 5 + ["REPORT"]
+        self._check_matches_line_by_line(command_list)
+        self._check_matches_line_by_line(command_list, x_max=10000, y_max=10000)
+        self.assertEqual(MarsRover(x_max=10 ** 9).run_batch(["PLACE 0,0,EAST"] + ["MOVE"] * 10000 + ["REPORT"]),
+                         ["10000,0,EAST"])
+
+    def test_run_batch_scenarios(self):
+        self._check_matches_line_by_line(["PLACE 0,0,NORTH", "MOVE", "REPORT"])
+        self._check_matches_line_by_line(["PLACE 0,0,NORTH", "LEFT", "REPORT"])
+        self._check_matches_line_by_line(["MOVE", "LEFT", "REPORT", "PLACE 1,2,EAST", "REPORT"])
+        self._check_matches_line_by_line(["PLACE 0,0,NORTH"] + ["MOVE"] * 11 + ["REPORT", "RIGHT"] + ["MOVE"] * 11 + ["REPORT"])
+        self._check_matches_line_by_line(["PLACE 1,2,DOWN", "PLACE -1,2,EAST", "PLACE 1,22,EAST", "MOVE", "REPORT"])
+        self._check_matches_line_by_line(["PLACE 1,2,EAST", "MOVE", "STOP", "left", "MAUVE", "Report"])
+        self._check_matches_line_by_line(["PLACE 99999999999999999999999,0,NORTH", "REPORT"])
+        self._check_matches_line_by_line(["PLACE 99999999999999999999999,0,NORTH", "MOVE", "REPORT"],
+                                         x_max=10 ** 23, y_max=10 ** 23)
+        self.assertRaises(ValueError, MarsRover(x_max=10 ** 23).run_batch,
+                          CompiledScript.from_bytes(compile_script(["REPORT"]).to_bytes()))
+
+    def test_run_batch_placed_rover(self):
+        self._check_matches_line_by_line(["MOVE", "RIGHT", "MOVE", "REPORT"],
+                                         x_pos=4, y_pos=5, x_max=5, y_max=5, facing="EAST", placed=True)
+
+    def test_run_batch_accepts_compiled_script(self):
+        script = compile_script(["PLACE 1,2,EAST", "MOVE", "REPORT"])
+        self.assertEqual(MarsRover().run_batch(script), ["2,2,EAST"])
+        self.assertEqual(MarsRover(x_max=1).run_batch(script), ["1,2,EAST"])
+        self.assertEqual(run_compiled(MarsRover(x_max=0), script), [None])
+
+    def test_run_batch_random_scripts(self):
+        commands = ["MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 0,0,NORTH", "PLACE 3,1,WEST",
+                    "PLACE 5,5,SOUTH", "PLACE 2,2,UP", "JUMP", "right now", "move it"]
+        generator = random.Random(1)
+        for _ in range(50):
+            # Weight the choice towards moves and turns so there are plenty of runs to fold
+            command_list = [generator.choice(commands[:3] * 3 + commands) for _ in range(200)]
+            self._check_matches_line_by_line(command_list, x_max=generator.randint(0, 6), y_max=generator.randint(0, 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Drive Mars Rovers over a socket.
+
+The server accepts TCP or Unix socket connections, and each connection drives its own
+MarsRover with the same commands as drive_toy_robot.py, one per line:
+
+    PLACE X,Y,F | MOVE | LEFT | RIGHT | REPORT | END
+
+Every REPORT is answered with a line holding the rover's position, or an empty line if
+the rover has not been placed. Other commands get no reply. END, or closing the
+connection, ends the session.
+
+Clients may pipeline commands, sending as many as they like without waiting for the
+replies. Whatever has arrived is run as one batch (see MarsRover.run_batch) and the
+replies are written together. The server stops reading from a connection while the
+client is not reading its replies, so a slow client can't make the server buffer
+without limit. Sessions are coroutines, so thousands can be served by one process.
+
+Run a server with:
+    python rover_server.py --port 7878
+"""
+from typing import Optional
+import argparse
+import asyncio
+
+from rover_logging import LOG_SINKS, configure_logging
+from rover_script import run_lines
+from toy_robot import MarsRover
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7878
+
+# The number of bytes read from a connection at a time. Every complete command read is
+# run as one batch.
+READ_SIZE = 1 << 16
+
+# The longest command accepted. A connection sending a longer line is closed, so the
+# server never buffers more than this for a partial line.
+MAX_LINE_LENGTH = 1 << 12
+
+
+def _is_end(line: bytes) -> bool:
+    """Return True if line is an END command (case insensitive)."""
+    if line[-1:] == b"\r":
+        line = line[:-1]
+    return len(line) == 3 and line.upper() == b"END"
+
+
+async def _reply_to_lines(rover: MarsRover, writer: asyncio.StreamWriter, lines) -> None:
+    """Run command lines as one batch and write the replies to their REPORTs."""
+    reports = run_lines(rover, lines)
+    if reports:
+        writer.write(("\n".join(report or "" for report in reports) + "\n").encode())
+        # Wait here while the client isn't keeping up with its replies.
+        await writer.drain()
+
+
+async def handle_session(reader: asyncio.StreamReader,
+                         writer: asyncio.StreamWriter,
+                         x_max: int = 4,
+                         y_max: int = 4) -> None:
+    """Drive a new rover with the commands sent over a connection until END is sent or
+    the connection is closed.
+
+    Arguments:
+    reader - the stream to read commands from
+    writer - the stream to write replies to
+    x_max - the maximum position on the x axis of the rover's board
+    y_max - the maximum position on the y axis of the rover's board
+    """
+    rover = MarsRover(x_max=x_max, y_max=y_max)
+    pending = b""
+    try:
+        while True:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                # A last command without a line ending is run as it is when streaming
+                # from a file.
+                if pending and not _is_end(pending):
+                    await _reply_to_lines(rover, writer, [pending])
+                return
+
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+
+            ended = False
+            for index, line in enumerate(lines):
+                if _is_end(line):
+                    del lines[index:]
+                    ended = True
+                    break
+
+            if lines:
+                await _reply_to_lines(rover, writer, lines)
+            if ended:
+                return
+            if len(pending) > MAX_LINE_LENGTH:
+                MarsRover.logger.error("Closing session sending a command longer than %s bytes", MAX_LINE_LENGTH)
+                return
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def start_server(host: str = DEFAULT_HOST,
+                       port: int = DEFAULT_PORT,
+                       path: Optional[str] = None,
+                       x_max: int = 4,
+                       y_max: int = 4) -> asyncio.AbstractServer:
+    """Start serving rover sessions.
+
+    Returns the asyncio server, which is already accepting connections.
+
+    Arguments:
+    host - the address to listen on for TCP connections
+    port - the TCP port to listen on. 0 picks a free port
+    path - listen on the Unix socket at this path instead of on TCP
+    x_max - the maximum position on the x axis of each rover's board
+    y_max - the maximum position on the y axis of each rover's board
+    """
+    async def session(reader, writer):
+        await handle_session(reader, writer, x_max, y_max)
+
+    if path is not None:
+        return await asyncio.start_unix_server(session, path)
+    return await asyncio.start_server(session, host, port)
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    server = await start_server(args.host, args.port, args.unix, args.x_max, args.y_max)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve Mars Rover sessions over a socket")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="the address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="the TCP port to listen on")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket at PATH instead of TCP")
+    parser.add_argument("--x-max", type=int, default=4, help="the maximum position on the x axis")
+    parser.add_argument("--y-max", type=int, default=4, help="the maximum position on the y axis")
+    parser.add_argument("--log-sink", choices=LOG_SINKS, default="null",
+                        help="where the rovers log to, as for rover_logging.configure_logging")
+    args = parser.parse_args(argv)
+
+    configure_logging(args.log_sink)
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
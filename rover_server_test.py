@@ -0,0 +1,109 @@
+from rover_logging import configure_logging
+from rover_server import MAX_LINE_LENGTH, start_server
+import asyncio
+import os
+import socket
+import tempfile
+import unittest
+
+class TestRoverServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        configure_logging("null")
+        self.server = await start_server(port=0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _connect(self):
+        return await asyncio.open_connection("127.0.0.1", self.port)
+
+    async def _read_until_closed(self, reader):
+        return await asyncio.wait_for(reader.read(), timeout=5)
+
+    async def test_session(self):
+        reader, writer = await self._connect()
+        writer.write(b"REPORT\nPLACE 0,0,NORTH\nMOVE\nREPORT\n")
+        self.assertEqual(await reader.readline(), b"\n")
+        self.assertEqual(await reader.readline(), b"0,1,NORTH\n")
+
+        writer.write(b"right\r\nMOVE\nJUMP\nREPORT\nEND\nREPORT\n")
+        self.assertEqual(await self._read_until_closed(reader), b"1,1,EAST\n")
+        writer.close()
+
+    async def test_commands_split_across_writes(self):
+        reader, writer = await self._connect()
+        for part in [b"PLA", b"CE 2,3,", b"EAST\nMO", b"VE\nREP", b"ORT\n", b"E", b"ND\n"]:
+            writer.write(part)
+            await writer.drain()
+            await asyncio.sleep(0)
+        self.assertEqual(await self._read_until_closed(reader), b"3,3,EAST\n")
+        writer.close()
+
+    async def test_pipelined_commands(self):
+        reader, writer = await self._connect()
+        writer.write(b"PLACE 0,0,NORTH\n" + b"MOVE\nRIGHT\nREPORT\n" * 10000 + b"END\n")
+        replies = (await self._read_until_closed(reader)).splitlines()
+        self.assertEqual(len(replies), 10000)
+        self.assertEqual(replies[:4], [b"0,1,EAST", b"1,1,SOUTH", b"1,0,WEST", b"0,0,NORTH"])
+        writer.close()
+
+    async def test_sessions_have_their_own_rovers(self):
+        sessions = [await self._connect() for _ in range(200)]
+        for number, (_, writer) in enumerate(sessions):
+            writer.write("PLACE {},{},SOUTH\nREPORT\nEND\n".format(number % 5, number // 5 % 5).encode())
+        for number, (reader, writer) in enumerate(sessions):
+            self.assertEqual(await self._read_until_closed(reader),
+                             "{},{},SOUTH\n".format(number % 5, number // 5 % 5).encode())
+            writer.close()
+
+    async def test_long_line_closes_session(self):
+        reader, writer = await self._connect()
+        writer.write(b"PLACE 0,0,NORTH\nREPORT\n" + b"X" * (MAX_LINE_LENGTH + 1))
+        self.assertEqual(await self._read_until_closed(reader), b"0,0,NORTH\n")
+        writer.close()
+
+    async def test_last_command_without_line_ending(self):
+        reader, writer = await self._connect()
+        writer.write(b"PLACE 0,0,NORTH\nREPORT")
+        writer.write_eof()
+        self.assertEqual(await self._read_until_closed(reader), b"0,0,NORTH\n")
+        writer.close()
+
+        reader, writer = await self._connect()
+        writer.write(b"PLACE 0,0,NORTH\nREPORT\nend")
+        writer.write_eof()
+        self.assertEqual(await self._read_until_closed(reader), b"0,0,NORTH\n")
+        writer.close()
+
+    async def test_client_closing_ends_session(self):
+        reader, writer = await self._connect()
+        writer.write(b"PLACE 0,0,NORTH\n")
+        writer.close()
+        await writer.wait_closed()
+
+        # The server carries on serving other sessions
+        reader, writer = await self._connect()
+        writer.write(b"PLACE 1,1,WEST\nREPORT\nEND\n")
+        self.assertEqual(await self._read_until_closed(reader), b"1,1,WEST\n")
+        writer.close()
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as socket_dir:
+            path = os.path.join(socket_dir, "rover.sock")
+            server = await start_server(path=path, x_max=10, y_max=10)
+            try:
+                reader, writer = await asyncio.open_unix_connection(path)
+                writer.write(b"PLACE 10,10,EAST\nREPORT\nEND\n")
+                self.assertEqual(await self._read_until_closed(reader), b"10,10,EAST\n")
+                writer.close()
+            finally:
+                server.close()
+                await server.wait_closed()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,284 @@
+"""Binary snapshots and checkpoints of rover state.
+
+A snapshot holds the whole state of a MarsRover (position, facing, whether it has been
+placed and the size of its board) in 48 bytes, or the state of every rover in a
+RoverFleet as packed arrays.
+
+A checkpoint file holds a full snapshot followed by a series of deltas, each recording
+only what has changed since the previous checkpoint, along with the offset in the
+command log at which to carry on. After a set number of deltas a fresh full snapshot
+replaces the whole file, so it stays small and is quick to load however long the run.
+
+Every record carries a checksum. A record torn by a crash while it was being written
+is ignored, and loading gives the last complete checkpoint.
+"""
+from typing import Optional, Tuple
+import os
+import struct
+import zlib
+
+from toy_robot import MarsRover
+
+# Record kinds.
+ROVER_FULL = 1
+ROVER_DELTA = 2
+FLEET_FULL = 3
+FLEET_DELTA = 4
+
+# Record header: magic, kind, log offset, payload length, CRC-32 of the payload.
+_HEADER = struct.Struct("<4sBqQI")
+_MAGIC = b"RCKP"
+
+# The rover state held in a snapshot, in order. x_pos, y_pos and facing are 0 for a
+# rover that has not been placed.
+ROVER_FIELDS = ("x_pos", "y_pos", "facing", "placed", "x_max", "y_max")
+_ROVER_STATE = struct.Struct("<6q")
+
+# The number of deltas written after each full snapshot before the next full snapshot.
+FULL_EVERY = 16
+
+
+def _rover_state(rover: MarsRover) -> Tuple[int, ...]:
+    if not rover.placed:
+        return (0, 0, 0, 0, rover.x_max, rover.y_max)
+    return (rover.x_pos, rover.y_pos, rover.facing, 1, rover.x_max, rover.y_max)
+
+
+def _set_rover_state(rover: MarsRover, state: Tuple[int, ...]) -> None:
+    x_pos, y_pos, facing, placed, rover.x_max, rover.y_max = state
+    rover.placed = bool(placed)
+    if rover.placed:
+        rover.x_pos, rover.y_pos, rover.facing = x_pos, y_pos, facing
+    else:
+        rover.x_pos = rover.y_pos = rover.facing = None
+
+
+def snapshot_rover(rover: MarsRover) -> bytes:
+    """Return a snapshot of the state of a rover.
+
+    Arguments:
+    rover - the rover. Its position and board size must fit in 64 bit integers
+    """
+    try:
+        return _ROVER_STATE.pack(*_rover_state(rover))
+    except struct.error:
+        raise ValueError("Rover state does not fit in a snapshot") from None
+
+
+def restore_rover(data: bytes, rover: Optional[MarsRover] = None) -> MarsRover:
+    """Restore a rover from a snapshot taken by snapshot_rover.
+
+    Returns the rover.
+
+    Arguments:
+    data - the snapshot
+    rover - the rover to restore, which keeps its obstacles. A new rover by default
+    """
+    if rover is None:
+        rover = MarsRover()
+    _set_rover_state(rover, _ROVER_STATE.unpack(data))
+    return rover
+
+
+def _fleet_arrays(fleet) -> list:
+    return [getattr(fleet, field) for field in ROVER_FIELDS]
+
+
+def snapshot_fleet(fleet) -> bytes:
+    """Return a snapshot of the state of every rover in a RoverFleet."""
+    return struct.pack("<Q", len(fleet)) + b"".join(array.tobytes() for array in _fleet_arrays(fleet))
+
+
+def restore_fleet(data: bytes, fleet=None):
+    """Restore a RoverFleet from a snapshot taken by snapshot_fleet.
+
+    Returns the fleet.
+
+    Arguments:
+    data - the snapshot
+    fleet - the fleet to restore, which must hold the same number of rovers. A new
+            fleet by default
+    """
+    import numpy as np
+    from rover_fleet import RoverFleet
+
+    count, = struct.unpack_from("<Q", data)
+    if fleet is None:
+        fleet = RoverFleet(count)
+    elif len(fleet) != count:
+        raise ValueError("Snapshot of {} rovers does not match a fleet of {}".format(count, len(fleet)))
+
+    position = 8
+    for field, array in zip(ROVER_FIELDS, _fleet_arrays(fleet)):
+        size = count * array.itemsize
+        array[:] = np.frombuffer(data, dtype=array.dtype, count=count, offset=position)
+        position += size
+    return fleet
+
+
+def _rover_delta(previous: Tuple[int, ...], state: Tuple[int, ...]) -> bytes:
+    """Encode the fields of state that differ from previous, as a bit mask of the
+    changed fields followed by their new values.
+    """
+    mask = 0
+    values = []
+    for index, (old, new) in enumerate(zip(previous, state)):
+        if old != new:
+            mask |= 1 << index
+            values.append(new)
+    return struct.pack("<B{}q".format(len(values)), mask, *values)
+
+
+def _apply_rover_delta(state: Tuple[int, ...], payload: bytes) -> Tuple[int, ...]:
+    mask = payload[0]
+    values = iter(struct.unpack_from("<{}q".format(bin(mask).count("1")), payload, 1))
+    return tuple(next(values) if mask >> index & 1 else old for index, old in enumerate(state))
+
+
+def _fleet_delta(previous: list, arrays: list) -> bytes:
+    """Encode the rovers whose state differs from previous, as their indices followed by
+    the new value of every field for each of them.
+    """
+    import numpy as np
+
+    changed = np.zeros(len(arrays[0]), dtype=bool)
+    for old, new in zip(previous, arrays):
+        changed |= old != new
+    indices = np.flatnonzero(changed).astype(np.int64)
+    return (struct.pack("<Q", len(indices)) + indices.tobytes()
+            + b"".join(array[indices].tobytes() for array in arrays))
+
+
+def _apply_fleet_delta(fleet, payload: bytes) -> None:
+    import numpy as np
+
+    count, = struct.unpack_from("<Q", payload)
+    indices = np.frombuffer(payload, dtype=np.int64, count=count, offset=8)
+    position = 8 + indices.nbytes
+    for array in _fleet_arrays(fleet):
+        array[indices] = np.frombuffer(payload, dtype=array.dtype, count=count, offset=position)
+        position += count * array.itemsize
+
+
+def _read_records(path: str):
+    """Yield (kind, offset, payload, end) for every complete record in a checkpoint file,
+    where end is the position in the file just after the record. Stops at the first
+    torn or corrupt record.
+    """
+    try:
+        with open(path, "rb") as checkpoint:
+            data = checkpoint.read()
+    except FileNotFoundError:
+        return
+
+    position = 0
+    while position + _HEADER.size <= len(data):
+        magic, kind, offset, length, crc = _HEADER.unpack_from(data, position)
+        start = position + _HEADER.size
+        payload = data[start:start + length]
+        if magic != _MAGIC or len(payload) != length or zlib.crc32(payload) != crc:
+            return
+        position = start + length
+        yield kind, offset, payload, position
+
+
+def load_checkpoint(path: str, target) -> Optional[int]:
+    """Restore a rover or fleet from the last complete checkpoint in a checkpoint file.
+
+    Returns the log offset recorded with the checkpoint, or None if the file holds no
+    checkpoint, in which case target is left unchanged.
+
+    Arguments:
+    path - the path of the checkpoint file
+    target - the MarsRover or RoverFleet to restore
+    """
+    is_rover = isinstance(target, MarsRover)
+    state = None
+    offset = None
+    for kind, record_offset, payload, _ in _read_records(path):
+        if kind == ROVER_FULL and is_rover:
+            state = _ROVER_STATE.unpack(payload)
+        elif kind == ROVER_DELTA and is_rover and state is not None:
+            state = _apply_rover_delta(state, payload)
+        elif kind == FLEET_FULL and not is_rover:
+            restore_fleet(payload, target)
+            state = True
+        elif kind == FLEET_DELTA and not is_rover and state is not None:
+            _apply_fleet_delta(target, payload)
+        else:
+            raise ValueError("Checkpoint file {} does not match {}".format(path, type(target).__name__))
+        offset = record_offset
+
+    if is_rover and state is not None:
+        _set_rover_state(target, state)
+    return offset
+
+
+class Checkpointer(object):
+    """Writes checkpoints of a rover or fleet to a checkpoint file.
+
+    The first checkpoint written is a full snapshot, which replaces anything already in
+    the file. Each later checkpoint is a delta from the one before, until full_every
+    deltas have been written, when the file is replaced by a new full snapshot.
+
+    Attributes:
+        path - the path of the checkpoint file
+        full_every - the number of deltas written between full snapshots
+        sync - whether to wait for each checkpoint to reach the disk
+    """
+
+    def __init__(self, path: str, full_every: int = FULL_EVERY, sync: bool = True):
+        self.path = path
+        self.full_every = full_every
+        self.sync = sync
+        self._file = None
+        self._previous = None
+        self._deltas = 0
+
+    def __enter__(self) -> 'Checkpointer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, output, kind: int, offset: int, payload: bytes) -> None:
+        output.write(_HEADER.pack(_MAGIC, kind, offset, len(payload), zlib.crc32(payload)))
+        output.write(payload)
+        output.flush()
+        if self.sync:
+            os.fsync(output.fileno())
+
+    def checkpoint(self, target, offset: int) -> None:
+        """Record the state of a rover or fleet.
+
+        Arguments:
+        target - the MarsRover or RoverFleet
+        offset - the offset in the command log from which to carry on after restoring
+                 this checkpoint
+        """
+        is_rover = isinstance(target, MarsRover)
+        state = _rover_state(target) if is_rover else [array.copy() for array in _fleet_arrays(target)]
+
+        if self._file is not None and self._deltas < self.full_every:
+            if is_rover:
+                self._write(self._file, ROVER_DELTA, offset, _rover_delta(self._previous, state))
+            else:
+                self._write(self._file, FLEET_DELTA, offset, _fleet_delta(self._previous, state))
+            self._deltas += 1
+        else:
+            # Write the full snapshot to a new file and swap it in, so there is a
+            # complete checkpoint on disk at every moment.
+            self.close()
+            payload = snapshot_rover(target) if is_rover else snapshot_fleet(target)
+            with open(self.path + ".tmp", "wb") as output:
+                self._write(output, ROVER_FULL if is_rover else FLEET_FULL, offset, payload)
+            os.replace(self.path + ".tmp", self.path)
+            self._file = open(self.path, "ab")
+            self._deltas = 0
+        self._previous = state
@@ -0,0 +1,107 @@
+from rover_snapshot import (Checkpointer, load_checkpoint, restore_fleet, restore_rover,
+                            snapshot_fleet, snapshot_rover)
+from toy_robot import MarsRover
+import os
+import tempfile
+import unittest
+
+try:
+    from rover_fleet import RoverFleet
+except ImportError:
+    RoverFleet = None
+
+class TestRoverSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.checkpoint_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.checkpoint_dir.name, "rover.ckpt")
+
+    def tearDown(self):
+        self.checkpoint_dir.cleanup()
+
+    def _state(self, rover):
+        return (rover.x_pos, rover.y_pos, rover.facing, rover.placed, rover.x_max, rover.y_max)
+
+    def test_rover_snapshot(self):
+        for rover in [MarsRover(), MarsRover(3, 2, 10, 20, "WEST", True), MarsRover(x_max=2 ** 62)]:
+            data = snapshot_rover(rover)
+            self.assertEqual(len(data), 48)
+            self.assertEqual(self._state(restore_rover(data)), self._state(rover))
+
+        restored = restore_rover(snapshot_rover(MarsRover()), MarsRover(1, 1, placed=True))
+        self.assertEqual(self._state(restored), (None, None, None, False, 4, 4))
+
+        with self.assertRaises(ValueError):
+            snapshot_rover(MarsRover(x_max=2 ** 64))
+
+    @unittest.skipIf(RoverFleet is None, "NumPy is not installed")
+    def test_fleet_snapshot(self):
+        fleet = RoverFleet(5, x_max=[1, 2, 3, 4, 5], y_max=9)
+        fleet.place([0, 1, 2, 3, 4], 3, "EAST", mask=[True, False, True, True, False])
+        fleet.move()
+        restored = restore_fleet(snapshot_fleet(fleet))
+        self.assertEqual(restored.report(), fleet.report())
+        self.assertEqual(restored.x_max.tolist(), fleet.x_max.tolist())
+        with self.assertRaises(ValueError):
+            restore_fleet(snapshot_fleet(fleet), RoverFleet(4))
+
+    def test_load_without_checkpoint(self):
+        rover = MarsRover(1, 1, placed=True)
+        self.assertIsNone(load_checkpoint(self.path, rover))
+        self.assertEqual(self._state(rover), (1, 1, 1, True, 4, 4))
+
+    def test_rover_checkpoints(self):
+        rover = MarsRover(x_max=100)
+        with Checkpointer(self.path, full_every=3, sync=False) as checkpointer:
+            checkpointer.checkpoint(rover, 0)
+            for offset in range(1, 10):
+                rover.recieve_command("PLACE 0,0,EAST" if offset == 1 else "MOVE")
+                checkpointer.checkpoint(rover, offset * 10)
+                restored = MarsRover()
+                self.assertEqual(load_checkpoint(self.path, restored), offset * 10)
+                self.assertEqual(self._state(restored), self._state(rover))
+        # Full snapshots replace the file, so it only holds the deltas since the last one
+        self.assertLess(os.path.getsize(self.path), 200)
+
+    def test_torn_checkpoint_is_ignored(self):
+        rover = MarsRover(2, 2, placed=True)
+        with Checkpointer(self.path, sync=False) as checkpointer:
+            checkpointer.checkpoint(rover, 5)
+            rover.recieve_command("MOVE")
+            checkpointer.checkpoint(rover, 6)
+        with open(self.path, "r+b") as checkpoint:
+            checkpoint.truncate(os.path.getsize(self.path) - 1)
+
+        restored = MarsRover()
+        self.assertEqual(load_checkpoint(self.path, restored), 5)
+        self.assertEqual(restored.recieve_command("REPORT"), "2,2,NORTH")
+
+        # A new checkpointer starts the file afresh
+        with Checkpointer(self.path, sync=False) as checkpointer:
+            checkpointer.checkpoint(rover, 6)
+        self.assertEqual(load_checkpoint(self.path, restored), 6)
+        self.assertEqual(restored.recieve_command("REPORT"), "2,3,NORTH")
+
+    @unittest.skipIf(RoverFleet is None, "NumPy is not installed")
+    def test_fleet_checkpoints(self):
+        fleet = RoverFleet(1000, x_max=50, y_max=50)
+        with Checkpointer(self.path, full_every=4, sync=False) as checkpointer:
+            checkpointer.checkpoint(fleet, 0)
+            full_size = os.path.getsize(self.path)
+            fleet.place(1, 1, "NORTH", mask=[index < 10 for index in range(1000)])
+            checkpointer.checkpoint(fleet, 1)
+            # A delta only holds the rovers that changed
+            self.assertLess(os.path.getsize(self.path) - full_size, full_size // 10)
+            for offset in range(2, 12):
+                fleet.recieve_command("MOVE" if offset % 3 else "LEFT")
+                checkpointer.checkpoint(fleet, offset)
+
+        restored = RoverFleet(1000)
+        self.assertEqual(load_checkpoint(self.path, restored), 11)
+        self.assertEqual(restored.report(), fleet.report())
+        with self.assertRaises(ValueError):
+            load_checkpoint(self.path, MarsRover())
+
+
+if __name__ == '__main__':
+    unittest.main()
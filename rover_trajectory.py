@@ -0,0 +1,156 @@
+"""Recording of rover trajectories into columnar arrays.
+
+A TrajectoryRecorder attached to a MarsRover (with its recorder argument) records a row
+for every PLACE, MOVE, LEFT and RIGHT the rover handles once it has been placed, holding
+the rover's state after the command and whether the command was accepted:
+
+    step     - int64, the number of the command among all those recorded
+    x        - int64, the position on the x axis
+    y        - int64, the position on the y axis
+    facing   - int8, the Direction value faced
+    accepted - bool, False if the command was rejected and the state left unchanged
+
+The columns are typed arrays with room set aside up front, doubling in size when they
+fill, so recording a row only stores five numbers. They can be exported without copying
+to NumPy, to .npy files (without needing NumPy), or to Arrow and Parquet with pyarrow.
+"""
+from array import array
+from typing import Dict
+import os
+import struct
+
+# The columns of a trajectory, with their array type codes and NumPy type strings.
+COLUMNS = (("step", "q", "<i8"), ("x", "q", "<i8"), ("y", "q", "<i8"), ("facing", "b", "|i1"), ("accepted", "b", "|b1"))
+
+# The number of rows room is set aside for when a recorder is created.
+DEFAULT_CAPACITY = 4096
+
+
+class TrajectoryRecorder(object):
+    """Records the trajectory of a rover.
+
+    Attributes:
+        step - the number of commands recorded so far, including any cleared away
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.step = 0
+        self._length = 0
+        self._capacity = max(1, capacity)
+        self._step = array('q', bytes(8 * self._capacity))
+        self._x = array('q', bytes(8 * self._capacity))
+        self._y = array('q', bytes(8 * self._capacity))
+        self._facing = array('b', bytes(self._capacity))
+        self._accepted = array('b', bytes(self._capacity))
+
+    def __len__(self) -> int:
+        """Return the number of rows recorded."""
+        return self._length
+
+    def _grow(self) -> None:
+        """Double the room in every column. The columns are copied to new arrays rather
+        than resized in place, which an array refuses to do while views of it exported
+        by columns() are alive, so exported views keep the old arrays.
+        """
+        self._step, self._x, self._y, self._facing, self._accepted = (
+            column + array(column.typecode, bytes(self._capacity * column.itemsize))
+            for column in (self._step, self._x, self._y, self._facing, self._accepted))
+        self._capacity *= 2
+
+    def record(self, x_pos: int, y_pos: int, facing: int, accepted: bool) -> None:
+        """Record the state of the rover after a command.
+
+        Arguments:
+        x_pos - the position on the x axis
+        y_pos - the position on the y axis
+        facing - the Direction value faced
+        accepted - whether the command was accepted
+        """
+        row = self._length
+        if row == self._capacity:
+            self._grow()
+        self._step[row] = self.step
+        self._x[row] = x_pos
+        self._y[row] = y_pos
+        self._facing[row] = facing
+        self._accepted[row] = accepted
+        self._length = row + 1
+        self.step += 1
+
+    def clear(self) -> None:
+        """Discard the recorded rows, keeping the room set aside for them. Steps carry on
+        counting from where they were.
+        """
+        self._length = 0
+
+    def columns(self) -> Dict[str, memoryview]:
+        """Return a read-only view of the recorded rows of each column, by name.
+
+        The views share memory with the recorder. Rows recorded later don't appear in
+        them, and recording carries on while they are in use, but rows recorded after
+        clear() may be written over the rows they show.
+        """
+        arrays = (self._step, self._x, self._y, self._facing, self._accepted)
+        return {name: memoryview(column)[:self._length].toreadonly()
+                for (name, _, _), column in zip(COLUMNS, arrays)}
+
+    def to_numpy(self) -> Dict[str, 'numpy.ndarray']:
+        """Return each column as a NumPy array sharing memory with the recorder."""
+        import numpy as np
+
+        return {name: np.frombuffer(view, dtype=dtype)
+                for (name, _, dtype), view in zip(COLUMNS, self.columns().values())}
+
+    def save_npy(self, directory: str) -> None:
+        """Save each column to NAME.npy in directory, straight from the recorder's memory.
+
+        Arguments:
+        directory - the directory to save to, which is created if needed
+        """
+        os.makedirs(directory, exist_ok=True)
+        for (name, _, dtype), view in zip(COLUMNS, self.columns().values()):
+            with open(os.path.join(directory, name + ".npy"), "wb") as output:
+                output.write(_npy_header(dtype, len(view)))
+                output.write(view.cast("B") if _native_matches(dtype) else _little_endian(view))
+
+    def to_arrow(self) -> 'pyarrow.Table':
+        """Return the trajectory as a pyarrow Table. The numeric columns share memory
+        with the recorder. Needs pyarrow.
+        """
+        import pyarrow as pa
+
+        columns = self.columns()
+        types = {"q": pa.int64(), "b": pa.int8()}
+        arrays = [pa.Array.from_buffers(types[code], self._length, [None, pa.py_buffer(columns[name])])
+                  for name, code, _ in COLUMNS[:-1]]
+        # Arrow holds booleans one per bit, so the accepted column has to be packed.
+        accepted = pa.Array.from_buffers(pa.int8(), self._length, [None, pa.py_buffer(columns["accepted"])])
+        arrays.append(accepted.cast(pa.bool_()))
+        return pa.Table.from_arrays(arrays, names=[name for name, _, _ in COLUMNS])
+
+    def save_parquet(self, path: str) -> None:
+        """Save the trajectory to a Parquet file. Needs pyarrow."""
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path)
+
+
+def _native_matches(dtype: str) -> bool:
+    """Return True if the array data for dtype is already in the byte order it names."""
+    return dtype[0] == "|" or struct.pack("=h", 1) == struct.pack("<h", 1)
+
+
+def _little_endian(view: memoryview) -> bytes:
+    column = array(view.format, view)
+    column.byteswap()
+    return column.tobytes()
+
+
+def _npy_header(dtype: str, length: int) -> bytes:
+    """Return the header of a version 1.0 .npy file holding a one dimensional array."""
+    header = "{{'descr': '{}', 'fortran_order': False, 'shape': ({},), }}".format(dtype, length)
+    # The magic string, version and header length take 10 bytes, and the whole header
+    # is padded with spaces to a multiple of 64 bytes, ending in a newline.
+    padding = 63 - (10 + len(header)) % 64
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header) + padding + 1) + \
+        header.encode("latin1") + b" " * padding + b"\n"
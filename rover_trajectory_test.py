@@ -0,0 +1,131 @@
+from rover_obstacles import SparseObstacles
+from rover_planner import plan_script
+from rover_script import CompiledScript, compile_script
+from rover_script_cache import ScriptCache
+from rover_trajectory import TrajectoryRecorder
+from toy_robot import MarsRover
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+COMMANDS = ["MOVE", "PLACE 0,0,NORTH", "MOVE", "LEFT", "MOVE", "RIGHT", "REPORT", "PLACE 9,9,EAST",
+            "MOVE", "MOVE", "MOVE", "MOVE", "JUMP", "PLACE 4,4,EAST", "MOVE"]
+
+# The rows recorded for COMMANDS: (step, x, y, facing, accepted)
+EXPECTED = [(0, 0, 0, 1, 1), (1, 0, 1, 1, 1), (2, 0, 1, 4, 1), (3, 0, 1, 4, 0), (4, 0, 1, 1, 1),
+            (5, 0, 1, 1, 0), (6, 0, 2, 1, 1), (7, 0, 3, 1, 1), (8, 0, 4, 1, 1), (9, 0, 4, 1, 0),
+            (10, 4, 4, 2, 1), (11, 4, 4, 2, 0)]
+
+class TestTrajectoryRecorder(unittest.TestCase):
+
+    def _rows(self, recorder):
+        columns = recorder.columns()
+        return list(zip(*[column.tolist() for column in columns.values()]))
+
+    def test_records_commands(self):
+        recorder = TrajectoryRecorder(capacity=2)
+        rover = MarsRover(recorder=recorder)
+        for command in COMMANDS:
+            rover.recieve_command(command)
+        self.assertEqual(self._rows(recorder), EXPECTED)
+
+    def test_run_batch_records_every_command(self):
+        recorder = TrajectoryRecorder()
+        self.assertEqual(MarsRover(recorder=recorder).run_batch(COMMANDS), ["0,1,NORTH"])
+        self.assertEqual(self._rows(recorder), EXPECTED)
+
+    def test_compiled_scripts_record_every_command(self):
+        recorder = TrajectoryRecorder()
+        self.assertEqual(MarsRover(recorder=recorder).run_batch(compile_script(COMMANDS)), ["0,1,NORTH"])
+        self.assertEqual(self._rows(recorder), EXPECTED)
+
+        recorder = TrajectoryRecorder()
+        cache = ScriptCache()
+        cache.get(COMMANDS)
+        MarsRover(recorder=recorder).run_batch(cache.get(COMMANDS))
+        self.assertEqual(self._rows(recorder), EXPECTED)
+
+        # A plan that turns left twice, to get around the obstacle
+        recorder = TrajectoryRecorder()
+        obstacles = SparseObstacles(1, 1, [(1, 1)])
+        script = plan_script((1, 0, "EAST"), (0, 1), 1, 1, obstacles)
+        rover = MarsRover(1, 0, 1, 1, "EAST", True, obstacles, recorder)
+        rover.run_batch(script)
+        self.assertEqual(self._rows(recorder), [(0, 1, 0, 2, 1), (1, 1, 0, 1, 1), (2, 1, 0, 4, 1), (3, 0, 0, 4, 1),
+                                                (4, 0, 0, 1, 1), (5, 0, 1, 1, 1)])
+
+        script = CompiledScript.from_bytes(compile_script(COMMANDS).to_bytes())
+        self.assertRaises(ValueError, MarsRover(recorder=TrajectoryRecorder()).run_batch, script)
+
+    def test_records_initial_placement_and_obstacles(self):
+        recorder = TrajectoryRecorder()
+        rover = MarsRover(1, 1, facing="EAST", placed=True, obstacles=SparseObstacles(4, 4, [(2, 1)]), recorder=recorder)
+        rover.recieve_command("MOVE")
+        self.assertEqual(self._rows(recorder), [(0, 1, 1, 2, 1), (1, 1, 1, 2, 0)])
+
+    def test_clear(self):
+        recorder = TrajectoryRecorder()
+        rover = MarsRover(placed=True, recorder=recorder)
+        rover.recieve_command("MOVE")
+        recorder.clear()
+        rover.recieve_command("MOVE")
+        self.assertEqual(self._rows(recorder), [(2, 0, 2, 1, 1)])
+
+    def test_records_while_views_are_exported(self):
+        recorder = TrajectoryRecorder(capacity=2)
+        rover = MarsRover(placed=True, recorder=recorder)
+        columns = recorder.columns()
+        rover.recieve_command("MOVE")
+        rover.recieve_command("MOVE")
+        self.assertEqual(columns["y"].tolist(), [0])
+        self.assertEqual([row[2] for row in self._rows(recorder)], [0, 1, 2])
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_records_while_numpy_arrays_are_exported(self):
+        recorder = TrajectoryRecorder(capacity=2)
+        rover = MarsRover(placed=True, recorder=recorder)
+        exported = recorder.to_numpy()
+        rover.recieve_command("MOVE")
+        rover.recieve_command("MOVE")
+        self.assertEqual(exported["y"].tolist(), [0])
+        self.assertEqual(recorder.to_numpy()["y"].tolist(), [0, 1, 2])
+        self.assertEqual(rover.recieve_command("REPORT"), "0,2,NORTH")
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_to_numpy_and_save_npy(self):
+        recorder = TrajectoryRecorder()
+        MarsRover(recorder=recorder).run_batch(COMMANDS)
+        columns = recorder.to_numpy()
+        self.assertEqual(columns["x"].dtype, np.int64)
+        self.assertEqual(columns["accepted"].dtype, bool)
+        self.assertEqual(columns["y"].tolist(), [row[2] for row in EXPECTED])
+        del columns
+
+        with tempfile.TemporaryDirectory() as directory:
+            recorder.save_npy(directory)
+            for index, name in enumerate(["step", "x", "y", "facing", "accepted"]):
+                saved = np.load(os.path.join(directory, name + ".npy"))
+                self.assertEqual(saved.tolist(), [row[index] for row in EXPECTED])
+            self.assertEqual(np.load(os.path.join(directory, "facing.npy")).dtype, np.int8)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_to_arrow(self):
+        recorder = TrajectoryRecorder()
+        MarsRover(recorder=recorder).run_batch(COMMANDS)
+        table = recorder.to_arrow()
+        self.assertEqual(table.column("x").to_pylist(), [row[1] for row in EXPECTED])
+        self.assertEqual(table.column("accepted").to_pylist(), [bool(row[4]) for row in EXPECTED])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+"""Scripts reduced to functions of the rover's starting state.
+
+On a board of fixed size with no obstacles, running a script is a pure function of the
+rover's starting state. The way the rover faces after each command depends only on the
+way it started out facing, so for each starting facing every run of moves is a step
+along a known axis, stopped at the edge of the board. Each coordinate therefore ends up
+as
+
+    clamp(start + offset, low, high)
+
+for an offset and limits which depend only on the script and the starting facing, and
+composing two such clamps gives another. A Transition holds one clamp per axis for each
+starting facing (and for a rover that has not been placed), along with the clamps for
+every REPORT. It can be built by composing a script's commands once, then applied to
+any number of starting states at constant cost each, however long the script.
+"""
+from typing import List, Optional, Sequence, Tuple, Union
+
+from rover_script import OP_MOVE, OP_REPORT, OP_TURN, CompiledScript, compile_script
+from toy_robot import DIRECTION_NAMES, MarsRover
+
+# A clamp (offset, low, high) maps a coordinate c to min(max(c + offset, low), high),
+# with low <= high.
+Clamp = Tuple[int, int, int]
+
+
+def _then(first: Clamp, second: Clamp) -> Clamp:
+    """Return the clamp equal to applying first and then second."""
+    offset, low, high = first
+    next_offset, next_low, next_high = second
+    high = min(max(high + next_offset, next_low), next_high)
+    low = min(max(low + next_offset, next_low), high)
+    return (offset + next_offset, low, high)
+
+
+def _clamp(clamp: Clamp, value: int) -> int:
+    return min(max(value + clamp[0], clamp[1]), clamp[2])
+
+
+class Transition(object):
+    """The effect of a script on a rover, for every starting state.
+
+    Each attribute is indexed by the starting facing as a Direction value, with index 0
+    for a rover that has not been placed.
+
+    Attributes:
+        x_max - the maximum position on the x axis of the board
+        y_max - the maximum position on the y axis of the board
+        facing - the final facing. 0 if the rover is still not placed
+        x_clamps - the clamp giving the final x position from the starting one
+        y_clamps - the clamp giving the final y position from the starting one
+        reports - the (x clamp, y clamp, facing) at each REPORT
+        command_count - the number of commands in the script
+    """
+
+    def __init__(self, x_max: int = 4, y_max: int = 4):
+        """Create the transition of an empty script, which leaves every state as it is."""
+        self.x_max = x_max
+        self.y_max = y_max
+        self.facing = [0, 1, 2, 3, 4]
+        self.x_clamps = [(0, 0, x_max)] * 5
+        self.y_clamps = [(0, 0, y_max)] * 5
+        self.reports = [[] for _ in range(5)]
+        self.command_count = 0
+
+    @classmethod
+    def from_script(cls,
+                    commands: Union[Sequence[str], CompiledScript],
+                    x_max: int = 4,
+                    y_max: int = 4) -> 'Transition':
+        """Compose the transition of a script.
+
+        Returns the Transition.
+
+        Arguments:
+        commands - the commands, or a CompiledScript
+        x_max - the maximum position on the x axis of the board
+        y_max - the maximum position on the y axis of the board
+        """
+        script = commands if isinstance(commands, CompiledScript) else compile_script(commands)
+        transition = cls(x_max, y_max)
+        transition.command_count = script.command_count
+        facings = transition.facing
+        x_clamps = transition.x_clamps
+        y_clamps = transition.y_clamps
+
+        ops = script.ops
+        i = 0
+        while i < len(ops):
+            op = ops[i]
+            if op == OP_MOVE:
+                count = ops[i + 1]
+                # The step taken by each facing, as a clamp on the axis it moves along.
+                steps = (None, (y_clamps, (count, 0, y_max)), (x_clamps, (count, 0, x_max)),
+                         (y_clamps, (-count, 0, y_max)), (x_clamps, (-count, 0, x_max)))
+                for start, facing in enumerate(facings):
+                    if facing:
+                        clamps, step = steps[facing]
+                        clamps[start] = _then(clamps[start], step)
+                i += 2
+            elif op == OP_TURN:
+                quarter_turns = ops[i + 1]
+                transition.facing = facings = [(facing + quarter_turns - 1) % 4 + 1 if facing else 0
+                                               for facing in facings]
+                i += 2
+            elif op == OP_REPORT:
+                for start, facing in enumerate(facings):
+                    transition.reports[start].append((x_clamps[start], y_clamps[start], facing))
+                i += 1
+            else:
+                x_pos, y_pos, facing = ops[i + 1], ops[i + 2], ops[i + 3]
+                if 0 <= x_pos <= x_max and 0 <= y_pos <= y_max:
+                    transition.facing = facings = [facing] * 5
+                    x_clamps[:] = [(0, x_pos, x_pos)] * 5
+                    y_clamps[:] = [(0, y_pos, y_pos)] * 5
+                i += 4
+
+        return transition
+
+    def then(self, other: 'Transition') -> 'Transition':
+        """Return the transition of running this transition's script and then other's,
+        which must be for the same board.
+        """
+        if (self.x_max, self.y_max) != (other.x_max, other.y_max):
+            raise ValueError("Transitions are for different boards")
+
+        combined = Transition(self.x_max, self.y_max)
+        combined.command_count = self.command_count + other.command_count
+        for start, middle in enumerate(self.facing):
+            x_clamp = self.x_clamps[start]
+            y_clamp = self.y_clamps[start]
+            combined.facing[start] = other.facing[middle]
+            combined.x_clamps[start] = _then(x_clamp, other.x_clamps[middle])
+            combined.y_clamps[start] = _then(y_clamp, other.y_clamps[middle])
+            combined.reports[start] = self.reports[start] + [
+                (_then(x_clamp, report_x), _then(y_clamp, report_y), facing)
+                for report_x, report_y, facing in other.reports[middle]]
+        return combined
+
+    def apply(self, x_pos: int, y_pos: int, facing: int) -> Tuple[int, int, int, List[Optional[str]]]:
+        """Work out the result of running the script from a starting state.
+
+        Returns a tuple (x, y, facing, reports) of the final state and the output of
+        every REPORT, as MarsRover.run_batch would give. The final position is
+        meaningless if the final facing is 0.
+
+        Arguments:
+        x_pos - the starting position on the x axis, which must be on the board
+        y_pos - the starting position on the y axis, which must be on the board
+        facing - the starting facing as a Direction value, or 0 if the rover has not been placed
+        """
+        reports = [
+            "{},{},{}".format(_clamp(report_x, x_pos), _clamp(report_y, y_pos), DIRECTION_NAMES[report_facing])
+            if report_facing else None
+            for report_x, report_y, report_facing in self.reports[facing]]
+        return (_clamp(self.x_clamps[facing], x_pos), _clamp(self.y_clamps[facing], y_pos),
+                self.facing[facing], reports)
+
+    def apply_rover(self, rover: MarsRover) -> List[Optional[str]]:
+        """Update a rover as running the script would, in constant time.
+
+        Returns the output of every REPORT, as MarsRover.run_batch does.
+
+        Arguments:
+        rover - the rover, which must be on a board of the same size with no obstacles and
+                have no recorder
+        """
+        if (rover.x_max, rover.y_max) != (self.x_max, self.y_max) or not rover._can_run_compiled():
+            raise ValueError("Transition can't be applied to this rover")
+
+        start = rover.facing if rover.placed else 0
+        x_pos, y_pos, facing, reports = self.apply(rover.x_pos or 0, rover.y_pos or 0, start)
+        if facing:
+            rover.x_pos, rover.y_pos, rover.facing, rover.placed = x_pos, y_pos, facing, True
+        return reports
+
+    def apply_many(self, x_pos, y_pos, facing):
+        """Work out the final states of many starting states at once, with NumPy.
+
+        Returns a tuple (x, y, facing) of arrays of the final states.
+
+        Arguments:
+        x_pos - array of starting positions on the x axis
+        y_pos - array of starting positions on the y axis
+        facing - array of starting facings as Direction values, 0 for rovers not placed
+        """
+        import numpy as np
+
+        x_pos = np.asarray(x_pos, dtype=np.int64)
+        y_pos = np.asarray(y_pos, dtype=np.int64)
+        facing = np.asarray(facing, dtype=np.int8)
+        # Gather each start's clamps by its facing, then clamp every start at once.
+        x_clamps = np.array(self.x_clamps, dtype=np.int64)[facing]
+        y_clamps = np.array(self.y_clamps, dtype=np.int64)[facing]
+        return (np.minimum(np.maximum(x_pos + x_clamps[:, 0], x_clamps[:, 1]), x_clamps[:, 2]),
+                np.minimum(np.maximum(y_pos + y_clamps[:, 0], y_clamps[:, 1]), y_clamps[:, 2]),
+                np.array(self.facing, dtype=np.int8)[facing])
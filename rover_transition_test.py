@@ -0,0 +1,93 @@
+from rover_obstacles import SparseObstacles
+from rover_transition import Transition
+from toy_robot import DIRECTION_NAMES, MarsRover
+import itertools
+import random
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+COMMANDS = ["MOVE", "MOVE", "MOVE", "LEFT", "RIGHT", "REPORT", "PLACE 1,1,NORTH", "PLACE 9,9,EAST", "JUMP"]
+
+class TestTransition(unittest.TestCase):
+
+    def _starts(self, x_max, y_max):
+        yield 0, 0, 0
+        for x_pos, y_pos, facing in itertools.product(range(x_max + 1), range(y_max + 1), range(1, 5)):
+            yield x_pos, y_pos, facing
+
+    def _rover(self, x_pos, y_pos, facing, x_max, y_max):
+        if not facing:
+            return MarsRover(x_max=x_max, y_max=y_max)
+        return MarsRover(x_pos, y_pos, x_max, y_max, DIRECTION_NAMES[facing], True)
+
+    def _check_matches_rover(self, command_list, x_max, y_max):
+        transition = Transition.from_script(command_list, x_max, y_max)
+        for x_pos, y_pos, facing in self._starts(x_max, y_max):
+            rover = self._rover(x_pos, y_pos, facing, x_max, y_max)
+            expected_reports = rover.run_batch(command_list)
+            end_x, end_y, end_facing, reports = transition.apply(x_pos, y_pos, facing)
+            self.assertEqual(reports, expected_reports)
+            self.assertEqual(end_facing, rover.facing or 0)
+            if rover.placed:
+                self.assertEqual((end_x, end_y), (rover.x_pos, rover.y_pos))
+
+    def test_matches_rover(self):
+        self._check_matches_rover([], 4, 4)
+        self._check_matches_rover(["MOVE", "REPORT", "LEFT", "MOVE", "MOVE", "REPORT"], 4, 4)
+        self._check_matches_rover(["PLACE 2,2,SOUTH", "REPORT", "MOVE", "MOVE", "MOVE", "REPORT"], 4, 4)
+        generator = random.Random(5)
+        for _ in range(40):
+            command_list = [generator.choice(COMMANDS) for _ in range(generator.randint(1, 60))]
+            self._check_matches_rover(command_list, generator.randint(0, 5), generator.randint(0, 5))
+
+    def test_then(self):
+        generator = random.Random(6)
+        for _ in range(20):
+            first = [generator.choice(COMMANDS) for _ in range(30)]
+            second = [generator.choice(COMMANDS) for _ in range(30)]
+            combined = Transition.from_script(first, 3, 4).then(Transition.from_script(second, 3, 4))
+            expected = Transition.from_script(first + second, 3, 4)
+            self.assertEqual(combined.command_count, 60)
+            for start in self._starts(3, 4):
+                self.assertEqual(combined.apply(*start), expected.apply(*start))
+
+        with self.assertRaises(ValueError):
+            Transition(4, 4).then(Transition(5, 5))
+
+    def test_huge_board(self):
+        size = 10 ** 9
+        transition = Transition.from_script(["MOVE"] * 1000 + ["RIGHT"] + ["MOVE"] * 10 + ["REPORT"], size, size)
+        self.assertEqual(transition.apply(5, size - 10, 1), (15, size, 2, ["{},{},EAST".format(15, size)]))
+
+    def test_apply_rover(self):
+        transition = Transition.from_script(["MOVE", "LEFT", "MOVE", "REPORT"])
+        rover = MarsRover(2, 2, facing="EAST", placed=True)
+        self.assertEqual(transition.apply_rover(rover), ["3,3,NORTH"])
+        self.assertEqual(rover.recieve_command("REPORT"), "3,3,NORTH")
+
+        unplaced = MarsRover()
+        self.assertEqual(transition.apply_rover(unplaced), [None])
+        self.assertFalse(unplaced.placed)
+
+        with self.assertRaises(ValueError):
+            transition.apply_rover(MarsRover(x_max=5))
+        with self.assertRaises(ValueError):
+            transition.apply_rover(MarsRover(obstacles=SparseObstacles(4, 4)))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_apply_many(self):
+        command_list = [random.Random(7).choice(COMMANDS[:6]) for _ in range(100)]
+        transition = Transition.from_script(command_list, 6, 3)
+        starts = list(self._starts(6, 3))[1:]
+        x_pos, y_pos, facing = (np.array(column) for column in zip(*starts))
+        end_x, end_y, end_facing = transition.apply_many(x_pos, y_pos, facing)
+        for index, start in enumerate(starts):
+            self.assertEqual((end_x[index], end_y[index], end_facing[index]), transition.apply(*start)[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,47 @@
 from enum import Enum
-from typing import Tuple
+from time import perf_counter_ns
+from typing import List, Optional, Tuple
 import logging
 
+from rover_logging import ensure_logging_configured
+from rover_metrics import (REJECT_BLOCKED, REJECT_INVALID_DIRECTION, REJECT_INVALID_PLACE, REJECT_INVALID_TURN,
+                           REJECT_NOT_PLACED, REJECT_OUT_OF_BOUNDS, REJECT_UNRECOGNISED)
+from rover_parser import (COMMAND_LEFT, COMMAND_MOVE, COMMAND_NAMES, COMMAND_PLACE, COMMAND_REPORT,
+                          COMMAND_RIGHT, parse_command, split_place_command)
+
 class Direction(Enum):
     NORTH = 1
     EAST = 2
     SOUTH = 3
     WEST = 4
 
+# Lookup tables used in place of the Direction enum on the hot path, since enum lookups
+# are slow. Tables indexed by Direction value have an unused entry at index 0.
+DIRECTION_VALUES = {d.name: d.value for d in Direction}
+DIRECTION_NAMES = (None,) + tuple(Direction(value).name for value in range(1, 5))
+
+# The (x, y) step taken by a move in each direction, indexed by Direction value.
+DIRECTION_STEPS = (None, (0, 1), (1, 0), (0, -1), (-1, 0))
+
+# The direction faced after turning left or right, indexed by Direction value.
+LEFT_TURNS = (None, 4, 1, 2, 3)
+RIGHT_TURNS = (None, 2, 3, 4, 1)
+
+# The messages logged when a command is rejected, by the command and the reason (see
+# rover_metrics). RoverFleet logs the same messages, so that the log of a fleet reads as
+# the logs of its rovers. A PLACE command that can't be split into its arguments is
+# logged with the error from rover_parser.split_place_command instead.
+REJECTION_MESSAGES = {
+    ("PLACE", REJECT_OUT_OF_BOUNDS): "Coordinates (%s,%s) are out of bounds",
+    ("PLACE", REJECT_INVALID_DIRECTION): "Direction %s is not a valid direction",
+    ("PLACE", REJECT_BLOCKED): "Coordinates (%s,%s) are blocked",
+    ("MOVE", REJECT_OUT_OF_BOUNDS): "Move would take rover out of bounds",
+    ("MOVE", REJECT_BLOCKED): "Move would take rover into a blocked cell",
+    ("TURN", REJECT_INVALID_TURN): "Invalid turn command %s",
+    ("COMMAND", REJECT_UNRECOGNISED): "Unrecognosed command %s will be ignored",
+    ("COMMAND", REJECT_NOT_PLACED): "Rover has not yet been placed",
+}
+
 class MarsRover(object):
     """A toy robot Mars Rover that can move around a grid of predetermined size.
 
@@ -18,19 +52,29 @@ class MarsRover(object):
         placed - indicates whether the rover has been placed yet
         x_max - the maximum position possible on the x axis for this rover
         y_max - the maximum position possible on the y axis for this rover
+        obstacles - the obstacle map for the board (see rover_obstacles), or None if there are no obstacles
+        recorder - the TrajectoryRecorder recording the rover's state changes (see rover_trajectory), or None
+        metrics - the RoverMetrics counting and timing the rover's commands (see rover_metrics), or None
     """
 
+    # Rovers are often created in very large numbers, so keep their state compact.
+    __slots__ = ('x_pos', 'y_pos', 'facing', 'placed', 'x_max', 'y_max', 'obstacles', 'recorder', 'metrics')
+
+    logger = logging.getLogger(__name__)
+
     def __init__ (self,
                   x_pos: int = 0,
                   y_pos: int = 0,
                   x_max: int = 4,
                   y_max: int = 4,
                   facing: str = 'NORTH',
-                  placed: bool = False):
+                  placed: bool = False,
+                  obstacles=None,
+                  recorder=None,
+                  metrics=None):
         """Initialise class attributes and place the rover if needed.
         """
-        logging.basicConfig(filename='MarsRover.log', filemode='w', level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
+        ensure_logging_configured()
         self.logger.info('Initialising Mars Rover')
         self.x_pos = None
         self.y_pos = None
@@ -38,12 +82,15 @@ class MarsRover(object):
         self.x_max = x_max
         self.y_max = y_max
         self.placed = False
+        self.obstacles = obstacles
+        self.recorder = recorder
+        self.metrics = metrics
 
         if placed and not self._place_rover(x_pos, y_pos, facing):
             raise Exception("Invalid initial placement")
 
-        self.logger.info('Initialised Mars Rover, board dimensions {} x {}'
-                    .format(self.x_max, self.y_max))
+        self.logger.info('Initialised Mars Rover, board dimensions %s x %s',
+                         self.x_max, self.y_max)
 
     def _parse_place_command(self, command: str) -> Tuple[int, int, str]:
         """Parse a PLACE command. The command must take the format:
@@ -53,30 +100,53 @@ class MarsRover(object):
 
         Returns a tuple (int(X), int(Y), F) for valid inputs. None otherwise.
         """
-        self.logger.info("Parsing PLACE command {}".format(command))
-        split_command = command.split(" ")
-        if len(split_command) < 2:
-            self.logger.error("PLACE command does not contain coordinates")
-            return None
-        elif len(split_command) > 2:
-            self.logger.error("PLACE command includes unrecognised arguments")
-            return None
-
-        if split_command[0] != "PLACE":
-            self.logger.error("Invalid command for PLACE operation")
-            return None
-
-        arguments = split_command[1].split(",")
-        if len(arguments) != 3:
-            self.logger.error("PLACE command includes invlaid arguments")
-            return None
+        self.logger.info("Parsing PLACE command %s", command)
+        args_tuple, error = split_place_command(command)
+        if error is not None:
+            self.logger.error(error)
+            if self.metrics is not None:
+                self.metrics.reject(REJECT_INVALID_PLACE)
+        return args_tuple
+
+
+    def _cell_blocked(self, x_pos: int, y_pos: int) -> bool:
+        """Return True if the rover may not enter the cell at the specified coordinates,
+        which are known to be in bounds. Cells are blocked by obstacles, and subclasses can
+        override this to block cells for other reasons too.
+        """
+        return self.obstacles is not None and self.obstacles.is_blocked(x_pos, y_pos)
+
+    def _can_run_compiled(self) -> bool:
+        """Return True if compiled scripts can be run against this rover's state directly.
+        Subclasses which override _cell_blocked, _place_rover, _move_rover or _turn_rover
+        must return False, so that compiled scripts are run through those methods, unless
+        their overrides behave exactly as these do in the current state. A rover off the
+        board, which it can be left if the board shrinks, is never run directly, since a
+        run of moves is clamped to the edges of the board.
+        """
+        return (self.obstacles is None and self.recorder is None and self.metrics is None
+                and (not self.placed or (0 <= self.x_pos <= self.x_max and 0 <= self.y_pos <= self.y_max)))
+
+    def _follows_each_command(self) -> bool:
+        """Return True if run_batch must pass each command of a script to recieve_command
+        in turn, rather than compiling the script, because something watching the rover
+        needs to see every command. Compiling folds away moves and turns which cancel out
+        or can be combined.
+        """
+        return self.recorder is not None or self.metrics is not None
 
-        try:
-            return (int(arguments[0]), int(arguments[1]), arguments[2])
-        except ValueError:
-            self.logger.error("PLACE command includes non integer coordinates")
-            return None
+    def _rejected(self, reason: str) -> None:
+        """Note that a command has been rejected, for the rover's metrics and recorder, if
+        it has them. A rejected command that would have placed the rover is only recorded
+        once the rover has been placed.
 
+        Arguments:
+        reason - the reason for the rejection, one of rover_metrics.REJECTION_REASONS
+        """
+        if self.metrics is not None:
+            self.metrics.reject(reason)
+        if self.recorder is not None and self.placed:
+            self.recorder.record(self.x_pos, self.y_pos, self.facing, False)
 
     def _place_rover(self, x_pos: int, y_pos: int, facing: str) -> bool:
         """Place the rover at the specified coordinates (if valid) facing the correct direction.
@@ -94,22 +164,30 @@ class MarsRover(object):
         # Verify that the arguments represent a valid placement. The robot cannot
         # be placed out of bounds or facing an unrecognised direction
         if x_pos > self.x_max or x_pos < 0 or y_pos > self.y_max or y_pos < 0:
-            self.logger.error("Coordinates ({},{}) are out of bounds"
-                              .format(x_pos, y_pos))
+            self.logger.error(REJECTION_MESSAGES["PLACE", REJECT_OUT_OF_BOUNDS], x_pos, y_pos)
+            self._rejected(REJECT_OUT_OF_BOUNDS)
             return False
 
-        if facing not in [d.name for d in Direction]:
-            self.logger.error("Direction {} is not a valid direction".format(facing))
+        if facing not in DIRECTION_VALUES:
+            self.logger.error(REJECTION_MESSAGES["PLACE", REJECT_INVALID_DIRECTION], facing)
+            self._rejected(REJECT_INVALID_DIRECTION)
+            return False
+
+        if self._cell_blocked(x_pos, y_pos):
+            self.logger.error(REJECTION_MESSAGES["PLACE", REJECT_BLOCKED], x_pos, y_pos)
+            self._rejected(REJECT_BLOCKED)
             return False
 
         # This command is a valid placement so update the position and facing of
         # the robot and indicate the robot has been placed (at least) once.
         self.x_pos = x_pos
         self.y_pos = y_pos
-        self.facing = Direction[facing].value
+        self.facing = DIRECTION_VALUES[facing]
         self.placed = True
-        self.logger.info("Successfully placed rover at ({},{}) facing {}"
-                         .format(x_pos, y_pos, facing))
+        if self.recorder is not None:
+            self.recorder.record(self.x_pos, self.y_pos, self.facing, True)
+        self.logger.info("Successfully placed rover at (%s,%s) facing %s",
+                         x_pos, y_pos, facing)
         return True
 
     def _turn_rover(self, command: str) -> bool:
@@ -125,31 +203,26 @@ class MarsRover(object):
         self.logger.info("Turning rover")
 
         if not self.placed:
-            self.logger.info("Rover has not yet been placed")
+            self.logger.info(REJECTION_MESSAGES["COMMAND", REJECT_NOT_PLACED])
+            if self.metrics is not None:
+                self.metrics.reject(REJECT_NOT_PLACED)
             return True
 
         if command not in ["LEFT", "RIGHT"]:
-            self.logger.error("Invalid turn command {}".format(command))
+            self.logger.error(REJECTION_MESSAGES["TURN", REJECT_INVALID_TURN], command)
+            self._rejected(REJECT_INVALID_TURN)
             return False
 
-        # Determine the direction we want to be turning in terms of incrementing or
-        # decrementing in the Direction enum.
-        direction = 1
+        # Look up the new direction, wrapping around from the end of the Direction enum
+        # to the start and vice versa.
         if command == "LEFT":
-            direction = -1
-
-        new_facing = self.facing + direction
-
-        # If we have gone outside the bounds of the Direction enum, wrap to start from
-        # the beginning again.
-        if new_facing > 4:
-            new_facing = 1
-        elif new_facing < 1:
-            new_facing = 4
+            self.facing = LEFT_TURNS[self.facing]
+        else:
+            self.facing = RIGHT_TURNS[self.facing]
+        if self.recorder is not None:
+            self.recorder.record(self.x_pos, self.y_pos, self.facing, True)
 
-        self.facing = new_facing
-        self.logger.info("Successfully turned rover to face {}"
-                        .format(Direction(self.facing).name))
+        self.logger.info("Successfully turned rover to face %s", DIRECTION_NAMES[self.facing])
         return True
 
     def _move_rover(self) -> bool:
@@ -160,36 +233,36 @@ class MarsRover(object):
         been placed), False otherwise
         """
         if not self.placed:
-            self.logger.info("Rover has not yet been placed")
+            self.logger.info(REJECTION_MESSAGES["COMMAND", REJECT_NOT_PLACED])
+            if self.metrics is not None:
+                self.metrics.reject(REJECT_NOT_PLACED)
             return True
 
-        self.logger.info("Moving rover {}".format(Direction(self.facing).name))
+        self.logger.info("Moving rover %s", DIRECTION_NAMES[self.facing])
 
         # Calculate where the new position would be if the move occured and check
         # the new position is valid before comitting the move operation.
-        match self.facing:
-            case 1: # North - increase y
-                new_x = self.x_pos
-                new_y = self.y_pos + 1
-            case 2: # East - increase x
-                new_x = self.x_pos + 1
-                new_y = self.y_pos
-            case 3: # South - decrease y
-                new_x = self.x_pos
-                new_y = self.y_pos - 1
-            case 4: # West - decrease x
-                new_x = self.x_pos - 1
-                new_y = self.y_pos
+        x_step, y_step = DIRECTION_STEPS[self.facing]
+        new_x = self.x_pos + x_step
+        new_y = self.y_pos + y_step
 
         if new_x < 0 or new_x > self.x_max or new_y < 0 or new_y > self.y_max:
-            self.logger.error("Move would take rover out of bounds")
+            self.logger.error(REJECTION_MESSAGES["MOVE", REJECT_OUT_OF_BOUNDS])
+            self._rejected(REJECT_OUT_OF_BOUNDS)
+            return False
+
+        if self._cell_blocked(new_x, new_y):
+            self.logger.error(REJECTION_MESSAGES["MOVE", REJECT_BLOCKED])
+            self._rejected(REJECT_BLOCKED)
             return False
 
         self.x_pos = new_x
         self.y_pos = new_y
+        if self.recorder is not None:
+            self.recorder.record(self.x_pos, self.y_pos, self.facing, True)
 
-        self.logger.info("Successfully moved rover {} to ({},{})"
-                         .format(Direction(self.facing).name, new_x, new_y))
+        self.logger.info("Successfully moved rover %s to (%s,%s)",
+                         DIRECTION_NAMES[self.facing], new_x, new_y)
         return True
 
 
@@ -199,12 +272,14 @@ class MarsRover(object):
         """
         self.logger.info("Reporting rover position")
         if not self.placed:
-            self.logger.info("Rover has not yet been placed")
+            self.logger.info(REJECTION_MESSAGES["COMMAND", REJECT_NOT_PLACED])
+            if self.metrics is not None:
+                self.metrics.reject(REJECT_NOT_PLACED)
             return None
 
         return "{},{},{}".format(self.x_pos,
                                  self.y_pos,
-                                 Direction(self.facing).name)
+                                 DIRECTION_NAMES[self.facing])
 
     def recieve_command(self, command: str) -> str:
         """Process a command and perform the appropriate action.
@@ -222,24 +297,84 @@ class MarsRover(object):
         Requests to MOVE, LEFT, RIGHT or REPORT before the rover has been placed
         with a PLACE command will be ignored.
         """
-        self.logger.info('Received command {}'.format(command))
-        command = command.upper()
+        self.logger.info('Received command %s', command)
+        metrics = self.metrics
+        if metrics is not None:
+            started = perf_counter_ns()
+
+        output = None
+        kind, x_pos, y_pos, facing = parse_command(command)
+        if kind == COMMAND_MOVE:
+            if not self._move_rover():
+                self.logger.error("Invalid MOVE command will be ignored")
+        elif kind == COMMAND_LEFT or kind == COMMAND_RIGHT:
+            self._turn_rover(COMMAND_NAMES[kind])
+        elif kind == COMMAND_REPORT:
+            output = self._report()
+        elif kind == COMMAND_PLACE:
+            self.logger.info("Parsing PLACE command %s", command)
+            if not self._place_rover(x_pos, y_pos, DIRECTION_NAMES[facing]):
+                self.logger.error("Invalid PLACE command will be ignored")
+        else:
+            self._ignore_command(command.upper())
+
+        if metrics is not None:
+            metrics.record_command(COMMAND_NAMES[kind] or command.upper().split(" ")[0],
+                                   perf_counter_ns() - started)
+        return output
+
+    def _ignore_command(self, command: str) -> None:
+        """Handle an upper case command that parse_command found can't be followed,
+        logging (and counting in the rover's metrics) why it is ignored.
+        """
         match command.split(" ")[0]:
             case "PLACE":
                 args_tuple = self._parse_place_command(command)
                 if args_tuple is None or not self._place_rover(args_tuple[0], args_tuple[1], args_tuple[2]):
                     self.logger.error("Invalid PLACE command will be ignored")
-            case "MOVE":
-                if not self._move_rover():
-                    self.logger.error("Invalid MOVE command will be ignored")
             case "LEFT" | "RIGHT":
                 if not self._turn_rover(command):
                     self.logger.error("Invalid turn command will be ignored")
-            case "REPORT":
-                return(self._report())
             case _:
-                self.logger.error("Unrecognosed command {} will be ignored"
-                                  .format(command))
+                self.logger.error(REJECTION_MESSAGES["COMMAND", REJECT_UNRECOGNISED], command)
+                if self.metrics is not None:
+                    self.metrics.reject(REJECT_UNRECOGNISED)
+
+    def run_batch(self, commands) -> List[Optional[str]]:
+        """Process a whole script of commands in one call.
+
+        This gives the same results as passing each command to recieve_command in
+        turn, but the script is compiled into opcodes up front (see rover_script)
+        so no string handling or per-command logging happens while it runs.
+
+        Returns the output of every REPORT command in the script, in order. As with
+        recieve_command, a REPORT issued before the rover is placed gives None.
+
+        For a rover that follows each command (see _follows_each_command), such as
+        one with metrics, a trajectory recorder or a journal, the commands are passed
+        to recieve_command one at a time, including those of a CompiledScript that kept
+        them. A CompiledScript without its commands, such as one loaded from bytes, is
+        refused with ValueError by a rover with metrics or a recorder, since its folded
+        moves and turns would be counted and recorded as steps the rover never took
+        (see rover_script.run_compiled). Use rover_script.run_lines to run lines of
+        bytes without compiling them for such rovers.
+
+        Arguments:
+        commands - an iterable of command strings, or a CompiledScript returned by
+                   rover_script.compile_script
+        """
+        from rover_script import CompiledScript, compile_script, run_compiled
+
+        if self._follows_each_command() and not isinstance(commands, CompiledScript):
+            reports = []
+            for command in commands:
+                output = self.recieve_command(command)
+                if parse_command(command)[0] == COMMAND_REPORT:
+                    reports.append(output)
+            return reports
 
-        return None
+        if not isinstance(commands, CompiledScript):
+            commands = compile_script(commands)
 
+        self.logger.info("Running batch of %s commands", commands.command_count)
+        return run_compiled(self, commands)
@@ -15,6 +15,12 @@ class TestMarsRoverMethods(unittest.TestCase):
         rover = MarsRover()
         self._check_rover_fields(rover, None, None, 4, 4, None, False)
 
+    def test_rover_has_no_instance_dict(self):
+        rover = MarsRover()
+        self.assertFalse(hasattr(rover, "__dict__"))
+        with self.assertRaises(AttributeError):
+            rover.speed = 10
+
     def test_rover_invalid_initialisations(self):
         try:
             rover = MarsRover(x_pos=10, y_pos=1, x_max=5, y_max=5, placed=True) # X is out of bounds